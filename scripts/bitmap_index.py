@@ -0,0 +1,188 @@
+import numpy as np
+
+from report_engine import Dictionary, factorize, predicate_mask
+from zone_maps import scan_rows
+
+# Compressed bitmap indexes for low-cardinality dimension columns (status, category,
+# department, ...): one bitmap of row numbers per distinct value. Bitmaps are roaring-style:
+# rows are split by their high 16 bits into containers, each stored either as a sorted
+# uint16 array (sparse, <= 4096 rows) or as 1024 64-bit words (dense). Filters on indexed
+# columns become AND / OR of bitmaps, and counts per value come from container cardinalities
+# without reading the column itself.
+
+ARRAY_MAX = 4096
+MAX_VALUES = 1024
+
+def _popcount(words):
+    return int(np.unpackbits(words.view(np.uint8)).sum())
+
+def _to_words(low):
+    bits = np.zeros(1 << 16, dtype=bool)
+    bits[low] = True
+    return np.packbits(bits, bitorder='little').view(np.uint64)
+
+def _to_low(words):
+    return np.flatnonzero(np.unpackbits(words.view(np.uint8), bitorder='little')).astype(np.uint16)
+
+def _is_array(container):
+    return container.dtype == np.uint16
+
+def _shrink(words):
+    # Dense containers that became sparse go back to arrays.
+    return _to_low(words) if _popcount(words) <= ARRAY_MAX else words
+
+def _and(a, b):
+    if _is_array(a) and _is_array(b):
+        return np.intersect1d(a, b, assume_unique=True)
+    if _is_array(b):
+        a, b = b, a
+    if _is_array(a):
+        hit = (b[a >> 6] >> (a & 63).astype(np.uint64)) & np.uint64(1)
+        return a[hit.astype(bool)]
+    return _shrink(a & b)
+
+def _or(a, b):
+    if _is_array(a) and _is_array(b):
+        merged = np.union1d(a, b)
+        return merged if len(merged) <= ARRAY_MAX else _to_words(merged)
+    a = _to_words(a) if _is_array(a) else a
+    b = _to_words(b) if _is_array(b) else b
+    return a | b
+
+class Bitmap:
+    def __init__(self, containers=None):
+        self.containers = containers or {} # high 16 bits -> container
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Bitmap of sorted, unique row numbers."""
+        rows = np.asarray(rows, dtype=np.int64)
+        high = rows >> 16
+        keys, starts = np.unique(high, return_index=True)
+        ends = np.append(starts[1:], len(rows))
+        containers = {}
+        for key, start, end in zip(keys.tolist(), starts, ends):
+            low = (rows[start:end] & 0xFFFF).astype(np.uint16)
+            containers[key] = low if len(low) <= ARRAY_MAX else _to_words(low)
+        return cls(containers)
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls.from_rows(np.flatnonzero(mask))
+
+    def __and__(self, other):
+        containers = {}
+        for key in self.containers.keys() & other.containers.keys():
+            c = _and(self.containers[key], other.containers[key])
+            if len(c) and (_is_array(c) or c.any()):
+                containers[key] = c
+        return Bitmap(containers)
+
+    def __or__(self, other):
+        containers = dict(self.containers)
+        for key, c in other.containers.items():
+            containers[key] = _or(containers[key], c) if key in containers else c
+        return Bitmap(containers)
+
+    def __len__(self):
+        return sum(len(c) if _is_array(c) else _popcount(c) for c in self.containers.values())
+
+    def to_rows(self):
+        parts = []
+        for key in sorted(self.containers):
+            c = self.containers[key]
+            low = c if _is_array(c) else _to_low(c)
+            parts.append((key << 16) + low.astype(np.int64))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def nbytes(self):
+        return sum(c.nbytes for c in self.containers.values())
+
+class BitmapIndex:
+    def __init__(self, labels, bitmaps, categorical, n):
+        self.labels = labels           # distinct values, in the order group_codes reports them
+        self.bitmaps = bitmaps         # one Bitmap per label
+        self.categorical = categorical # categorical columns report empty groups too
+        self.n = n
+
+    @classmethod
+    def build(cls, values, labels=None):
+        categorical = labels is not None and not isinstance(labels, Dictionary)
+        if labels is not None:
+            codes = np.asarray(values)
+            labels = np.asarray(labels, dtype=object)
+        else:
+            labels, codes = factorize(np.asarray(values))
+        order = np.argsort(codes, kind='stable') # rows of each value stay sorted
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        bitmaps = [Bitmap.from_rows(order[bounds[i]:bounds[i + 1]]) for i in range(len(labels))]
+        return cls(labels, bitmaps, categorical, len(codes))
+
+    def lookup(self, op, value):
+        """OR of the bitmaps of every value satisfying `<op> value`."""
+        hit = predicate_mask(np.asarray(self.labels, dtype=object).astype(str), op, value)
+        result = Bitmap()
+        for i in np.flatnonzero(hit):
+            result = result | self.bitmaps[i]
+        return result
+
+    def nbytes(self):
+        return sum(b.nbytes() for b in self.bitmaps)
+
+def bitmap_index_for(frame, column):
+    """The column's bitmap index (built once per table, kept in frame.indexes), or None when the
+    column is not a low-cardinality dimension."""
+    key = ('bitmap', column)
+    if key not in frame.indexes:
+        values = frame.columns[column]
+        labels = frame.categories.get(column)
+        index = None
+        if labels is not None and len(labels) <= MAX_VALUES:
+            index = BitmapIndex.build(values, labels)
+        elif labels is None and values.dtype == object:
+            # Factorize first: ids and free text must not build a bitmap per row just to be dropped.
+            labels, codes = factorize(np.asarray(values))
+            if len(labels) <= MAX_VALUES:
+                index = BitmapIndex.build(codes, Dictionary(labels.tolist()))
+        frame.indexes[key] = index
+    return frame.indexes[key]
+
+def indexable(frame, predicate):
+    if len(predicate) == 2:
+        return all(indexable(frame, child) for child in predicate[1])
+    return bitmap_index_for(frame, predicate[0]) is not None
+
+def predicate_bitmap(frame, predicate):
+    """Bitmap of the rows satisfying a predicate tree whose columns are all indexed."""
+    if len(predicate) == 2:
+        bitmaps = [predicate_bitmap(frame, child) for child in predicate[1]]
+        result = bitmaps[0]
+        for b in bitmaps[1:]:
+            result = result & b if predicate[0] == 'and' else result | b
+        return result
+    column, op, value = predicate
+    return bitmap_index_for(frame, column).lookup(op, value)
+
+def select_rows(frame, indexed, others):
+    """Rows matching all predicates: bitmap AND for the `indexed` ones, then zone maps / row
+    checks for the rest."""
+    rows = None
+    if indexed:
+        bitmap = predicate_bitmap(frame, ('and', indexed))
+        rows = bitmap.to_rows()
+    if others:
+        rows = scan_rows(frame, others, rows)
+    return rows if rows is not None else np.arange(frame.n)
+
+def index_counts(frame, key, predicates):
+    """Row count per value of `key` among rows matching `predicates`, from bitmaps only.
+
+    Returns (labels, counts) with the same labels group_codes would give the filtered rows.
+    """
+    index = bitmap_index_for(frame, key)
+    selected = predicate_bitmap(frame, ('and', predicates)) if predicates else None
+    counts = np.array([len(b & selected) if selected is not None else len(b) for b in index.bitmaps], dtype=np.float64)
+    labels = np.asarray(index.labels)
+    if not index.categorical:
+        labels, counts = labels[counts > 0], counts[counts > 0]
+    return labels, counts
@@ -0,0 +1,181 @@
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import catalog_docs
+import generate_logic
+import inject_report_logic
+import report_rules
+import table_bindings
+from build_manifest import BuildManifest
+from report_ingest import DOMAINS
+
+def _stage(module, func, deps=(), args=(), inputs=(), outputs=(), code=None):
+    # inputs/outputs are the files the build manifest hashes to decide whether a stage can be skipped.
+    return {
+        "module": module, "func": func, "args": tuple(args), "deps": list(deps),
+        "inputs": list(inputs), "outputs": list(outputs), "code": code or [module],
+    }
+
+def build_stages():
+    # Stage name -> what to run and which stages must finish first.
+    stages = {}
+    for domain in DOMAINS:
+        config = DOMAINS[domain]
+        stages[f"ingest:{domain}"] = _stage(
+            "report_ingest", "ingest_domain", args=(domain,),
+            inputs=[config["csv_path"]], outputs=[config["json_path"]], code=["report_ingest", "report_encoding"],
+        )
+
+    # These two rewrite their catalog in place, so the file is both input and output. They work
+    # on different files (the ingested procurement catalog and the app's combined catalog), so
+    # inject_logic does not wait for logic:procurement.
+    procurement = generate_logic.PROCUREMENT_REPORTS
+    catalog = inject_report_logic.CATALOG_PATH
+    stages["logic:procurement"] = _stage(
+        "generate_logic", "update_procurement_reports", deps=["ingest:procurement"], inputs=[report_rules.RULES_PATH],
+        outputs=[procurement], code=generate_logic.LOGIC_CODE + ["build_manifest"],
+    )
+    stages["inject_logic"] = _stage(
+        "inject_report_logic", "update_reports_incremental", inputs=[report_rules.RULES_PATH], outputs=[catalog],
+        code=inject_report_logic.LOGIC_CODE + ["build_manifest"],
+    )
+
+    stages["bindings:procurement"] = _stage(
+        "table_bindings", "write_bindings", deps=["logic:procurement"], args=(procurement,),
+        inputs=[procurement], outputs=[table_bindings.bindings_path(procurement)], code=["table_bindings", "table_catalog"],
+    )
+
+    # One pass per catalog writes the wiki, master dictionary, schema CSV and data-source map.
+    for domain in DOMAINS:
+        source = catalog if domain == "procurement" else DOMAINS[domain]["json_path"]
+        stages[f"docs:{domain}"] = _stage(
+            "catalog_docs", "generate_domain_docs", deps=["inject_logic" if domain == "procurement" else f"ingest:{domain}"],
+            args=(domain,), inputs=[source, report_rules.RULES_PATH], outputs=list(catalog_docs.artifact_paths(domain).values()),
+            code=["catalog_docs", "report_rules"],
+        )
+    return stages
+
+def run_stage(module, func, args):
+    # Runs inside a worker process; stages are addressed by name so nothing unpicklable crosses over.
+    # A stage fails by raising; stage functions must not just print their errors and return.
+    started = time.perf_counter()
+    getattr(importlib.import_module(module), func)(*args)
+    return time.perf_counter() - started
+
+def select_stages(stages, targets):
+    # Targets plus everything they (transitively) depend on.
+    selected = set()
+    todo = list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise KeyError(f"Unknown stage: {name}")
+        if name not in selected:
+            selected.add(name)
+            todo.extend(stages[name]["deps"])
+    return {name: stages[name] for name in stages if name in selected}
+
+def check_acyclic(stages):
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Stage cycle: {' -> '.join(path + [name])}")
+        state[name] = "visiting"
+        for dep in stages[name]["deps"]:
+            if dep not in stages:
+                raise KeyError(f"Stage {name} depends on unknown stage {dep}")
+            visit(dep, path + [name])
+        state[name] = "done"
+
+    for name in stages:
+        visit(name, [])
+
+def run_stages(stages, workers=None, manifest=None):
+    """Run stages on a process pool, starting each one as soon as all of its deps succeeded.
+
+    With a manifest, a stage whose deps were all cached and whose input/output hashes and
+    code version match the last successful run is not re-run.
+    Returns a dict of stage name -> "ok" / "cached" / "failed" / "skipped".
+    """
+    check_acyclic(stages)
+    remaining = {name: set(stage["deps"]) for name, stage in stages.items()}
+    status = {}
+    running = {}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        def submit_ready():
+            changed = True
+            while changed:
+                changed = False
+                for name, deps in list(remaining.items()):
+                    if any(status.get(d) in ("failed", "skipped") for d in deps):
+                        del remaining[name]
+                        status[name] = "skipped"
+                        print(f"[build] skip {name} (dependency failed)")
+                        changed = True
+                    elif all(status.get(d) in ("ok", "cached") for d in deps):
+                        del remaining[name]
+                        stage = stages[name]
+                        if manifest and all(status[d] == "cached" for d in deps) and manifest.is_fresh(name, stage):
+                            status[name] = "cached"
+                            print(f"[build] unchanged {name}")
+                            changed = True
+                            continue
+                        print(f"[build] start {name}")
+                        running[pool.submit(run_stage, stage["module"], stage["func"], stage["args"])] = name
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    elapsed = future.result()
+                    status[name] = "ok"
+                    print(f"[build] done {name} in {elapsed:.2f}s")
+                    if manifest:
+                        manifest.record(name, stages[name])
+                except Exception as e:
+                    status[name] = "failed"
+                    print(f"[build] FAILED {name}: {e}")
+            submit_ready()
+
+    if manifest:
+        manifest.save()
+    ok = sum(1 for s in status.values() if s in ("ok", "cached"))
+    print(f"[build] {ok}/{len(stages)} stages ok in {time.perf_counter() - started:.2f}s")
+    return status
+
+if __name__ == "__main__":
+    # Usage: python build_catalog.py [stage ...] [--workers N] [--list] [--force]
+    args = sys.argv[1:]
+    stages = build_stages()
+
+    if "--list" in args:
+        for name, stage in stages.items():
+            deps = ", ".join(stage["deps"]) or "-"
+            print(f"{name:<28} after: {deps}")
+        sys.exit(0)
+
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+
+    targets = [a for a in args if not a.startswith("--")]
+    if targets:
+        stages = select_stages(stages, targets)
+
+    manifest = BuildManifest()
+    if "--force" in args:
+        manifest.data["stages"] = {}
+    status = run_stages(stages, workers, manifest)
+    sys.exit(0 if all(s in ("ok", "cached") for s in status.values()) else 1)
@@ -0,0 +1,107 @@
+import hashlib
+import importlib.util
+import json
+import os
+
+MANIFEST_PATH = '/Users/max/ncs/data/reports/.build_manifest.json'
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path, chunk_size=1024 * 1024):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def hash_row(report, exclude=("logic",)):
+    # Canonical JSON so key order and whitespace don't change the hash.
+    payload = {k: v for k, v in report.items() if k not in exclude}
+    return hash_bytes(json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+
+def code_version(*modules):
+    """Hash of the source of the given modules; changes whenever the inference code changes.
+
+    Entries that are file paths (e.g. report_rules.json) are hashed as they are.
+    """
+    h = hashlib.sha256()
+    for name in modules:
+        path = name if os.sep in name else importlib.util.find_spec(name).origin
+        with open(path, 'rb') as f:
+            h.update(name.encode('utf-8'))
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+class BuildManifest:
+    """Records input/output content hashes per build stage so unchanged stages can be skipped."""
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.data = {"files": {}, "stages": {}}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    def file_hash(self, path):
+        # Reuse the stored hash while size and mtime are unchanged; only re-read touched files.
+        if not os.path.exists(path):
+            return None
+        st = os.stat(path)
+        cached = self.data["files"].get(path)
+        if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["hash"]
+        digest = hash_file(path)
+        self.data["files"][path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+        return digest
+
+    def _fingerprint(self, stage):
+        return {
+            "inputs": {p: self.file_hash(p) for p in stage.get("inputs", [])},
+            "outputs": {p: self.file_hash(p) for p in stage.get("outputs", [])},
+            "code": code_version(*stage.get("code", [stage["module"]])),
+        }
+
+    def is_fresh(self, name, stage):
+        recorded = self.data["stages"].get(name)
+        if not recorded or not (stage.get("inputs") or stage.get("outputs")):
+            return False
+        current = self._fingerprint(stage)
+        if any(h is None for h in current["outputs"].values()):
+            return False
+        return current == recorded
+
+    def record(self, name, stage):
+        self.data["stages"][name] = self._fingerprint(stage)
+
+    def save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+class RowState:
+    """Per-catalog sidecar with the hash of every report row and the code version that processed it."""
+
+    def __init__(self, catalog_path, code):
+        self.path = catalog_path + ".rows.json"
+        self.code = code
+        self.known = set()
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get("code") == code:
+                self.known = set(saved.get("rows", []))
+        self.seen = []
+
+    def is_current(self, row_hash):
+        self.seen.append(row_hash)
+        return row_hash in self.known
+
+    def updated(self, row_hash):
+        # The row just checked was changed by the run itself; remember its new hash instead.
+        self.seen[-1] = row_hash
+
+    def save(self):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"code": self.code, "rows": sorted(set(self.seen))}, f)
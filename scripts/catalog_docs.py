@@ -0,0 +1,320 @@
+import csv
+import os
+import sys
+
+from report_model import iter_catalog
+from report_rules import load_rules
+
+# Catalog documentation in one pass: the wiki, the master data dictionary, the data schema
+# CSV and the data-source map of a domain's report catalog. The catalog is streamed once (as
+# report_model.Reports), each report's facts (tables, required columns, rule tags) are derived
+# once by report_facts(), and every artifact consumes them in the same loop. The CSV and source
+# map are written row by row; the wiki and the dictionary keep only their per-group rows /
+# column sets until the end.
+# generate_wiki, generate_master_dictionary, generate_schema_csv and generate_report_map are
+# wrappers that ask for a single artifact.
+
+DOCS_ROOT = '/Users/max/ncs/docs/supply_chain'
+
+# Artifact -> file name suffix; files are named <domain><suffix> inside the output directory.
+ARTIFACTS = {
+    "wiki": "_reports_wiki.md",
+    "dictionary": "_master_dictionary.md",
+    "schema": "_data_schema.csv",
+    "map": "_report_data_sources.md",
+}
+
+# Naming conventions shown in the wiki's data preparation guide, per domain.
+DATA_GUIDES = {
+    "procurement": [
+        "| **Spend / Invoices** | `AP Invoices`, `Spend Data`, `Payments` | `Amount`, `Date`, `Vendor`, `Invoice ID` |",
+        "| **Purchase Orders** | `Purchase Orders`, `PO Data` | `PO Number`, `Date`, `Supplier`, `Total` |",
+        "| **Vendors** | `Vendor Master`, `Suppliers` | `Vendor Name`, `ID`, `Category` |",
+        "| **Requisitions** | `Requisitions`, `Requests` | `Req ID`, `Date`, `Status`, `Department` |",
+    ],
+}
+
+def docs_dir(domain):
+    return os.path.join(DOCS_ROOT, domain)
+
+def table_keywords(logic):
+    """Table keywords of a report's logic, over all of its sources."""
+    if not isinstance(logic, dict):
+        return []
+    if 'sources' in logic:
+        return [k for s in logic['sources'] for k in s.get('table_keywords', [])]
+    if 'source' in logic:
+        return list(logic['source'].get('table_keywords', []))
+    return []
+
+def report_facts(report, rules=None):
+    """Everything the artifacts need from one report, derived once."""
+    rules = rules or load_rules()
+    logic = report.get('logic', {})
+    requirements = []
+    if isinstance(logic, dict):
+        for req in logic.get('requirements', []):
+            # Be prescriptive: suggest the first keyword as the column name
+            requirements.append((req.get('keywords', ['Unknown'])[0].title(), req.get('types', ['text'])[0]))
+    return {
+        "logic": logic if isinstance(logic, dict) else {},
+        "tables": table_keywords(logic),
+        "requirements": requirements,
+        "tags": rules.classify_report(report)["tags"],
+    }
+
+# --- Artifacts -----------------------------------------------------------------------------
+
+class WikiWriter:
+    def __init__(self, path, domain):
+        self.path = path
+        self.domain = domain
+        self.groups = {} # category -> module -> table rows
+
+    def add(self, r, facts):
+        cat = r.get('Category 1 (Detailed)', 'Uncategorized')
+        mod = r.get('Module (Category 2)', 'General')
+        title = r.get('Report Title', 'N/A')
+        desc = r.get('benefit', '') + " " + r.get('detailed_explanation', '')
+        sources = list(dict.fromkeys(facts["tables"]))
+        source_str = ", ".join(sources) if sources else r.get('data_needed', 'N/A')
+
+        # Key data points (inferred)
+        tags = facts["tags"]
+        reqs = []
+        if "dated" in tags: reqs.append("Date")
+        if "amount" in tags or "sum" in tags or "spend" in tags: reqs.append("Amount/Cost")
+        if "counts_ids" in tags: reqs.append("ID/Count")
+        if "status" in tags or "category" in tags: reqs.append("Status/Category")
+        req_str = ", ".join(reqs) if reqs else "Standard Columns"
+
+        # Clean text for markdown table
+        desc = desc.replace("\n", " ").replace("|", "-")
+        self.groups.setdefault(cat, {}).setdefault(mod, []).append(f"| **{title}** | {desc} | `{source_str}` | {req_str} |")
+
+    def close(self, total):
+        name = self.domain.replace('_', ' ').title()
+        lines = []
+        lines.append(f"# {name} Reports System: The Complete Wiki")
+        lines.append("\n## 1. System Architecture & How It Works")
+        lines.append("This system uses a **Smart Logic Engine** to bridge the gap between raw data tables and visual analytics.")
+        lines.append("\n### Core Concepts")
+        lines.append("- **Smart Connection**: When you add a report, the system scans your entire workspace (Finance, Supply Chain, etc.) for tables that match the report's requirements.")
+        lines.append("- **Virtual Views (Multi-Source)**: For complex reports requiring data from multiple places (e.g., *Penalty Costs* needing both *Invoices* and *POs*), the system creates a 'Virtual View' that joins these tables on-the-fly without creating messy duplicate data.")
+        lines.append("- **Auto-Binding**: If you name your tables correctly (e.g., 'AP Invoices'), the system connects automatically. If not, you can manually link them.")
+
+        section = 2
+        if self.domain in DATA_GUIDES:
+            lines.append(f"\n## {section}. Data Preparation Guide")
+            lines.append("To ensure reports work immediately, follow these naming conventions for your Custom Tables:")
+            lines.append("| Data Type | Recommended Table Names | Key Columns Needed |")
+            lines.append("|---|---|---|")
+            lines.extend(DATA_GUIDES[self.domain])
+            section += 1
+
+        lines.append(f"\n## {section}. Report Catalog ({total} Reports)")
+        lines.append("Below is the complete list of available reports, organized by Category. Use this to understand exactly what data you need for each.")
+        for cat, modules in sorted(self.groups.items()):
+            lines.append(f"\n### 📂 {cat}")
+            for mod, rows in sorted(modules.items()):
+                lines.append(f"\n#### 🔹 {mod}")
+                lines.append("| Report Title | What It Does | Data Required (Tables) | Key Data Points |")
+                lines.append("|---|---|---|---|")
+                lines.extend(rows)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+
+class DictionaryWriter:
+    def __init__(self, path, rules):
+        self.path = path
+        self.rules = rules
+        self.tables = {} # master table -> {"columns": set, "functions": set}
+        self.masters = {} # table keyword -> master table (None = no bucket)
+
+    def add(self, r, facts):
+        cols = {name for name, _ in facts["requirements"]}
+        funcs = set()
+        tags = facts["tags"]
+        if "counts_ids" in tags:
+            cols.add("ID")
+            funcs.add("Count")
+        if "sums_amounts" in tags:
+            cols.add("Amount")
+            funcs.add("Sum")
+        if "dated" in tags:
+            cols.add("Date")
+            funcs.add("Aging/DateDiff")
+        if "status" in tags:
+            cols.add("Status")
+            funcs.add("Group By")
+        if "department" in tags:
+            cols.add("Department")
+            funcs.add("Group By")
+        if "supplier" in tags:
+            cols.add("Supplier")
+            funcs.add("Group By")
+
+        # Map to a "Master Table" bucket based on keyword (report_rules.json "master_table")
+        for t in facts["tables"]:
+            if t not in self.masters:
+                self.masters[t] = self.rules.classify({"table": t})["master_table"]
+            master = self.masters[t] or f"OTHER_{t.upper()}"
+            entry = self.tables.setdefault(master, {'columns': set(), 'functions': set()})
+            entry['columns'].update(cols)
+            entry['functions'].update(funcs)
+
+    def close(self, total):
+        # Unbucketed tables are left out of the summary, unless the master buckets do not
+        # describe this catalog at all; then every table is listed under its own name.
+        bucketed = any(not t.startswith("OTHER_") for t in self.tables)
+        lines = []
+        lines.append("# Master Data Dictionary")
+        lines.append(f"To power all {total} reports, you need to create these **Core Tables** with the listed columns.")
+        for table, data in sorted(self.tables.items()):
+            if table.startswith("OTHER_"):
+                if bucketed:
+                    continue
+                table = table[len("OTHER_"):]
+            lines.append(f"\n## 🗄️ {table.replace('_', ' ')}")
+            lines.append(f"**Required Columns:**")
+            lines.append(f"> `{'`, `'.join(sorted(data['columns']))}`")
+            lines.append(f"**Used For:**")
+            lines.append(f"> {', '.join(sorted(data['functions']))}")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines))
+
+class SchemaCsvWriter:
+    FIELDS = ['Report Title', 'Category', 'Required Table(s)', 'Required Column 1', 'Required Column 2', 'Required Column 3', 'Logic / Function']
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.FIELDS)
+        self.writer.writeheader()
+
+    def add(self, r, facts):
+        tables = facts["tables"]
+        table_str = " OR ".join(tables) if tables else r.get('data_needed', 'N/A')
+
+        req_cols = [f"{name} ({col_type})" for name, col_type in facts["requirements"]]
+        # Fallback/Heuristics if logic requirements are empty (for simple reports)
+        if not req_cols:
+            tags = facts["tags"]
+            if "counts_ids" in tags:
+                req_cols.append("ID (text)") # Count usually needs an ID
+            if "sums_amounts" in tags or "spend" in tags:
+                req_cols.append("Amount (number)")
+            if "dated" in tags:
+                req_cols.append("Created Date (date)")
+            if "status" in tags:
+                req_cols.append("Status (text)")
+            if "department" in tags:
+                req_cols.append("Department (text)")
+            if "supplier" in tags or "vendor" in tags:
+                req_cols.append("Supplier Name (text)")
+        while len(req_cols) < 3:
+            req_cols.append("")
+
+        processing = facts["logic"].get('processing', [])
+        if processing:
+            steps = []
+            for p in processing:
+                if p['step'] == 'aggregation':
+                    steps.append(f"{p['operation'].upper()} of {p.get('column_ref', 'records')}")
+                elif p['step'] == 'group_by':
+                    steps.append(f"Group by {p.get('group_column_ref', 'Category')}")
+                elif p['step'] == 'calculate_column':
+                    steps.append(f"Calc: {p['name']}")
+            logic_desc = " -> ".join(steps)
+        else:
+            logic_desc = r.get('formula', '')
+
+        self.writer.writerow({
+            'Report Title': r.get('Report Title'),
+            'Category': r.get('Category 1 (Detailed)'),
+            'Required Table(s)': table_str,
+            'Required Column 1': req_cols[0],
+            'Required Column 2': req_cols[1],
+            'Required Column 3': req_cols[2],
+            'Logic / Function': logic_desc
+        })
+
+    def close(self, total):
+        self.file.close()
+
+class SourceMapWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write("# Report Data Source Map\n")
+        self.file.write("| ID | Report Title | Complexity | Data Source(s) | Formula Logic |\n")
+        self.file.write("|---|---|---|---|---|")
+
+    def add(self, r, facts):
+        data_needed = r.get('data_needed', '')
+        complexity = "Low"
+        if "Tables:" in data_needed and "," in data_needed:
+            complexity = "High (Multi-Table)"
+        elif "bucketing" in facts["tags"]:
+            complexity = "Medium (Bucketing)"
+        elif "calculation" in facts["tags"]:
+            complexity = "Medium (Calculation)"
+        source = data_needed.replace("Tables: ", "").replace(" table", "")
+        self.file.write(f"\n| {r.get('id')} | {r.get('Report Title')} | {complexity} | {source} | {r.get('formula', '')} |")
+
+    def close(self, total):
+        self.file.close()
+
+# --- Pipeline ------------------------------------------------------------------------------
+
+def artifact_paths(domain, output_dir=None, artifacts=None):
+    output_dir = output_dir or docs_dir(domain)
+    return {a: os.path.join(output_dir, domain + ARTIFACTS[a]) for a in (artifacts or ARTIFACTS)}
+
+def generate_docs(reports_path, domain, output_dir=None, artifacts=None):
+    """Write the requested artifacts (default: all) for one catalog; returns artifact -> path."""
+    paths = artifact_paths(domain, output_dir, artifacts)
+    os.makedirs(os.path.dirname(next(iter(paths.values()))), exist_ok=True)
+    rules = load_rules()
+    writers = []
+    for artifact, path in paths.items():
+        if artifact == "wiki":
+            writers.append(WikiWriter(path, domain))
+        elif artifact == "dictionary":
+            writers.append(DictionaryWriter(path, rules))
+        elif artifact == "schema":
+            writers.append(SchemaCsvWriter(path))
+        elif artifact == "map":
+            writers.append(SourceMapWriter(path))
+    # Reports are streamed from the file; only the running count outlives each one.
+    total = 0
+    try:
+        for report in iter_catalog(reports_path):
+            facts = report_facts(report, rules)
+            for writer in writers:
+                writer.add(report, facts)
+            total += 1
+    finally:
+        for writer in writers:
+            writer.close(total)
+    print(f"Generated {', '.join(paths)} for {total} {domain} reports in {os.path.dirname(next(iter(paths.values())))}")
+    return paths
+
+def generate_domain_docs(domain):
+    """Docs for one of report_ingest.DOMAINS (procurement reads the logic-injected catalog)."""
+    if domain == "procurement":
+        from inject_report_logic import CATALOG_PATH
+        return generate_docs(CATALOG_PATH, domain)
+    from report_ingest import DOMAINS
+    return generate_docs(DOMAINS[domain]["json_path"], domain)
+
+if __name__ == "__main__":
+    # Usage: python catalog_docs.py <reports.json> <domain> [output_dir] [--only wiki,dictionary,schema,map]
+    args = sys.argv[1:]
+    only = None
+    if "--only" in args:
+        i = args.index("--only")
+        only = args[i + 1].split(",")
+        del args[i:i + 2]
+    if len(args) < 2:
+        print("Usage: python catalog_docs.py <reports.json> <domain> [output_dir] [--only wiki,dictionary,schema,map]")
+        sys.exit(1)
+    generate_docs(args[0], args[1], args[2] if len(args) > 2 else None, only)
@@ -0,0 +1,298 @@
+import csv
+import json
+import os
+import sys
+from collections.abc import Mapping
+
+import numpy as np
+
+from build_manifest import hash_file
+from report_encoding import detect_encoding, iter_clean_lines
+from report_engine import Dictionary, Frame, infer_column
+from table_catalog import find_table_def
+from zone_maps import ZONE_ROWS, ZoneMap, build_zone_map
+
+# On-disk columnar tables. A table is a directory holding:
+#   _table.json      - row count, version and one entry per column (dtype, file, dictionary)
+#   <column>.bin     - fixed-width little-endian array (float64, datetime64 or int32 codes)
+#   <column>.dict.json - sorted dictionary for dimension / low-cardinality string columns; the
+#                      .bin file holds codes
+#   <column>.offsets.bin - int64 row offsets into .bin for the other string columns (ids, free
+#                      text), whose .bin file is their UTF-8 text; read whole on first access
+#   _zones.npz       - per-chunk zone maps (see zone_maps.py), loaded into frame.indexes
+# Columns are memory-mapped on first access, so opening a table is zero-copy and a report
+# that touches 2 of 30 columns only ever pages in those 2 files.
+
+META_FILE = '_table.json'
+ZONES_FILE = '_zones.npz'
+CHUNK_ROWS = 65536
+# Undeclared string columns keep their dictionary only up to this many values (and at most one
+# value per two rows); beyond that a dictionary is as large as the column and buys no scan.
+DICTIONARY_MAX_VALUES = 65536
+
+DTYPES = {
+    'number': '<f8',
+    'date': '<M8[D]',
+    'datetime': '<M8[s]',
+}
+
+class MappedColumns(Mapping):
+    """Column name -> np.memmap, mapped lazily on first access."""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.meta = {c['name']: c for c in meta['columns']}
+        self.rows = meta['rows']
+        self.mapped = {}
+
+    def __getitem__(self, name):
+        if name not in self.mapped:
+            col = self.meta[name]
+            if self.rows == 0:
+                self.mapped[name] = np.empty(0, dtype=col['dtype'])
+            elif col.get('offsets'):
+                self.mapped[name] = _read_strings(os.path.join(self.path, col['file']), os.path.join(self.path, col['offsets']), self.rows)
+            else:
+                self.mapped[name] = np.memmap(os.path.join(self.path, col['file']), dtype=col['dtype'], mode='r', shape=(self.rows,))
+        return self.mapped[name]
+
+    def __iter__(self):
+        return iter(self.meta)
+
+    def __len__(self):
+        return len(self.meta)
+
+class LazyDictionaries(Mapping):
+    """Column name -> dictionary labels, read only for string columns that are actually used."""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.files = {c['name']: c['dictionary'] for c in meta['columns'] if c.get('dictionary')}
+        self.loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self.loaded:
+            with open(os.path.join(self.path, self.files[name]), 'r', encoding='utf-8') as f:
+                self.loaded[name] = Dictionary(json.load(f))
+        return self.loaded[name]
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+def open_table(path):
+    """Open a converted table as a report_engine Frame backed by memory-mapped column files."""
+    with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    frame = Frame(MappedColumns(path, meta), LazyDictionaries(path, meta), n=meta['rows'])
+    frame.version = meta['version']
+    frame.meta = meta
+    zones_path = os.path.join(path, ZONES_FILE)
+    if os.path.exists(zones_path) and meta.get('zone_rows') == ZONE_ROWS: # else rebuilt on first use
+        with np.load(zones_path) as zones:
+            for i, col in enumerate(meta['columns']):
+                arrays = {k: zones[f'c{i}_{k}'] for k in ('mins', 'maxs', 'present') if f'c{i}_{k}' in zones}
+                if arrays:
+                    nlabels = len(frame.categories[col['name']]) if col.get('dictionary') else None
+                    kind = 'c' if col.get('dictionary') else 'M' if col['type'] in ('date', 'datetime') else 'f'
+                    frame.indexes[('zone_map', col['name'])] = ZoneMap.from_arrays(kind, arrays, meta['zone_rows'], nlabels)
+    return frame
+
+def _file_name(name):
+    return "".join(ch if ch.isalnum() or ch in '-_' else '_' for ch in name)
+
+def _file_names(header):
+    # Column -> file stem, suffixed where two names sanitise to the same stem (compared without
+    # case, for case-insensitive file systems).
+    stems, used = {}, set()
+    for name in header:
+        base = stem = _file_name(name)
+        n = 1
+        while stem.lower() in used:
+            n += 1
+            stem = f"{base}_{n}"
+        used.add(stem.lower())
+        stems[name] = stem
+    return stems
+
+class _StringWriter:
+    # Plain (not dictionary-encoded) strings: UTF-8 text plus int64 end offsets per row.
+    def __init__(self, path, offsets_path):
+        self.file = open(path, 'wb')
+        self.offsets = open(offsets_path, 'wb')
+        self.position = 0
+        np.zeros(1, dtype='<i8').tofile(self.offsets)
+
+    def write(self, values):
+        encoded = [v.encode('utf-8') for v in values]
+        ends = self.position + np.cumsum([len(b) for b in encoded], dtype=np.int64)
+        self.file.write(b''.join(encoded))
+        ends.astype('<i8').tofile(self.offsets)
+        if len(ends):
+            self.position = int(ends[-1])
+
+    def close(self):
+        self.file.close()
+        self.offsets.close()
+
+def _read_strings(path, offsets_path, rows):
+    offsets = np.fromfile(offsets_path, dtype='<i8', count=rows + 1).tolist()
+    with open(path, 'rb') as f:
+        data = f.read()
+    out = np.empty(rows, dtype=object)
+    out[:] = [data[a:b].decode('utf-8') for a, b in zip(offsets[:-1], offsets[1:])]
+    return out
+
+def _column_types(header, table_def, sample_rows):
+    declared = {c['name']: c for c in (table_def or {}).get('columns', [])}
+    types = {}
+    for i, name in enumerate(header):
+        col = declared.get(name)
+        if col and col['type'] in DTYPES:
+            types[name] = col['type']
+        elif col:
+            types[name] = 'string'
+        else:
+            # Not declared in wiki_data.json: infer from the sampled rows.
+            inferred = infer_column([row[i] if i < len(row) else '' for row in sample_rows])
+            types[name] = {'f': 'number', 'M': 'date'}.get(inferred.dtype.kind, 'string')
+    return types
+
+def _encode_chunk(values, kind):
+    if kind == 'number':
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            if v not in ('', None):
+                try:
+                    out[i] = float(v.replace(',', ''))
+                except ValueError:
+                    pass
+        return out
+    unit = 'D' if kind == 'date' else 's'
+    out = np.full(len(values), np.datetime64('NaT'), dtype=f'datetime64[{unit}]')
+    for i, v in enumerate(values):
+        if v:
+            try:
+                out[i] = np.datetime64(v[:10] if unit == 'D' else v[:19].replace(' ', 'T'), unit)
+            except ValueError:
+                pass
+    return out
+
+def _decode_to_strings(stem, labels, rows, chunk_rows):
+    # Rewrite a first-seen-order code file as plain strings.
+    codes = np.fromfile(stem + '.bin', dtype='<i4') if rows else np.empty(0, dtype=np.int32)
+    labels = np.asarray(labels, dtype=object)
+    writer = _StringWriter(stem + '.bin.tmp', stem + '.offsets.bin')
+    try:
+        for start in range(0, rows, chunk_rows):
+            writer.write(labels[codes[start:start + chunk_rows]].tolist())
+    finally:
+        writer.close()
+    os.replace(stem + '.bin.tmp', stem + '.bin')
+
+def convert_csv(csv_path, out_dir, table_id=None, chunk_rows=CHUNK_ROWS):
+    """Convert a CSV export into a column-store table directory, streaming chunk by chunk."""
+    encoding = detect_encoding(csv_path, marker=None)
+    lines = iter_clean_lines(csv_path, encoding)
+    reader = csv.reader(lines)
+    header = next(reader)
+    table_def = find_table_def(table_id or os.path.splitext(os.path.basename(csv_path))[0])
+
+    os.makedirs(out_dir, exist_ok=True)
+    chunk = [row for _, row in zip(range(chunk_rows), reader)]
+    types = _column_types(header, table_def, chunk[:200])
+    roles = {c['name']: c.get('role') for c in (table_def or {}).get('columns', [])}
+    stems = _file_names(header)
+    # Strings are dictionary-encoded unless they are ids; undeclared ones may still be demoted
+    # to plain strings once their cardinality is known.
+    dictionaries = {name: {} for name in header if types[name] == 'string' and roles.get(name) != 'id'}
+    files = {}
+    for name in header:
+        path = os.path.join(out_dir, stems[name] + '.bin')
+        if types[name] == 'string' and name not in dictionaries:
+            files[name] = _StringWriter(path, os.path.join(out_dir, stems[name] + '.offsets.bin'))
+        else:
+            files[name] = open(path, 'wb')
+
+    rows = 0
+    try:
+        while chunk:
+            for i, name in enumerate(header):
+                values = [row[i] if i < len(row) else '' for row in chunk]
+                if name in dictionaries:
+                    # Codes in first-seen order for now; remapped to sorted order at the end.
+                    d = dictionaries[name]
+                    np.fromiter((d.setdefault(v, len(d)) for v in values), dtype=np.int32, count=len(values)).tofile(files[name])
+                elif types[name] == 'string':
+                    files[name].write(values)
+                else:
+                    _encode_chunk(values, types[name]).tofile(files[name])
+            rows += len(chunk)
+            chunk = [row for _, row in zip(range(chunk_rows), reader)]
+    finally:
+        for f in files.values():
+            f.close()
+
+    for name in list(dictionaries):
+        d = dictionaries[name]
+        if roles.get(name) != 'dimension' and (len(d) > DICTIONARY_MAX_VALUES or len(d) * 2 > rows):
+            _decode_to_strings(os.path.join(out_dir, stems[name]), sorted(d, key=d.get), rows, chunk_rows)
+            del dictionaries[name]
+
+    columns = []
+    zone_arrays = {}
+    for i, name in enumerate(header):
+        file_name = stems[name] + '.bin'
+        col = {'name': name, 'type': types[name], 'role': roles.get(name), 'file': file_name}
+        if name in dictionaries:
+            labels = sorted(dictionaries[name], key=dictionaries[name].get)
+            order = np.argsort(np.asarray(labels, dtype=object).astype(str), kind='stable')
+            remap = np.empty(len(labels), dtype=np.int32)
+            remap[order] = np.arange(len(labels), dtype=np.int32)
+            if rows:
+                codes = np.memmap(os.path.join(out_dir, file_name), dtype='<i4', mode='r+', shape=(rows,))
+                for start in range(0, rows, chunk_rows):
+                    codes[start:start + chunk_rows] = remap[codes[start:start + chunk_rows]]
+                codes.flush()
+                del codes
+            col['dtype'] = '<i4'
+            col['dictionary'] = stems[name] + '.dict.json'
+            labels = [labels[i] for i in order]
+            with open(os.path.join(out_dir, col['dictionary']), 'w', encoding='utf-8') as f:
+                json.dump(labels, f)
+        elif types[name] == 'string':
+            col['dtype'] = 'object'
+            col['offsets'] = stems[name] + '.offsets.bin'
+        else:
+            col['dtype'] = DTYPES[types[name]]
+        columns.append(col)
+        if rows and 'offsets' not in col: # raw strings have no zone map
+            values = np.memmap(os.path.join(out_dir, file_name), dtype=col['dtype'], mode='r', shape=(rows,))
+            zones = build_zone_map(values, labels if name in dictionaries else None)
+            del values
+            for key, array in zones.to_arrays().items():
+                zone_arrays[f'c{i}_{key}'] = array
+
+    meta = {
+        'table_id': table_def['table_id'] if table_def else table_id,
+        'rows': rows,
+        'zone_rows': ZONE_ROWS,
+        'version': hash_file(csv_path)[:16],
+        'source': os.path.abspath(csv_path),
+        'columns': columns,
+    }
+    np.savez(os.path.join(out_dir, ZONES_FILE), **zone_arrays)
+    with open(os.path.join(out_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=4)
+
+    print(f"Converted {rows} rows x {len(header)} columns from {csv_path} into {out_dir}")
+    return meta
+
+if __name__ == "__main__":
+    # Usage: python column_store.py <csv_path> <out_dir> [table_id]
+    if len(sys.argv) < 3:
+        print("Usage: python column_store.py <csv_path> <out_dir> [table_id]")
+        sys.exit(1)
+    convert_csv(sys.argv[1], sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
@@ -0,0 +1,80 @@
+import numpy as np
+
+from report_engine import measure, to_dates
+
+# Sorted date index for aging (date_diff_buckets) queries. Dates are sorted once and every
+# measure gets a prefix-sum array in the same order, so the count / sum of any age bucket at
+# any as-of date is two binary searches and two prefix-sum lookups: O(buckets * log n).
+
+class DateIndex:
+    def __init__(self, dates, measures=None):
+        dates = to_dates(dates)
+        self.valid = ~np.isnat(dates)
+        self.order = np.argsort(dates[self.valid], kind='stable')
+        self.days = dates[self.valid][self.order].astype(np.int64)
+        self.prefix = {}
+        for name, values in (measures or {}).items():
+            self.add_measure(name, values)
+
+    def add_measure(self, name, values):
+        """values: one number per row of the indexed table (NaN treated as 0)."""
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64))[self.valid][self.order]
+        self.prefix[name] = np.concatenate([[0.0], np.cumsum(values)])
+
+    def __len__(self):
+        return len(self.days)
+
+    def _bounds(self, buckets, as_of):
+        """Row ranges [lo, hi) in the sorted index for each bucket, for one or many as-of dates."""
+        as_of_days = np.atleast_1d(np.asarray(as_of, dtype='datetime64[D]')).astype(np.int64)
+        lo = np.empty((len(buckets), len(as_of_days)), dtype=np.int64)
+        hi = np.empty_like(lo)
+        for i, b in enumerate(buckets):
+            # age in [min_days, max_days]  <=>  date in [as_of - max_days, as_of - min_days]
+            if 'max_days' in b:
+                lo[i] = np.searchsorted(self.days, as_of_days - b['max_days'], side='left')
+            else:
+                lo[i] = 0
+            if 'min_days' in b:
+                hi[i] = np.searchsorted(self.days, as_of_days - b['min_days'], side='right')
+            else:
+                hi[i] = len(self.days)
+        return lo, np.maximum(hi, lo)
+
+    def bucket_counts(self, buckets, as_of):
+        lo, hi = self._bounds(buckets, as_of)
+        counts = (hi - lo).astype(np.float64)
+        return counts[:, 0] if np.ndim(as_of) == 0 else counts
+
+    def bucket_sums(self, buckets, as_of, measure_name):
+        lo, hi = self._bounds(buckets, as_of)
+        prefix = self.prefix[measure_name]
+        sums = prefix[hi] - prefix[lo]
+        return sums[:, 0] if np.ndim(as_of) == 0 else sums
+
+    def history(self, buckets, as_of_dates, measure_name=None):
+        """Bucket values for every date in `as_of_dates` (e.g. a daily aging history chart).
+
+        Returns an array of shape (len(buckets), len(as_of_dates)).
+        """
+        dates = np.asarray(as_of_dates, dtype='datetime64[D]')
+        if measure_name is None:
+            return self.bucket_counts(buckets, dates)
+        return self.bucket_sums(buckets, dates, measure_name)
+
+def buckets_disjoint(buckets):
+    # The engine assigns each row to the first matching bucket; ranges only agree with that
+    # when no two buckets overlap.
+    ranges = sorted((b.get('min_days', -np.inf), b.get('max_days', np.inf)) for b in buckets)
+    return all(prev[1] < cur[0] for prev, cur in zip(ranges, ranges[1:]))
+
+def date_index_for(frame, date_column, value_column=None):
+    """Build (once per table) the index for `date_column`, with `value_column` as a measure."""
+    key = ('date_index', date_column)
+    index = frame.indexes.get(key)
+    if index is None:
+        index = DateIndex(frame.columns[date_column])
+        frame.indexes[key] = index
+    if value_column and value_column not in index.prefix:
+        index.add_measure(value_column, measure(frame, value_column))
+    return index
@@ -0,0 +1,484 @@
+import re
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+from report_engine import (
+    Grouped, ReportEngineError, Series, aggregate_input, filter_predicate, measure, reduce_all, reduce_groups, to_dates,
+    to_numbers,
+)
+
+# Compiles the free-text `formula` of a report (kept as a custom_formula step when no heuristic
+# in inject_report_logic matched) into something the query planner can run. The vocabulary is
+# the one the catalogs use:
+#
+#   COUNT(Payments) by Method                      SUM(Amount) where Status = 'Open'
+#   TAIL% = Sum(Bottom_Spend) / Total_Spend        (Market_Price - Contract_Price) * Qty
+#   AVG(Receipt_Date - PO_Date) grouped by Vendor  AVG(days since Due_Date)
+#
+# A formula is tokenized and parsed into a small AST, then evaluated column-at-a-time: row
+# expressions are NumPy arithmetic over whole columns (date minus date gives days), aggregates
+# reduce them with report_engine's kernels, per group when there is a `by` clause. Column
+# references outside any aggregate are summed (a bare `A / B` is a ratio of totals). Compiled
+# formulas are cached by text, so a formula shared by many reports is parsed once.
+
+AGGREGATES = {'count': 'count', 'sum': 'sum', 'avg': 'avg', 'average': 'avg', 'mean': 'avg', 'min': 'min', 'max': 'max'}
+MAX_COMPILED = 4096
+COMPARISONS = {'=': 'eq', '==': 'eq', '!=': 'ne', '<>': 'ne', '<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte'}
+
+TOKEN = re.compile(r"""
+    \s*(?:
+      (?P<number>\d+(?:\.\d+)?%?(?![A-Za-z_]))
+    | (?P<name>[A-Za-z_][A-Za-z0-9_%]*|\[[^\]]+\])
+    | (?P<string>'[^']*'|"[^"]*")
+    | (?P<op><=|>=|!=|<>|==|[-+*/(),=<>])
+    )""", re.VERBOSE)
+
+class FormulaError(ReportEngineError):
+    pass
+
+def tokenize(text):
+    tokens, pos = [], 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = TOKEN.match(text, pos)
+        if not match:
+            raise FormulaError(f"Unexpected character {text[pos:].strip()[:1]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'number':
+            value = float(value[:-1]) / 100 if value.endswith('%') else float(value)
+        elif kind == 'string':
+            value = value[1:-1]
+        elif kind == 'name' and value.startswith('['):
+            value = value[1:-1].strip() # [Column With Spaces]
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+# --- AST -----------------------------------------------------------------------------------
+
+class Num:
+    def __init__(self, value):
+        self.value = value
+
+class Col:
+    def __init__(self, ref):
+        self.ref = ref
+
+class Today:
+    pass
+
+class Neg:
+    def __init__(self, operand):
+        self.operand = operand
+
+class BinOp:
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+class Agg:
+    def __init__(self, operation, arg=None):
+        self.operation = operation # count, count_distinct, sum, avg, min, max
+        self.arg = arg             # row expression; a Col for count_distinct, None for count
+
+def _children(node):
+    if isinstance(node, Neg):
+        return [node.operand]
+    if isinstance(node, BinOp):
+        return [node.left, node.right]
+    if isinstance(node, Agg) and node.arg is not None:
+        return [node.arg]
+    return []
+
+def _walk(node):
+    yield node
+    for child in _children(node):
+        yield from _walk(child)
+
+def _has_aggregate(node):
+    return any(isinstance(n, Agg) for n in _walk(node))
+
+def _is_constant(node):
+    return not any(isinstance(n, (Col, Today, Agg)) for n in _walk(node))
+
+def _describe(node):
+    if isinstance(node, Num):
+        return f"{node.value:g}"
+    if isinstance(node, Col):
+        return node.ref
+    if isinstance(node, Today):
+        return "today"
+    if isinstance(node, Neg):
+        return f"-{_describe(node.operand)}"
+    if isinstance(node, BinOp):
+        return f"({_describe(node.left)} {node.op} {_describe(node.right)})"
+    arg = _describe(node.arg) if node.arg is not None else '*'
+    return f"{node.operation}({arg})"
+
+# --- Parser --------------------------------------------------------------------------------
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def word(self, offset=0):
+        kind, value = self.peek(offset)
+        return value.lower() if kind == 'name' else None
+
+    def take(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, op):
+        kind, value = self.take()
+        if kind != 'op' or value != op:
+            raise FormulaError(f"Expected '{op}'" + (f" before {value!r}" if value is not None else " at end of formula"))
+
+    def formula(self):
+        label = None
+        kind, value = self.peek(1)
+        if self.peek()[0] == 'name' and kind == 'op' and value == '=' and self.peek(2)[0] != 'string':
+            label = self.take()[1]
+            self.take()
+        conditions, key = [], None
+        bare = self.word() == 'where'
+        if bare:
+            self.take()
+        if bare or self.at_condition():
+            expr = Agg('count') # a bare condition counts the rows that meet it
+            conditions += self.conditions()
+        else:
+            expr = self.expr()
+        while self.peek()[0] is not None:
+            word = self.word()
+            if word == 'where':
+                self.take()
+                conditions += self.conditions()
+            elif word == 'by' or (word == 'grouped' and self.word(1) == 'by'):
+                if key is not None:
+                    raise FormulaError("Only one 'by' clause is supported")
+                self.pos += 1 if word == 'by' else 2
+                key = self.name_words()
+            else:
+                raise FormulaError(f"Unexpected {self.peek()[1]!r}")
+        return label, expr, conditions, key
+
+    def at_condition(self):
+        i = 0
+        while self.peek(i)[0] == 'name':
+            i += 1
+        kind, value = self.peek(i)
+        return i > 0 and kind == 'op' and value in COMPARISONS and self.peek(i + 1)[0] in ('string', 'number')
+
+    def name_words(self):
+        # Multi-word column names in clauses: 'by Cost Center' -> 'Cost Center'.
+        words = []
+        while self.peek()[0] == 'name' and self.word() not in ('where', 'by', 'and', 'grouped'):
+            words.append(self.take()[1])
+        if not words:
+            raise FormulaError("Expected a column name")
+        return ' '.join(words)
+
+    def conditions(self):
+        out = [self.condition()]
+        while self.word() == 'and':
+            self.take()
+            out.append(self.condition())
+        return out
+
+    def condition(self):
+        column = self.name_words()
+        kind, op = self.take()
+        if kind != 'op' or op not in COMPARISONS:
+            raise FormulaError(f"Expected a comparison after {column!r}")
+        kind, value = self.take()
+        if kind not in ('number', 'string', 'name'):
+            raise FormulaError(f"Expected a value after {column} {op}")
+        return {"column_ref": column, "op": COMPARISONS[op], "value": value}
+
+    def expr(self):
+        node = self.term()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            node = BinOp(self.take()[1], node, self.term())
+        return node
+
+    def term(self):
+        node = self.unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            node = BinOp(self.take()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() == ('op', '-'):
+            self.take()
+            return Neg(self.unary())
+        return self.atom()
+
+    def atom(self):
+        kind, value = self.peek()
+        if kind == 'number':
+            self.take()
+            return Num(value)
+        if (kind, value) == ('op', '('):
+            self.take()
+            node = self.expr()
+            self.expect(')')
+            return node
+        if kind != 'name':
+            raise FormulaError(f"Unexpected {value!r}" if value is not None else "Formula ends early")
+        word = value.lower()
+        if self.peek(1) == ('op', '('):
+            return self.call(word)
+        self.take()
+        if word == 'today':
+            return Today()
+        if word == 'days' and self.word() == 'since':
+            self.take()
+            return BinOp('-', Today(), self.atom())
+        return Col(value)
+
+    def call(self, word):
+        self.pos += 2 # name and '('
+        if word in ('days_between', 'datediff_days'):
+            start = self.expr()
+            self.expect(',')
+            end = self.expr()
+            self.expect(')')
+            return BinOp('-', end, start)
+        operation = AGGREGATES.get(word)
+        if word == 'count_distinct':
+            operation = 'count_distinct'
+        if operation is None:
+            raise FormulaError(f"Unknown function '{word.upper()}'")
+        if operation == 'count' and self.word() == 'distinct':
+            self.take()
+            operation = 'count_distinct'
+        if operation == 'count' and self.peek() == ('op', '*'):
+            self.take()
+            arg = None
+        else:
+            arg = self.expr()
+        self.expect(')')
+        if operation == 'count':
+            arg = None # COUNT(Invoices) / COUNT(id) count rows, like the aggregation step
+        elif operation == 'count_distinct' and not isinstance(arg, Col):
+            raise FormulaError("COUNT(DISTINCT ...) takes a column")
+        elif _has_aggregate(arg):
+            raise FormulaError("Aggregates cannot be nested")
+        return Agg(operation, arg)
+
+def _aggregate_bare(node):
+    """Sum the row expressions that sit outside any aggregate."""
+    if not _has_aggregate(node):
+        if _is_constant(node):
+            return node
+        if isinstance(node, BinOp) and node.op == '/':
+            # A / B over rows reads as a ratio of totals, not a sum of per-row ratios.
+            return BinOp('/', _aggregate_bare(node.left), _aggregate_bare(node.right))
+        return Agg('sum', node)
+    if isinstance(node, Neg):
+        return Neg(_aggregate_bare(node.operand))
+    if isinstance(node, BinOp):
+        return BinOp(node.op, _aggregate_bare(node.left), _aggregate_bare(node.right))
+    return node
+
+# --- Compiled formula ----------------------------------------------------------------------
+
+class Formula:
+    def __init__(self, text):
+        self.text = text
+        self.label, expr, self.conditions, self.key = _Parser(tokenize(text)).formula()
+        self.expr = _aggregate_bare(expr)
+        if _is_constant(self.expr):
+            raise FormulaError("Formula does not read any column")
+        self.aggregates = [n for n in _walk(self.expr) if isinstance(n, Agg)]
+        self.refs = []
+        for node in self.aggregates:
+            for child in _walk(node):
+                if isinstance(child, Col) and child.ref not in self.refs:
+                    self.refs.append(child.ref)
+
+    def describe(self):
+        text = _describe(self.expr)
+        if self.conditions:
+            text += " where " + " and ".join(f"{c['column_ref']} {c['op']} {c['value']}" for c in self.conditions)
+        return text
+
+    def bind(self, col):
+        """ref -> real column for every column the expression reads; `col` is the planner's
+        resolver. 'Due Date' also finds Due_Date and the other way round."""
+        return {ref: bind_ref(ref, col) for ref in self.refs}
+
+    def predicate(self, col, as_of):
+        """The where-clause as a filter_predicate tree, or None."""
+        if not self.conditions:
+            return None
+        step = self.conditions[0] if len(self.conditions) == 1 else {"and": self.conditions}
+        return filter_predicate(step, lambda ref: bind_ref(ref, col), as_of)
+
+    def evaluate(self, frame, columns, grouped=None, as_of=None):
+        """The formula's value over `frame`: a number, or a Series per group of `grouped`."""
+        env = _Env(frame, columns, grouped, as_of)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            value = env.eval(self.expr)
+        if grouped is not None:
+            values = np.broadcast_to(np.asarray(value, dtype=np.float64), (grouped.ngroups,)).copy()
+            return Series(grouped.labels, values)
+        value = float(value)
+        return None if np.isnan(value) or np.isinf(value) else value
+
+def bind_ref(ref, col):
+    try:
+        return col(ref)
+    except ReportEngineError:
+        alternate = ref.replace(' ', '_') if ' ' in ref else ref.replace('_', ' ')
+        if alternate == ref:
+            raise
+        return col(alternate)
+
+class _Env:
+    def __init__(self, frame, columns, grouped, as_of):
+        self.frame = frame
+        self.columns = columns
+        self.grouped = grouped
+        self.today = np.datetime64(as_of, 'D') if as_of else None
+
+    def row(self, node):
+        # Whole-column values of a row expression: float64, or datetime64[D] for dates.
+        if isinstance(node, Num):
+            return node.value
+        if isinstance(node, Today):
+            if self.today is None:
+                raise FormulaError("TODAY needs an as-of date")
+            return self.today
+        if isinstance(node, Col):
+            return self.column(self.columns[node.ref])
+        if isinstance(node, Neg):
+            return -self._number(self.row(node.operand))
+        left, right = self.row(node.left), self.row(node.right)
+        if _is_date(left) or _is_date(right):
+            if node.op != '-' or not (_is_date(left) and _is_date(right)):
+                raise FormulaError(f"Dates can only be subtracted from dates: {_describe(node)}")
+            days = (left - right).astype('timedelta64[D]')
+            return np.where(np.isnat(days), np.nan, days.astype(np.int64)).astype(np.float64) if np.ndim(days) else float(days.astype(np.int64))
+        if node.op == '+':
+            return left + right
+        if node.op == '-':
+            return left - right
+        if node.op == '*':
+            return left * right
+        return left / right
+
+    def column(self, name):
+        frame = self.frame
+        values = frame.columns[name]
+        if name in frame.categories:
+            return frame.memo(('formula_labels', name), lambda: measure_labels(frame.categories[name], values))
+        if values.dtype.kind == 'M':
+            return values.astype('datetime64[D]')
+        if values.dtype == object and len(values) and _looks_like_dates(values):
+            return frame.memo(('formula_dates', name), lambda: to_dates(values))
+        return measure(frame, name)
+
+    def _number(self, value):
+        if _is_date(value):
+            raise FormulaError("Dates can only be subtracted from dates")
+        return value
+
+    def aggregate(self, node):
+        frame, grouped = self.frame, self.grouped
+        if node.operation == 'count':
+            return reduce_groups(grouped, 'count') if grouped is not None else float(frame.n)
+        if node.operation == 'count_distinct':
+            values = aggregate_input(frame, 'count_distinct', self.columns[node.arg.ref])
+            return reduce_groups(grouped, 'count_distinct', values) if grouped is not None else reduce_all('count_distinct', values, frame.n)
+        values = self._number(self.row(node.arg))
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (frame.n,))
+        keep = ~np.isnan(values) # missing dates / undefined ratios drop out of the aggregate
+        if not keep.all():
+            values = values[keep]
+            if grouped is not None:
+                grouped = Grouped(grouped.labels, grouped.codes[keep], grouped.ngroups)
+        if grouped is not None:
+            return reduce_groups(grouped, node.operation, values)
+        result = reduce_all(node.operation, values, len(values))
+        return np.nan if result is None else result
+
+    def eval(self, node):
+        # Aggregate-level expression: numbers, or one value per group.
+        if isinstance(node, Agg):
+            return self.aggregate(node)
+        if isinstance(node, Num):
+            return node.value
+        if isinstance(node, Neg):
+            return -self.eval(node.operand)
+        left, right = self.eval(node.left), self.eval(node.right)
+        if node.op == '+':
+            return np.add(left, right)
+        if node.op == '-':
+            return np.subtract(left, right)
+        if node.op == '*':
+            return np.multiply(left, right)
+        return np.divide(left, right)
+
+def _is_date(value):
+    return isinstance(value, (np.ndarray, np.datetime64)) and np.asarray(value).dtype.kind == 'M'
+
+def _looks_like_dates(values):
+    sample = [v for v in values[:50] if v not in ('', None)]
+    return bool(sample) and all(re.match(r'^\d{4}-\d{2}-\d{2}', str(v)) for v in sample)
+
+def measure_labels(labels, codes):
+    return np.nan_to_num(to_numbers(np.asarray(labels, dtype=object)))[codes]
+
+_compiled = OrderedDict() # text -> Formula, or the message of its FormulaError
+
+def compile_formula(text):
+    """The Formula for `text`, compiled once per distinct text; raises FormulaError.
+
+    The MAX_COMPILED most recently used texts are kept.
+    """
+    text = (text or '').strip()
+    if text in _compiled:
+        _compiled.move_to_end(text)
+    else:
+        try:
+            _compiled[text] = Formula(text)
+        except FormulaError as e:
+            _compiled[text] = f"custom_formula is not executable: {text!r} ({e})"
+        if len(_compiled) > MAX_COMPILED:
+            _compiled.popitem(last=False)
+    compiled = _compiled[text]
+    if isinstance(compiled, str):
+        raise FormulaError(compiled)
+    return compiled
+
+def compiles(text):
+    try:
+        compile_formula(text)
+        return True
+    except FormulaError:
+        return False
+
+if __name__ == "__main__":
+    # Usage: python formula_compiler.py "<formula>" [...]
+    if len(sys.argv) < 2:
+        print('Usage: python formula_compiler.py "<formula>" [...]')
+        sys.exit(1)
+    for text in sys.argv[1:]:
+        try:
+            formula = compile_formula(text)
+            by = f" by {formula.key}" if formula.key else ""
+            print(f"{text!r} -> {formula.describe()}{by}")
+        except FormulaError as e:
+            print(e)
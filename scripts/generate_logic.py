@@ -3,42 +3,21 @@ import json
 import os
 import random
 
+from report_rules import RULES_PATH, classify
+
+# Default paths
+PROCUREMENT_REPORTS = '/Users/max/ncs/data/reports/supply_chain_reports/procurement/procurement_reports.json'
+DUMMY_REPORTS = '/Users/max/ncs/data/reports/supply_chain_reports/procurement/dummy_reports_10k.json'
+
+# Code behind infer_layer / generate_logic; rows processed by another version are re-checked.
+LOGIC_CODE = ["generate_logic", "report_rules", RULES_PATH]
+
 def determine_chart_type(title):
-    title_lower = title.lower()
-    
-    # Time Series / Trend
-    if any(x in title_lower for x in ['trend', 'history', 'over time', 'monthly', 'weekly', 'daily', 'timeline']):
-        return 'Line Chart'
-    
-    # Distribution / Breakdown
-    if any(x in title_lower for x in ['breakdown', 'distribution', 'by category', 'by status', 'share', 'composition']):
-        return 'Pie Chart'
-    
-    # Ranking / Comparison
-    if any(x in title_lower for x in ['top', 'best', 'worst', 'highest', 'lowest', 'ranking', 'performance']):
-        return 'Bar Chart'
-        
-    # Gauge / KPI
-    if any(x in title_lower for x in ['utilization', 'completion', 'rate', 'percentage', 'score', 'kpi']):
-        return 'Gauge Chart'
-        
-    # Default to Table for lists/details
-    if any(x in title_lower for x in ['list', 'register', 'log', 'details', 'report', 'summary']):
-        return 'Table'
-        
-    return 'Table' # Fallback
+    # Trend -> Line, breakdown -> Pie, ranking -> Bar, KPI -> Gauge, else Table (report_rules.json).
+    return classify({"title": title})["chart_type"]
 
 def infer_layer(title, category, module):
-    text = (title + " " + category + " " + module).lower()
-    
-    if any(x in text for x in ['strategic', 'executive', 'financial', 'spend', 'cost', 'profit', 'global', 'kpi']):
-        return 'Strategic'
-    if any(x in text for x in ['planning', 'forecast', 'optimization', 'analysis', 'performance', 'trend', 'history']):
-        return 'Tactical'
-    if any(x in text for x in ['daily', 'log', 'list', 'status', 'tracking', 'real-time', 'execution', 'operational', 'inventory', 'shipment']):
-        return 'Operational'
-        
-    return 'General'
+    return classify({"title": title, "category": category, "module": module})["layer"]
 
 def generate_logic(title, chart_type):
     logic = {
@@ -69,12 +48,21 @@ def generate_logic(title, chart_type):
     return logic
 
 def process_json(input_file, output_file):
+    # Rows unchanged since the last run (same content hash and code version) are skipped, and
+    # an in-place update that changed nothing leaves the file alone.
+    from build_manifest import RowState, code_version, hash_row
+
     try:
         with open(input_file, 'r', encoding='utf-8') as f:
             reports = json.load(f)
             
+        state = RowState(output_file, code_version(*LOGIC_CODE))
         updated_count = 0
+        changed = 0
         for report in reports:
+            if state.is_current(hash_row(report)) and report.get("Layer") and "logic" in report:
+                continue
+
             # Update Layer if missing
             if "Layer" not in report or not report["Layer"]:
                 report["Layer"] = infer_layer(
@@ -83,21 +71,32 @@ def process_json(input_file, output_file):
                     report.get("Module (Category 2)", "")
                 )
                 updated_count += 1
+                changed += 1
                 
             # Ensure logic exists
             if "logic" not in report:
                 report["logic"] = generate_logic(report.get("Report Title", ""), report.get("Chart Type (ECharts)", "Table"))
+                changed += 1
+            state.updated(hash_row(report))
                 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(reports, f, indent=4)
+        if changed or os.path.abspath(input_file) != os.path.abspath(output_file):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(reports, f, indent=4)
+        state.save()
             
         print(f"Successfully updated {updated_count} reports in {output_file}")
+        return updated_count
         
     except FileNotFoundError:
         print(f"Error: Input file '{input_file}' not found.")
     except Exception as e:
         print(f"An error occurred: {e}")
 
+def update_procurement_reports():
+    print(f"Updating existing reports in {PROCUREMENT_REPORTS}...")
+    if process_json(PROCUREMENT_REPORTS, PROCUREMENT_REPORTS) is None:
+        raise RuntimeError(f"Could not update {PROCUREMENT_REPORTS}")
+
 def generate_dummy_data(output_file, count=10000):
     categories = ["Inventory", "Logistics", "Procurement", "Labor", "Equipment", "Safety"]
     modules = ["Inbound", "Outbound", "Storage", "Planning", "Compliance"]
@@ -131,13 +130,8 @@ def generate_dummy_data(output_file, count=10000):
 if __name__ == "__main__":
     import sys
     
-    # Default paths
-    PROCUREMENT_REPORTS = '/Users/max/ncs/data/reports/supply_chain_reports/procurement/procurement_reports.json'
-    DUMMY_REPORTS = '/Users/max/ncs/data/reports/supply_chain_reports/procurement/dummy_reports_10k.json'
-    
     if len(sys.argv) > 1 and sys.argv[1] == 'generate_dummy':
         generate_dummy_data(DUMMY_REPORTS, 10000)
     else:
         # Update existing reports
-        print(f"Updating existing reports in {PROCUREMENT_REPORTS}...")
-        process_json(PROCUREMENT_REPORTS, PROCUREMENT_REPORTS)
+        update_procurement_reports()
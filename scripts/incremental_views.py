@@ -0,0 +1,237 @@
+import datetime
+
+import numpy as np
+
+from query_planner import Aggregate, BucketAggregate, CalcBuckets, GroupBy, HashAggregate, IndexAggregate, Limit, Sort, TopK, plan_report
+from report_engine import Dictionary, Frame, ReportEngineError, Series, evaluate_predicate, group_codes, measure, reduce_groups, to_widget_data
+from sketches import finish, is_sketched, load_sketch, sketch_groups
+
+# Keeps a report's partial aggregate state (sum / count / min / max, overall or per group,
+# including date_diff_buckets aging buckets) so appended rows update the result in time
+# proportional to the batch. Sort / TopK / Limit are re-applied to the small group state when
+# the result is read. Deletes, updates and as-of date changes need a full rebuild.
+# count_distinct and percentiles keep a mergeable sketch per group (approximate, see
+# sketches.py), so views built over separate partitions can be merged and checkpointed cheaply.
+
+EMPTY = (0.0, 0, np.inf, -np.inf)
+
+def _merge(state, s, c, lo, hi):
+    return (state[0] + s, state[1] + c, min(state[2], lo), max(state[3], hi))
+
+def _finish(state, operation):
+    s, c, lo, hi = state
+    if operation == 'count':
+        return float(c)
+    if operation == 'sum':
+        return s
+    if operation in ('avg', 'mean'):
+        return s / c if c else None
+    if operation == 'min':
+        return lo if c else None
+    if operation == 'max':
+        return hi if c else None
+    raise ReportEngineError(f"Unsupported aggregation '{operation}'")
+
+class PlanShape:
+    """A report plan taken apart as: Scan predicates -> optional aging buckets -> one aggregate
+    (overall or per key) -> Sort / TopK / Limit on the small result."""
+
+    def __init__(self, predicates, buckets, key, operation, value, post):
+        self.predicates = predicates
+        self.buckets = buckets
+        self.key = key
+        self.operation = operation
+        self.value = value
+        self.post = post
+
+def split_plan(logic, frame, bindings=None, as_of=None):
+    nodes = plan_report(logic, frame, bindings, as_of).nodes
+    first = nodes.pop(0)
+    predicates = first.predicates # filters pushed into the Scan
+    if isinstance(first, IndexAggregate):
+        # Bitmap-only counts: treat them as a plain count per group.
+        nodes.insert(0, HashAggregate(first.key, 'count') if first.key else Aggregate('count'))
+    if nodes and isinstance(nodes[0], BucketAggregate):
+        # The index-backed aging node: split it back into buckets + per-bucket aggregate.
+        fused = nodes.pop(0)
+        nodes[:0] = [fused.buckets, HashAggregate(fused.buckets.name, fused.operation, fused.value)]
+    buckets = nodes.pop(0) if nodes and isinstance(nodes[0], CalcBuckets) else None
+
+    key = None
+    if nodes and isinstance(nodes[0], HashAggregate):
+        agg = nodes.pop(0)
+        key, operation, value = agg.key, agg.operation, agg.value
+    elif len(nodes) >= 2 and isinstance(nodes[0], GroupBy) and isinstance(nodes[1], Aggregate):
+        key, operation, value = nodes[0].key, nodes[1].operation, nodes[1].value
+        nodes = nodes[2:]
+    elif nodes and isinstance(nodes[0], GroupBy):
+        key, operation, value = nodes.pop(0).key, 'count', None
+    elif nodes and isinstance(nodes[0], Aggregate):
+        agg = nodes.pop(0)
+        operation, value = agg.operation, agg.value
+    else:
+        raise ReportEngineError("Report pipeline is not a single (grouped) aggregation")
+
+    if not all(isinstance(n, (Sort, TopK, Limit)) for n in nodes):
+        raise ReportEngineError("Report pipeline is not a single (grouped) aggregation")
+    return PlanShape(predicates, buckets, key, operation, value, nodes)
+
+class IncrementalView:
+    def __init__(self, logic, bindings=None, as_of=None):
+        self.logic = logic
+        self.bindings = bindings or {}
+        self.as_of = as_of or datetime.date.today().isoformat()
+        self.valid = False
+        self.buckets = None
+        self.predicates = []
+
+    def _split_plan(self, frame):
+        shape = split_plan(self.logic, frame, self.bindings, self.as_of)
+        self.predicates, self.buckets, self.post = shape.predicates, shape.buckets, shape.post
+        self.key, self.operation, self.value = shape.key, shape.operation, shape.value
+        self.sketched = bool(self.value) and is_sketched(self.operation)
+
+    def _finish(self, state):
+        if self.sketched:
+            return finish(state, self.operation) if state is not None else None
+        return _finish(state, self.operation)
+
+    def _fold_sketches(self, frame):
+        labels, sketches = sketch_groups(frame, self.key, self.operation, self.value)
+        if labels is None:
+            self.total = sketches[0] if self.total is None else self.total.merge(sketches[0])
+            return
+        if labels.dtype.kind == 'M':
+            labels = labels.astype(str)
+        for label, sketch in zip(labels.tolist(), sketches):
+            if not sketch.is_empty() or self.categorical:
+                current = self.groups.get(label)
+                self.groups[label] = sketch if current is None else current.merge(sketch)
+
+    def _prepare(self, frame):
+        keep = np.ones(frame.n, dtype=bool)
+        for predicate in self.predicates:
+            keep &= evaluate_predicate(frame, predicate)
+        columns = {c: frame.columns[c][keep] for c in (self.buckets.date_column if self.buckets else None, self.key, self.value) if c and c in frame.columns}
+        scanned = Frame(columns, {c: frame.categories[c] for c in columns if c in frame.categories}, n=int(keep.sum()))
+        if self.buckets:
+            scanned, _ = self.buckets.execute(scanned, scanned)
+        return scanned
+
+    def _fold(self, frame):
+        frame = self._prepare(frame)
+        if self.key is not None:
+            self.categorical = self.key in frame.categories and not isinstance(frame.categories[self.key], Dictionary)
+        if self.sketched:
+            return self._fold_sketches(frame)
+        values = measure(frame, self.value) if self.value else np.zeros(frame.n)
+
+        if self.key is None:
+            if frame.n:
+                self.total = _merge(self.total, float(values.sum()), frame.n, float(values.min()), float(values.max()))
+            return
+
+        grouped = group_codes(frame, self.key)
+        counts = np.bincount(grouped.codes, minlength=grouped.ngroups)
+        sums = np.bincount(grouped.codes, weights=values, minlength=grouped.ngroups)
+        mins = reduce_groups(grouped, 'min', values) if frame.n else np.full(grouped.ngroups, np.inf)
+        maxs = reduce_groups(grouped, 'max', values) if frame.n else np.full(grouped.ngroups, -np.inf)
+        labels = grouped.labels
+        if labels.dtype.kind == 'M':
+            labels = labels.astype(str) # keep labels JSON-friendly for checkpoints
+        for i, label in enumerate(labels.tolist()):
+            if counts[i] or self.categorical:
+                lo = mins[i] if counts[i] else np.inf
+                hi = maxs[i] if counts[i] else -np.inf
+                self.groups[label] = _merge(self.groups.get(label, EMPTY), sums[i], int(counts[i]), lo, hi)
+
+    def rebuild(self, frame):
+        """Full recompute from the whole table."""
+        self._split_plan(frame)
+        self.total = None if self.sketched else EMPTY
+        self.groups = {}
+        self.categorical = False
+        self._fold(frame)
+        self.rows = frame.n
+        self.valid = True
+
+    def append(self, batch):
+        """Fold a batch of appended rows into the state; cost is proportional to the batch."""
+        if not self.valid:
+            raise ReportEngineError("View needs a rebuild before appends")
+        self._fold(batch)
+        self.rows += batch.n
+
+    def invalidate(self):
+        """Call after deletes/updates; the next read requires rebuild()."""
+        self.valid = False
+
+    def set_as_of(self, as_of):
+        # Aging buckets and date windows depend on the as-of date, so moving it invalidates the state.
+        if as_of != self.as_of:
+            self.as_of = as_of
+            if self.buckets or self.predicates:
+                self.valid = False
+
+    def result(self):
+        if not self.valid:
+            raise ReportEngineError("View is stale; rebuild() it from the full table")
+        if self.key is None:
+            if self.operation == 'count':
+                return {"value": float(self.total[1])}
+            return to_widget_data(self._finish(self.total), None)
+
+        labels = list(self.groups)
+        if not self.categorical:
+            labels.sort()
+        values = np.array([self._finish(self.groups[label]) for label in labels], dtype=np.float64)
+        state = Series(np.array(labels, dtype=object), values)
+        for node in self.post:
+            _, state = node.execute(None, state)
+        return to_widget_data(state, None)
+
+    def merge(self, other):
+        """Fold in a view of the same report built over another partition of the table."""
+        if not (self.valid and other.valid):
+            raise ReportEngineError("Both views need a rebuild before merging")
+        if self.sketched:
+            if other.total is not None:
+                self.total = self._load(other._dump(other.total)) if self.total is None else self.total.merge(other.total)
+        else:
+            self.total = _merge(self.total, *other.total)
+        for label, state in other.groups.items():
+            current = self.groups.get(label)
+            if current is None:
+                self.groups[label] = self._load(other._dump(state)) # a copy: merges update sketches in place
+            elif self.sketched:
+                current.merge(state)
+            else:
+                self.groups[label] = _merge(current, *state)
+        self.rows += other.rows
+        return self
+
+    def _dump(self, state):
+        if self.sketched:
+            return state.to_dict() if state is not None else None
+        return list(state)
+
+    def _load(self, data):
+        if self.sketched:
+            return load_sketch(data) if data is not None else None
+        return tuple(data)
+
+    def checkpoint(self):
+        """JSON-serialisable state, to resume maintenance without a rebuild."""
+        return {
+            "as_of": self.as_of, "rows": self.rows, "valid": self.valid,
+            "total": self._dump(self.total), "groups": [[k, self._dump(v)] for k, v in self.groups.items()],
+        }
+
+    def restore(self, checkpoint, frame_schema):
+        """Restore from checkpoint(); `frame_schema` only needs the table's columns (it may be empty)."""
+        self.as_of = checkpoint["as_of"]
+        self.rebuild(Frame({c: v[:0] for c, v in frame_schema.columns.items()}, frame_schema.categories))
+        self.rows = checkpoint["rows"]
+        self.valid = checkpoint["valid"]
+        self.total = self._load(checkpoint["total"])
+        self.groups = {k: self._load(v) for k, v in checkpoint["groups"]}
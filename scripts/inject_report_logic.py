@@ -2,15 +2,17 @@
 import json
 import re
 
+from formula_compiler import compiles
+from report_rules import RULES_PATH, classify, classify_report
+
+CATALOG_PATH = '/Users/max/ncs/data/reports/procurements_reports.json'
+
+# Everything generate_logic's output depends on; a change to any of it re-infers every row.
+LOGIC_CODE = ["inject_report_logic", "report_rules", "formula_compiler", RULES_PATH]
+
 def get_department_from_table(table_name):
-    table_name = table_name.upper()
-    if any(x in table_name for x in ['INVOICE', 'PAYMENT', 'GL_', 'BUDGET', 'FINANCE', 'AP_', 'AR_']):
-        return 'finance'
-    if any(x in table_name for x in ['PO', 'PURCHASE', 'SPEND', 'SOURCING', 'CONTRACT', 'VENDOR', 'SUPPLIER', 'REQUISITION']):
-        return 'supply-chain/procurement'
-    if any(x in table_name for x in ['INVENTORY', 'STOCK', 'WAREHOUSE']):
-        return 'supply-chain/warehouse'
-    return 'supply-chain/procurement' # Default
+    # First matching rule of report_rules.json's "department" classifier; procurement by default.
+    return classify({"table": table_name})["department"]
 
 def generate_logic(report):
     formula = report.get('formula', '')
@@ -51,8 +53,10 @@ def generate_logic(report):
             "processing": []
         }
     
+    tags = classify_report(report)["tags"]
+
     # Heuristic 1: Bucketing (Aging)
-    if "grouped by buckets" in formula or "aging" in report.get('Report Title', '').lower():
+    if "aging_buckets" in tags:
         logic["requirements"].append({"key": "date_col", "types": ["date"], "keywords": ["date", "created", "due"]})
         logic["requirements"].append({"key": "amount_col", "types": ["number"], "keywords": ["amount", "total", "value"]})
         logic["processing"].append({
@@ -77,7 +81,7 @@ def generate_logic(report):
         })
         
     # Heuristic 2: Simple Count
-    elif "COUNT" in formula:
+    elif "count" in tags:
         logic["processing"].append({
             "step": "aggregation",
             "operation": "count",
@@ -85,7 +89,7 @@ def generate_logic(report):
         })
         
     # Heuristic 3: Simple Sum
-    elif "SUM" in formula or "Total Spend" in report.get('Report Title', ''):
+    elif "sum" in tags:
         logic["requirements"].append({"key": "amount_col", "types": ["number"], "keywords": ["amount", "spend", "cost"]})
         logic["processing"].append({
             "step": "aggregation",
@@ -95,8 +99,8 @@ def generate_logic(report):
         })
 
     # Heuristic 4: Group By Category/Status
-    elif "grouped by" in formula or "by Status" in report.get('Report Title', '') or "by Category" in report.get('Report Title', ''):
-        group_key = "Status" if "Status" in report.get('Report Title', '') else "Category"
+    elif "grouped" in tags:
+        group_key = "Status" if "status" in tags else "Category"
         logic["requirements"].append({"key": "group_col", "types": ["text"], "keywords": [group_key.lower(), "type"]})
         logic["processing"].append({
             "step": "group_by",
@@ -104,18 +108,16 @@ def generate_logic(report):
             "aggregation": "count"
         })
 
-    # Default/Complex Fallback
+    # Default/Complex Fallback: the planner compiles the formula (formula_compiler.py) when it can
     else:
-        logic["processing"].append({
-            "step": "custom_formula",
-            "formula_raw": formula,
-            "note": "Requires manual configuration or advanced parsing"
-        })
+        step = {"step": "custom_formula", "formula_raw": formula}
+        if not compiles(formula):
+            step["note"] = "Requires manual configuration or advanced parsing"
+        logic["processing"].append(step)
         
     return logic
 
-def update_reports():
-    filepath = '/Users/max/ncs/data/reports/procurements_reports.json'
+def update_reports(filepath=CATALOG_PATH):
     with open(filepath, 'r') as f:
         reports = json.load(f)
         
@@ -127,5 +129,26 @@ def update_reports():
     
     print(f"Updated {len(reports)} reports with smart logic.")
 
+def update_reports_incremental(filepath=CATALOG_PATH):
+    # Only re-infer logic for rows whose content (or this module's code) changed since the last run.
+    from build_manifest import RowState, code_version, hash_row
+
+    with open(filepath, 'r') as f:
+        reports = json.load(f)
+
+    state = RowState(filepath, code_version(*LOGIC_CODE))
+    changed = 0
+    for report in reports:
+        if not state.is_current(hash_row(report)) or not isinstance(report.get('logic'), dict):
+            report['logic'] = generate_logic(report)
+            changed += 1
+
+    if changed:
+        with open(filepath, 'w') as f:
+            json.dump(reports, f, indent=4)
+    state.save()
+
+    print(f"Updated {changed} of {len(reports)} reports with smart logic.")
+
 if __name__ == "__main__":
     update_reports()
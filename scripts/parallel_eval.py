@@ -0,0 +1,238 @@
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from report_engine import (
+    REPORT_ERRORS, Dictionary, Frame, ReportEngineError, bind_frame, evaluate_catalog, evaluate_report, factorize,
+    find_table, report_error,
+)
+
+# Multi-core report evaluation. Tables are handed to the worker processes once, when the pool
+# starts: column_store tables by path (every worker maps the same files, so the OS shares the
+# pages), in-memory frames through multiprocessing.shared_memory blocks (string columns are
+# dictionary-encoded first so they fit in a flat buffer). Tasks then only carry report logic
+# and row ranges. A catalog is split into per-worker chunks that each run as a shared scan;
+# a single report over a big table is split into row ranges whose partial aggregates
+# (incremental_views state) are merged in the parent.
+
+MIN_CHUNK_REPORTS = 16
+MIN_PARTITION_ROWS = 65536
+
+class SharedTable:
+    """A Frame's columns copied into shared memory; `spec` is what a worker needs to map them."""
+
+    def __init__(self, frame):
+        self.blocks = []
+        columns, categories = {}, {}
+        for name in frame.columns:
+            values = np.asarray(frame.columns[name])
+            if name in frame.categories:
+                categories[name] = frame.categories[name]
+            elif values.dtype == object:
+                labels, values = factorize(values)
+                categories[name] = Dictionary(labels.tolist())
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+            self.blocks.append(block)
+            columns[name] = (block.name, values.dtype.str, values.shape)
+        self.spec = {"columns": columns, "categories": {k: (list(v), isinstance(v, Dictionary)) for k, v in categories.items()},
+                     "n": frame.n, "version": frame.version}
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+def table_spec(frame):
+    """How a worker opens `frame`: its column_store directory, or None if it must be shared."""
+    path = getattr(frame.columns, 'path', None)
+    return {"path": path} if path else None
+
+def open_spec(spec, blocks):
+    if "path" in spec:
+        from column_store import open_table
+        return open_table(spec["path"])
+    columns = {}
+    for name, (block_name, dtype, shape) in spec["columns"].items():
+        block = shared_memory.SharedMemory(name=block_name) # pool workers share the parent's resource tracker
+        blocks.append(block)
+        columns[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf)
+    categories = {k: Dictionary(labels) if dictionary else labels for k, (labels, dictionary) in spec["categories"].items()}
+    frame = Frame(columns, categories, n=spec["n"])
+    frame.version = spec["version"]
+    return frame
+
+# --- Worker side ---------------------------------------------------------------------------
+
+_tables = {}
+_blocks = []
+
+def _init_worker(specs):
+    for name, spec in specs.items():
+        _tables[name] = open_spec(spec, _blocks)
+
+def evaluate_chunk(reports, bindings, as_of, approximate):
+    """Worker task: evaluate_catalog over the worker's tables."""
+    return evaluate_catalog(reports, _tables, bindings, as_of, None, approximate)
+
+def _slice(frame, start, stop):
+    return Frame({c: frame.columns[c][start:stop] for c in frame.columns}, frame.categories, n=stop - start)
+
+def _run_partition(logic, table, start, stop, bindings, as_of):
+    from incremental_views import IncrementalView
+    view = IncrementalView(logic, bindings, as_of)
+    view.rebuild(_slice(_tables[table], start, stop))
+    return view.checkpoint()
+
+# --- Parent side ---------------------------------------------------------------------------
+
+class ReportPool:
+    """A process pool with `tables` (name -> Frame) available in every worker.
+
+    Use as a context manager; shared memory is released on close().
+    """
+
+    def __init__(self, tables, workers=None):
+        self.tables = tables
+        self.workers = workers or os.cpu_count()
+        self.shared = []
+        specs = {}
+        for name, frame in tables.items():
+            spec = table_spec(frame)
+            if spec is None:
+                shared = SharedTable(frame)
+                self.shared.append(shared)
+                spec = shared.spec
+            specs[name] = spec
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(specs,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown()
+        for shared in self.shared:
+            shared.close()
+        self.shared = []
+
+    def evaluate_catalog(self, reports, bindings=None, as_of=None, cache=None, approximate=False):
+        """Same result as report_engine.evaluate_catalog, with the reports spread over the workers.
+
+        Reports over the same table(s) are kept together in chunks of at least
+        MIN_CHUNK_REPORTS, so each chunk is still a shared scan inside its worker.
+        """
+        as_of = as_of or datetime.date.today().isoformat()
+        results = {}
+        groups = {}
+        cache_keys = {}
+        for report in reports:
+            logic = report.get('logic')
+            if not isinstance(logic, dict):
+                continue
+            try:
+                sources = logic.get('sources') or [logic.get('source', {})]
+                names = tuple(find_table(source, self.tables) for source in sources)
+                if None in names:
+                    results[report.get('id')] = {"error": "No matching source table"}
+                    continue
+                versions = {name: self.tables[name].version for name in names}
+                key = None
+                if cache is not None and None not in versions.values():
+                    from result_cache import result_key
+                    key = result_key(logic, versions, bindings, as_of, 'approximate' if approximate else None)
+            except REPORT_ERRORS as e:
+                results[report.get('id')] = report_error(e)
+                continue
+            if key is not None:
+                hit = cache.get(key)
+                if hit is not None:
+                    results[report.get('id')] = hit
+                    continue
+                cache_keys[report.get('id')] = (key, list(names))
+            groups.setdefault(names, []).append(report)
+
+        total = sum(len(group) for group in groups.values())
+        size = max(MIN_CHUNK_REPORTS, -(-total // (self.workers * 4)))
+        futures = []
+        for group in groups.values():
+            for i in range(0, len(group), size):
+                futures.append(self.pool.submit(evaluate_chunk, group[i:i + size], bindings, as_of, approximate))
+        for future in futures:
+            for report_id, data in future.result().items():
+                results[report_id] = data
+                if report_id in cache_keys and "error" not in data:
+                    cache.put(cache_keys[report_id][0], data, cache_keys[report_id][1])
+        return results
+
+    def evaluate_report(self, logic, bindings=None, as_of=None, partitions=None):
+        """One report over row partitions of its table, merged from the partial aggregates.
+
+        Reports that are not a single (grouped) aggregation, count_distinct / percentiles,
+        joins and small tables are evaluated in the parent as usual.
+        """
+        from incremental_views import IncrementalView
+        as_of = as_of or datetime.date.today().isoformat()
+        frame = bind_frame(logic, self.tables)
+        if frame is None:
+            raise ReportEngineError("No matching source table")
+        name = next((k for k, v in self.tables.items() if v is frame), None)
+        partitions = partitions or self.workers
+        if name is None or partitions < 2 or frame.n < 2 * MIN_PARTITION_ROWS:
+            return evaluate_report(logic, frame, bindings, as_of)
+        try:
+            view = IncrementalView(logic, bindings, as_of)
+            view.rebuild(_slice(frame, 0, 0)) # validates the plan shape before fanning out
+        except ReportEngineError:
+            return evaluate_report(logic, frame, bindings, as_of)
+        if view.sketched:
+            # Partitions would only merge sketches; keep distinct counts and percentiles exact.
+            return evaluate_report(logic, frame, bindings, as_of)
+
+        bounds = np.linspace(0, frame.n, min(partitions, frame.n // MIN_PARTITION_ROWS) + 1).astype(np.int64)
+        futures = [self.pool.submit(_run_partition, logic, name, int(a), int(b), bindings, as_of) for a, b in zip(bounds[:-1], bounds[1:])]
+        for i, future in enumerate(futures):
+            part = IncrementalView(logic, bindings, as_of)
+            part.restore(future.result(), frame)
+            if i == 0:
+                view = part
+            else:
+                view.merge(part)
+        return view.result()
+
+def evaluate_catalog_parallel(reports, tables, bindings=None, as_of=None, workers=None, cache=None, approximate=False):
+    """One-shot evaluate_catalog on a process pool (see ReportPool for repeated runs)."""
+    with ReportPool(tables, workers) as pool:
+        return pool.evaluate_catalog(reports, bindings, as_of, cache, approximate)
+
+if __name__ == "__main__":
+    # Usage: python parallel_eval.py <reports.json> <table_dir> [<table_dir> ...] [--workers N]
+    args = sys.argv[1:]
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i:i + 2]
+    if len(args) < 2:
+        print("Usage: python parallel_eval.py <reports.json> <table_dir> [<table_dir> ...] [--workers N]")
+        sys.exit(1)
+    from column_store import open_table
+    with open(args[0], 'r', encoding='utf-8') as f:
+        reports = json.load(f)
+    tables = {}
+    for path in args[1:]:
+        frame = open_table(path)
+        tables[frame.meta['table_id']] = frame
+    started = time.perf_counter()
+    results = evaluate_catalog_parallel(reports, tables, workers=workers)
+    errors = sum(1 for data in results.values() if "error" in data)
+    print(f"Evaluated {len(results)} reports ({errors} errors) in {time.perf_counter() - started:.2f}s")
@@ -0,0 +1,448 @@
+import datetime
+import json
+
+import numpy as np
+
+from bitmap_index import bitmap_index_for, index_counts, indexable, predicate_bitmap, select_rows
+from date_index import buckets_disjoint, date_index_for
+from formula_compiler import FormulaError, bind_ref, compile_formula
+from report_engine import (
+    Frame, Grouped, ReportEngineError, Series, aggregate_input, date_diff_buckets, evaluate_predicate,
+    filter_predicate, group_codes, order_series, predicate_columns, reduce_all, reduce_groups,
+    resolve_column, to_dates, to_widget_data, top_indices,
+)
+from sketches import finish, is_sketched, sketch_groups
+
+# Rewrites a report's `processing` steps into a physical plan before running it:
+#   group_by + aggregation  -> one HashAggregate pass
+#   sort + limit            -> TopK (partial selection instead of a full sort)
+#   columns never referenced by the plan are dropped at the Scan.
+#   filters on table columns are pushed into the Scan: predicates on low-cardinality
+#   dimensions are answered by bitmap indexes, the rest skip chunks via zone maps.
+#   counts by an indexed dimension are answered from the bitmaps alone (IndexAggregate).
+#   custom_formula steps are compiled (formula_compiler) into a FormulaAggregate; their
+#   where-clauses become Filters and are pushed down like any other.
+
+def _describe_predicate(predicate):
+    if len(predicate) == 2:
+        return "(" + f" {predicate[0]} ".join(_describe_predicate(p) for p in predicate[1]) + ")"
+    column, op, value = predicate
+    return f"{column} {op} {value}"
+
+class Scan:
+    def __init__(self, columns, predicates=(), indexed=()):
+        self.columns = columns
+        self.predicates = list(predicates)
+        self.indexed = list(indexed) # the predicates answered by bitmap indexes
+
+    def describe(self):
+        text = f"Scan columns=[{', '.join(self.columns)}]"
+        if self.predicates:
+            text += " where " + " and ".join(
+                _describe_predicate(p) + (" [bitmap]" if p in self.indexed else " [zone maps]") for p in self.predicates)
+        return text
+
+    def execute(self, frame, state):
+        if not self.predicates:
+            kept = {c: frame.columns[c] for c in self.columns}
+            scanned = Frame(kept, {c: frame.categories[c] for c in kept if c in frame.categories}, n=frame.n)
+            scanned.cache = frame.cache # same rows, so shared-scan results and indexes stay valid
+            scanned.indexes = frame.indexes
+            return scanned, scanned
+
+        spec = json.dumps(self.predicates, default=str)
+        others = [p for p in self.predicates if p not in self.indexed]
+        rows = frame.memo(('scan_rows', spec), lambda: select_rows(frame, self.indexed, others))
+        kept = {c: frame.columns[c][rows] for c in self.columns}
+        scanned = Frame(kept, {c: frame.categories[c] for c in kept if c in frame.categories}, n=len(rows))
+        if frame.cache is not None:
+            # Reports with the same filters share the filtered rows and everything derived from them.
+            scanned.cache = frame.memo(('scan_cache', spec), dict)
+        scanned.indexes = frame.memo(('scan_indexes', spec), dict)
+        return scanned, scanned
+
+class Filter:
+    def __init__(self, predicate):
+        self.predicate = predicate
+
+    def describe(self):
+        return "Filter " + _describe_predicate(self.predicate)
+
+    def execute(self, frame, state):
+        if not isinstance(state, Frame):
+            raise ReportEngineError("filter must come before group_by / aggregation")
+        keep = evaluate_predicate(frame, self.predicate)
+        filtered = Frame({k: v[keep] for k, v in frame.columns.items()}, frame.categories)
+        return filtered, filtered
+
+class IndexAggregate:
+    """Scan + count (overall or by an indexed dimension) answered from bitmap cardinalities."""
+
+    def __init__(self, key, predicates):
+        self.key = key
+        self.predicates = predicates
+
+    def describe(self):
+        where = " where " + " and ".join(_describe_predicate(p) for p in self.predicates) if self.predicates else ""
+        return f"IndexAggregate count(*){' by ' + self.key if self.key else ''}{where} via BitmapIndex"
+
+    def execute(self, frame, state):
+        def compute():
+            if self.key is None:
+                return float(len(predicate_bitmap(frame, ('and', self.predicates))))
+            return Series(*index_counts(frame, self.key, self.predicates))
+        spec = json.dumps([self.key, self.predicates], default=str)
+        return frame, frame.memo(('index_aggregate', spec), compute)
+
+class CalcBuckets:
+    def __init__(self, name, date_column, buckets, as_of):
+        self.name = name
+        self.date_column = date_column
+        self.buckets = buckets
+        self.as_of = as_of
+
+    def describe(self):
+        return f"CalcBuckets {self.name} <- age({self.date_column}) as of {self.as_of}, {len(self.buckets)} buckets"
+
+    def execute(self, frame, state):
+        spec = (self.date_column, json.dumps(self.buckets, sort_keys=True), self.as_of)
+
+        def compute():
+            codes, labels = date_diff_buckets(to_dates(frame.columns[self.date_column]), self.buckets, self.as_of)
+            keep = codes >= 0
+            return codes[keep], keep, labels
+
+        codes, keep, labels = frame.memo(('bucket_codes',) + spec, compute)
+        columns = {k: v[keep] for k, v in frame.columns.items()}
+        columns[self.name] = codes
+        bucketed = Frame(columns, dict(frame.categories, **{self.name: labels}))
+        if frame.cache is not None:
+            # Same bucket spec -> same surviving rows, so reports can share this sub-cache.
+            bucketed.cache = frame.memo(('bucket_cache', self.name) + spec, dict)
+        return bucketed, bucketed
+
+class BucketAggregate:
+    """CalcBuckets + HashAggregate on the bucket, answered from the table's sorted date index."""
+
+    def __init__(self, buckets, operation, value=None):
+        self.buckets = buckets
+        self.operation = operation
+        self.value = value
+
+    def describe(self):
+        b = self.buckets
+        return f"BucketAggregate {self.operation}({self.value or '*'}) by age({b.date_column}) as of {b.as_of} via DateIndex"
+
+    def execute(self, frame, state):
+        index = date_index_for(frame, self.buckets.date_column, self.value)
+        counts = index.bucket_counts(self.buckets.buckets, self.buckets.as_of)
+        if self.operation == 'count':
+            values = counts
+        else:
+            sums = index.bucket_sums(self.buckets.buckets, self.buckets.as_of, self.value)
+            if self.operation == 'sum':
+                values = sums
+            else:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    values = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        labels = np.asarray([b['label'] for b in self.buckets.buckets], dtype=object)
+        return frame, Series(labels, values)
+
+class GroupBy:
+    def __init__(self, key):
+        self.key = key
+
+    def describe(self):
+        return f"GroupBy key={self.key}"
+
+    def execute(self, frame, state):
+        return frame, group_codes(frame, self.key)
+
+class HashAggregate:
+    def __init__(self, key, operation, value=None):
+        self.key = key
+        self.operation = operation
+        self.value = value
+
+    def describe(self):
+        return f"HashAggregate key={self.key} {self.operation}({self.value or '*'})"
+
+    def execute(self, frame, state):
+        def compute():
+            grouped = group_codes(frame, self.key)
+            values = aggregate_input(frame, self.operation, self.value)
+            return Series(grouped.labels, reduce_groups(grouped, self.operation, values))
+        return frame, frame.memo(('hash_aggregate', self.key, self.operation, self.value), compute)
+
+class Aggregate:
+    def __init__(self, operation, value=None):
+        self.operation = operation
+        self.value = value
+
+    def describe(self):
+        return f"Aggregate {self.operation}({self.value or '*'})"
+
+    def execute(self, frame, state):
+        values = aggregate_input(frame, self.operation, self.value)
+        if isinstance(state, Grouped):
+            return frame, Series(state.labels, reduce_groups(state, self.operation, values))
+        return frame, frame.memo(('aggregate', self.operation, self.value), lambda: reduce_all(self.operation, values, frame.n))
+
+class SketchAggregate:
+    """count_distinct / percentile from mergeable sketches instead of exact sets and sorts."""
+
+    def __init__(self, key, operation, value):
+        self.key = key
+        self.operation = operation
+        self.value = value
+
+    def describe(self):
+        by = f" key={self.key}" if self.key else ""
+        return f"SketchAggregate{by} {self.operation}({self.value}) approximate"
+
+    def execute(self, frame, state):
+        def compute():
+            labels, sketches = sketch_groups(frame, self.key, self.operation, self.value)
+            if labels is None:
+                return finish(sketches[0], self.operation)
+            return Series(labels, np.array([finish(s, self.operation) for s in sketches], dtype=np.float64))
+        return frame, frame.memo(('sketch_aggregate', self.key, self.operation, self.value), compute)
+
+class Sort:
+    def __init__(self, direction, by='value'):
+        self.direction = direction
+        self.by = by
+
+    def describe(self):
+        return f"Sort {self.direction} by {self.by}"
+
+    def execute(self, frame, state):
+        if isinstance(state, Grouped):
+            state = Series(state.labels, reduce_groups(state, 'count'))
+        if not isinstance(state, Series):
+            return frame, state
+        return frame, order_series(state, self.direction, self.by)
+
+class Limit:
+    def __init__(self, count):
+        self.count = count
+
+    def describe(self):
+        return f"Limit {self.count}"
+
+    def execute(self, frame, state):
+        if isinstance(state, Series):
+            return frame, Series(state.labels[:self.count], state.values[:self.count])
+        return frame, state
+
+class TopK:
+    def __init__(self, k, direction, by='value'):
+        self.k = k
+        self.direction = direction
+        self.by = by
+
+    def describe(self):
+        return f"TopK k={self.k} {self.direction} by {self.by}"
+
+    def execute(self, frame, state):
+        if isinstance(state, Grouped):
+            state = Series(state.labels, reduce_groups(state, 'count'))
+        if not isinstance(state, Series):
+            return frame, state
+        # O(n) partition to the k winners, then sort only those k; same order as Sort + Limit.
+        keys = state.values if self.by == 'value' else state.labels
+        picked = top_indices(keys, self.k, self.direction)
+        return frame, Series(state.labels[picked], state.values[picked])
+
+class FormulaAggregate:
+    """A compiled custom_formula (see formula_compiler.py); its where-clause is a Filter before it."""
+
+    def __init__(self, formula, columns, key=None, as_of=None):
+        self.formula = formula
+        self.columns = columns # formula ref -> real column
+        self.key = key
+        self.as_of = as_of
+
+    def describe(self):
+        by = f" key={self.key}" if self.key else ""
+        return f"FormulaAggregate{by} {self.formula.describe()}"
+
+    def execute(self, frame, state):
+        if not isinstance(state, (Frame, Grouped)):
+            raise ReportEngineError("custom_formula must come before aggregation")
+        if self.key is None and isinstance(state, Grouped):
+            return frame, self.formula.evaluate(frame, self.columns, state, self.as_of)
+        spec = (self.formula.text, self.key, tuple(sorted(self.columns.items())), self.as_of)
+        def compute():
+            grouped = group_codes(frame, self.key) if self.key else None
+            return self.formula.evaluate(frame, self.columns, grouped, self.as_of)
+        return frame, frame.memo(('formula',) + spec, compute)
+
+class Unsupported:
+    def __init__(self, step, reason=None):
+        self.step = step
+        self.reason = reason
+
+    def describe(self):
+        return f"Unsupported {self.step.get('step')}"
+
+    def execute(self, frame, state):
+        raise ReportEngineError(self.reason or f"custom_formula is not executable: {self.step.get('formula_raw', '')!r}")
+
+class Plan:
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def explain(self):
+        # Printed as a tree, last operator on top.
+        lines = []
+        for depth, node in enumerate(reversed(self.nodes)):
+            lines.append("  " * depth + node.describe())
+        return "\n".join(lines)
+
+    def execute(self, frame):
+        state = frame
+        for node in self.nodes:
+            frame, state = node.execute(frame, state)
+        return to_widget_data(state, frame)
+
+def _logical_steps(processing, frame, bindings, as_of):
+    # First pass: resolve refs and split inline group_by aggregations into plain nodes.
+    nodes = []
+    calculated = set()
+
+    def col(ref):
+        if ref in calculated:
+            return ref
+        return resolve_column(ref, frame, bindings)
+
+    for step in processing:
+        kind = step.get('step')
+        if kind == 'calculate_column':
+            if step.get('operation') != 'date_diff_buckets':
+                raise ReportEngineError(f"Unsupported calculated column '{step.get('operation')}'")
+            params = step.get('params', {})
+            nodes.append(CalcBuckets(step['name'], col(params['date_column_ref']), params['buckets'], as_of))
+            calculated.add(step['name'])
+        elif kind == 'filter':
+            nodes.append(Filter(filter_predicate(step, col, as_of)))
+        elif kind == 'group_by':
+            key = col(step.get('group_column_ref') or step.get('group_column'))
+            if step.get('aggregation'):
+                value = col(step['value_column_ref']) if step.get('value_column_ref') else None
+                nodes.append(HashAggregate(key, step['aggregation'], value))
+            else:
+                nodes.append(GroupBy(key))
+        elif kind == 'aggregation':
+            value = col(step['column_ref']) if step.get('column_ref') else None
+            nodes.append(Aggregate(step.get('operation', 'count'), value))
+        elif kind == 'sort':
+            nodes.append(Sort(step.get('direction', 'desc'), step.get('by', 'value')))
+        elif kind == 'limit':
+            nodes.append(Limit(int(step.get('count', 10))))
+        elif kind == 'custom_formula':
+            try:
+                formula = compile_formula(step.get('formula_raw', ''))
+            except FormulaError as e:
+                nodes.append(Unsupported(step, str(e)))
+                continue
+            predicate = formula.predicate(col, as_of)
+            if predicate is not None:
+                nodes.append(Filter(predicate))
+            key = bind_ref(formula.key, col) if formula.key else None
+            nodes.append(FormulaAggregate(formula, formula.bind(col), key, as_of))
+        else:
+            raise ReportEngineError(f"Unknown processing step '{kind}'")
+    return nodes
+
+def _fuse(nodes):
+    fused = []
+    for node in nodes:
+        if isinstance(node, Aggregate) and fused and isinstance(fused[-1], GroupBy):
+            node = HashAggregate(fused.pop().key, node.operation, node.value)
+        prev = fused[-1] if fused else None
+        if isinstance(node, Limit) and isinstance(prev, Sort):
+            fused[-1] = TopK(node.count, prev.direction, prev.by)
+        elif (isinstance(node, HashAggregate) and isinstance(prev, CalcBuckets) and node.key == prev.name
+              and node.operation in ('sum', 'count', 'avg', 'mean') and node.value != prev.name
+              and buckets_disjoint(prev.buckets)):
+            # Aging buckets: binary searches over the sorted date index instead of re-bucketing rows.
+            fused[-1] = BucketAggregate(prev, node.operation, node.value)
+        else:
+            fused.append(node)
+    return fused
+
+def _push_down(nodes):
+    # Filters on table columns that run before any aggregation commute with CalcBuckets (both
+    # only drop rows), so they become Scan predicates. Filters on calculated columns stay put.
+    predicates, rest = [], []
+    calculated = set()
+    aggregated = False
+    for node in nodes:
+        if isinstance(node, Filter) and not aggregated and not calculated & set(predicate_columns(node.predicate)):
+            predicates.append(node.predicate)
+            continue
+        if isinstance(node, CalcBuckets):
+            calculated.add(node.name)
+        elif not isinstance(node, Filter):
+            aggregated = True
+        rest.append(node)
+    return predicates, rest
+
+def _used_columns(nodes):
+    used = []
+    calculated = set()
+    for node in nodes:
+        refs = []
+        if isinstance(node, CalcBuckets):
+            refs = [node.date_column]
+            calculated.add(node.name)
+        elif isinstance(node, (GroupBy, HashAggregate, SketchAggregate)):
+            refs = [node.key, getattr(node, 'value', None)]
+        elif isinstance(node, Aggregate):
+            refs = [node.value]
+        elif isinstance(node, BucketAggregate):
+            refs = [node.buckets.date_column, node.value]
+        elif isinstance(node, Filter):
+            refs = predicate_columns(node.predicate)
+        elif isinstance(node, FormulaAggregate):
+            refs = [node.key] + list(node.columns.values())
+        for ref in refs:
+            if ref and ref not in calculated and ref not in used:
+                used.append(ref)
+    return used
+
+def _approximate(nodes):
+    out = []
+    for node in nodes:
+        if isinstance(node, (HashAggregate, Aggregate)) and node.value and is_sketched(node.operation):
+            node = SketchAggregate(getattr(node, 'key', None), node.operation, node.value)
+        out.append(node)
+    return out
+
+def plan_report(logic, frame, bindings=None, as_of=None, approximate=False):
+    """Build an optimised Plan for a report's logic against a specific Frame.
+
+    Requirement bindings stored in the logic (see schema_resolver.py) apply unless `bindings`
+    overrides them.
+    """
+    as_of = as_of or datetime.date.today().isoformat()
+    if logic.get('bindings'):
+        bindings = dict(logic['bindings'], **(bindings or {}))
+    predicates, nodes = _push_down(_logical_steps(logic.get('processing', []), frame, bindings or {}, as_of))
+    nodes = _fuse(nodes)
+    if approximate:
+        nodes = _approximate(nodes)
+    indexed = [p for p in predicates if indexable(frame, p)]
+    if len(indexed) == len(predicates) and nodes:
+        first = nodes[0]
+        if (isinstance(first, (GroupBy, HashAggregate)) and getattr(first, 'operation', 'count') == 'count'
+                and not (isinstance(first, GroupBy) and any(isinstance(n, FormulaAggregate) for n in nodes))
+                and bitmap_index_for(frame, first.key) is not None):
+            return Plan([IndexAggregate(first.key, predicates)] + nodes[1:])
+        if isinstance(first, Aggregate) and first.operation == 'count' and predicates:
+            return Plan([IndexAggregate(None, predicates)] + nodes[1:])
+    return Plan([Scan(_used_columns(nodes), predicates, indexed)] + nodes)
+
+def explain(logic, frame, bindings=None, as_of=None, approximate=False):
+    return plan_report(logic, frame, bindings, as_of, approximate).explain()
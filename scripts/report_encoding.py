@@ -0,0 +1,113 @@
+import codecs
+import mmap
+import os
+
+# Encodings tried, in order, when neither the BOM nor the byte pattern settles it.
+FALLBACK_ENCODINGS = ['utf-16', 'utf-16-le', 'utf-8-sig', 'latin-1', 'cp1252']
+
+SNIFF_BYTES = 64 * 1024
+CHUNK_BYTES = 1024 * 1024
+
+BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+
+def _decodes(sample, encoding):
+    # Incremental decode so a multi-byte char cut off by the sample boundary is not an error.
+    try:
+        codecs.getincrementaldecoder(encoding)('strict').decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+def sniff_encoding(sample):
+    """Guess the encoding of a file from its first bytes: BOM first, then the NUL-byte layout."""
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    # BOM-less UTF-16 puts a NUL in every other byte of ASCII text.
+    if len(sample) >= 2:
+        even_nuls = sample[0::2].count(0)
+        odd_nuls = sample[1::2].count(0)
+        half = len(sample) // 2
+        if odd_nuls > half * 0.3 and odd_nuls > even_nuls * 4:
+            return 'utf-16-le'
+        if even_nuls > half * 0.3 and even_nuls > odd_nuls * 4:
+            return 'utf-16-be'
+
+    if _decodes(sample, 'utf-8'):
+        return 'utf-8'
+    if _decodes(sample, 'cp1252'):
+        return 'cp1252'
+    return 'latin-1'
+
+def detect_encoding(path, marker="Report Title"):
+    """Pick the file's encoding from a bounded prefix, checking the header marker decodes."""
+    with open(path, mode='rb') as f:
+        sample = f.read(SNIFF_BYTES)
+
+    encoding = sniff_encoding(sample)
+    if marker is None or marker in _clean(sample.decode(encoding, errors='replace')):
+        return encoding
+
+    # Unusual file: fall back to the old trial order, still on the prefix only.
+    for encoding in FALLBACK_ENCODINGS:
+        if marker in _clean(sample.decode(encoding, errors='replace')):
+            return encoding
+    return None
+
+def _clean(text):
+    return text.replace('\0', '')
+
+def _is_byte_safe(encoding):
+    # NUL, CR and LF are single bytes that never occur inside a multi-byte sequence
+    # for ASCII-compatible encodings, so they can be cleaned before decoding.
+    name = codecs.lookup(encoding).name
+    return not name.startswith(('utf-16', 'utf-32'))
+
+def _normalise(buf, nul, cr, lf):
+    buf = buf.replace(nul, buf[:0])
+    return buf.replace(cr + lf, lf).replace(cr, lf)
+
+def iter_clean_lines(path, encoding, chunk_size=CHUNK_BYTES):
+    """Yield decoded lines with NULs stripped and \\r\\n / \\r turned into \\n.
+
+    The file is memory-mapped and decoded once, chunk by chunk, through an incremental
+    decoder, so memory stays bounded by `chunk_size` regardless of the file size.
+    """
+    if os.path.getsize(path) == 0:
+        return
+
+    byte_safe = _is_byte_safe(encoding)
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    cr = b'\r' if byte_safe else '\r'
+    carry = cr[:0]
+    partial = ''
+
+    with open(path, mode='rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        for start in range(0, size, chunk_size):
+            final = start + chunk_size >= size
+            chunk = mm[start:start + chunk_size]
+            buf = carry + (chunk if byte_safe else decoder.decode(chunk, final=final))
+
+            # Hold back a trailing \r: it may pair with a \n at the start of the next chunk.
+            carry = cr[:0]
+            if not final and buf.endswith(cr):
+                buf, carry = buf[:-1], cr
+
+            if byte_safe:
+                text = decoder.decode(_normalise(buf, b'\0', b'\r', b'\n'), final=final)
+            else:
+                text = _normalise(buf, '\0', '\r', '\n')
+
+            lines = (partial + text).split('\n')
+            partial = lines.pop()
+            for line in lines:
+                yield line + '\n'
+
+    if partial:
+        yield partial
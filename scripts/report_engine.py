@@ -0,0 +1,601 @@
+import csv
+import datetime
+import json
+import re
+from collections.abc import Mapping
+
+import numpy as np
+
+# Executes the report `logic` DSL emitted by generate_logic / inject_report_logic over columnar
+# tables (dict of column name -> NumPy array). Every step is a whole-column NumPy operation;
+# group-by is sort based (np.unique + bincount), never a per-row Python loop.
+
+class ReportEngineError(Exception):
+    pass
+
+class Frame:
+    """A columnar table. Categorical columns (calculated buckets, dictionary-encoded strings)
+    are stored as int codes, with their labels in `categories`."""
+
+    def __init__(self, columns, categories=None, n=None):
+        # Plain dicts are copied; other mappings (column_store's lazily mapped files) are kept as is.
+        self.columns = dict(columns) if isinstance(columns, dict) else columns
+        self.categories = categories if isinstance(categories, Mapping) and not isinstance(categories, dict) else dict(categories or {})
+        if n is None:
+            n = len(next(iter(self.columns.values()))) if len(self.columns) else 0
+        self.n = n
+        # Set to a dict while a batch of reports shares this frame (see evaluate_catalog).
+        self.cache = None
+        # Version/etag of the underlying table; results are only cached when it is known.
+        self.version = None
+        # Long-lived per-table indexes (e.g. date_index.DateIndex), keyed by kind and column.
+        self.indexes = {}
+
+    def memo(self, key, compute):
+        if self.cache is None:
+            return compute()
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+class Dictionary(list):
+    """Labels of a dictionary-encoded string column. Unlike calculated bucket labels, values that
+    no remaining row holds are not reported as empty groups."""
+
+class Grouped:
+    def __init__(self, labels, codes, ngroups):
+        self.labels = labels
+        self.codes = codes
+        self.ngroups = ngroups
+
+class Series:
+    def __init__(self, labels, values):
+        self.labels = labels
+        self.values = values
+
+# --- Table loading -------------------------------------------------------------------------
+
+def to_numbers(values):
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(str(v).replace(',', ''))
+            except (TypeError, ValueError):
+                pass
+        return out
+
+def to_dates(values):
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+        return values.astype('datetime64[D]')
+    try:
+        return np.asarray([str(v)[:10] if v else 'NaT' for v in values], dtype='datetime64[D]')
+    except ValueError:
+        out = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[D]')
+        for i, v in enumerate(values):
+            try:
+                out[i] = np.datetime64(str(v)[:10], 'D')
+            except ValueError:
+                pass
+        return out
+
+ISO_DATE = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+def infer_column(values):
+    # Numbers, then ISO dates, else strings.
+    sample = [v for v in values[:200] if v not in ('', None)]
+    if not sample:
+        return np.asarray(values, dtype=object)
+    try:
+        [float(v) for v in sample]
+        return to_numbers(values)
+    except (TypeError, ValueError):
+        pass
+    if all(ISO_DATE.match(str(v)) for v in sample):
+        return to_dates(values)
+    return np.asarray(values, dtype=object)
+
+def frame_from_rows(rows):
+    if not rows:
+        return Frame({})
+    names = list(rows[0].keys())
+    return Frame({name: infer_column([r.get(name) for r in rows]) for name in names})
+
+def load_csv_table(path, encoding='utf-8-sig'):
+    with open(path, newline='', encoding=encoding) as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        raw = [[] for _ in header]
+        for row in reader:
+            for i, cell in enumerate(row[:len(header)]):
+                raw[i].append(cell)
+    return Frame({name: infer_column(values) for name, values in zip(header, raw)})
+
+# --- Kernels -------------------------------------------------------------------------------
+
+def resolve_column(ref, frame, bindings):
+    """Map a logic column reference (requirement key or placeholder) to a real column name."""
+    name = bindings.get(ref, ref) if bindings else ref
+    if name in frame:
+        return name
+    lowered = {c.lower(): c for c in frame.columns}
+    if str(name).lower() in lowered:
+        return lowered[str(name).lower()]
+    raise ReportEngineError(f"Column '{ref}' is not bound to a column of the source table")
+
+def column_values(frame, name):
+    """The column's actual values, decoding categorical codes back to their labels."""
+    values = frame.columns[name]
+    if name in frame.categories:
+        return np.asarray(frame.categories[name], dtype=object)[values]
+    return values
+
+def factorize(values):
+    """Return (labels, codes) so that labels[codes] == values."""
+    if values.dtype.kind in 'iu' and len(values):
+        # Dense integer keys (ids, codes): direct addressing instead of a sort.
+        lo, hi = int(values.min()), int(values.max())
+        if hi - lo < 4 * len(values) + 1024:
+            offsets = values - lo
+            present = np.zeros(hi - lo + 1, dtype=bool)
+            present[offsets] = True
+            remap = np.cumsum(present) - 1
+            return np.flatnonzero(present) + lo, remap[offsets]
+    if values.dtype == object:
+        values = values.astype(str)
+    labels, codes = np.unique(values, return_inverse=True)
+    return labels, codes.reshape(-1)
+
+def group_codes(frame, column):
+    def compute():
+        if column in frame.categories:
+            labels = np.asarray(frame.categories[column], dtype=object)
+            codes = frame.columns[column]
+            if isinstance(frame.categories[column], Dictionary):
+                present = np.bincount(codes, minlength=len(labels)) > 0
+                if not present.all():
+                    remap = np.cumsum(present) - 1
+                    return Grouped(labels[present], remap[codes], int(present.sum()))
+            return Grouped(labels, codes, len(labels))
+        labels, codes = factorize(frame.columns[column])
+        return Grouped(labels, codes, len(labels))
+    return frame.memo(('group', column), compute)
+
+def measure(frame, column):
+    def compute():
+        values = frame.columns[column]
+        if values.dtype.kind not in 'fiub':
+            values = to_numbers(values)
+        return np.nan_to_num(values.astype(np.float64, copy=False))
+    return frame.memo(('measure', column), compute)
+
+def percentile_of(operation):
+    """0.5 for 'median', 0.9 for 'p90', ...; None for every other operation."""
+    if operation == 'median':
+        return 0.5
+    match = re.fullmatch(r'p(\d{1,2}(?:\.\d+)?)', str(operation))
+    return float(match.group(1)) / 100 if match else None
+
+def aggregate_input(frame, operation, column):
+    """What an aggregation reads from `column`: value codes (-1 = missing) for count_distinct,
+    numbers with NaN for missing for percentiles, and the measure otherwise."""
+    if column is None:
+        return None
+    if operation == 'count_distinct':
+        def distinct_codes():
+            grouped = group_codes(frame, column)
+            labels = grouped.labels
+            if labels.dtype.kind == 'f':
+                missing = np.isnan(labels)
+            elif labels.dtype.kind == 'M':
+                missing = np.isnat(labels)
+            else:
+                missing = np.isin(np.asarray(labels, dtype=object).astype(str), ['', 'nan', 'NaT', 'None'])
+            return np.where(missing[grouped.codes], -1, grouped.codes)
+        return frame.memo(('distinct_codes', column), distinct_codes)
+    if percentile_of(operation) is not None:
+        def numbers():
+            values = frame.columns[column]
+            return values.astype(np.float64) if values.dtype.kind in 'fiub' else to_numbers(values)
+        return frame.memo(('numbers', column), numbers)
+    return measure(frame, column)
+
+def reduce_groups(grouped, operation, values=None):
+    counts = np.bincount(grouped.codes, minlength=grouped.ngroups)
+    if operation == 'count':
+        return counts.astype(np.float64)
+    if values is None:
+        raise ReportEngineError(f"Aggregation '{operation}' needs a value column")
+    if operation == 'count_distinct':
+        keep = values >= 0
+        width = int(values.max()) + 1 if len(values) else 1
+        pairs = np.unique(grouped.codes[keep].astype(np.int64) * width + values[keep])
+        return np.bincount(pairs // width, minlength=grouped.ngroups).astype(np.float64)
+    q = percentile_of(operation)
+    if q is not None:
+        # Sort by (group, value) once, then interpolate inside each group like np.quantile.
+        keep = ~np.isnan(values)
+        codes, values = grouped.codes[keep], values[keep]
+        values = values[np.lexsort((values, codes))]
+        counts = np.bincount(codes, minlength=grouped.ngroups)
+        pos = np.cumsum(counts) - counts + q * np.maximum(counts - 1, 0)
+        lo, hi = np.floor(pos).astype(np.int64), np.ceil(pos).astype(np.int64)
+        out = np.full(grouped.ngroups, np.nan)
+        has = counts > 0
+        out[has] = values[lo[has]] + (values[hi[has]] - values[lo[has]]) * (pos[has] - lo[has])
+        return out
+    sums = np.bincount(grouped.codes, weights=values, minlength=grouped.ngroups)
+    if operation == 'sum':
+        return sums
+    if operation in ('avg', 'mean'):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    if operation in ('min', 'max'):
+        order = np.lexsort((values, grouped.codes))
+        codes = grouped.codes[order]
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        ends = np.r_[starts[1:], len(codes)] - 1
+        picked = values[order][starts if operation == 'min' else ends]
+        out = np.full(grouped.ngroups, np.nan)
+        out[codes[starts]] = picked
+        return out
+    raise ReportEngineError(f"Unsupported aggregation '{operation}'")
+
+def reduce_all(operation, values, n):
+    if operation == 'count':
+        return float(n)
+    if values is None:
+        raise ReportEngineError(f"Aggregation '{operation}' needs a value column")
+    if operation == 'count_distinct':
+        return float(len(np.unique(values[values >= 0])))
+    q = percentile_of(operation)
+    if q is not None:
+        values = values[~np.isnan(values)]
+        return float(np.quantile(values, q)) if len(values) else None
+    if operation == 'sum':
+        return float(values.sum())
+    if operation in ('avg', 'mean'):
+        return float(values.mean()) if n else None
+    if operation == 'min':
+        return float(values.min()) if n else None
+    if operation == 'max':
+        return float(values.max()) if n else None
+    raise ReportEngineError(f"Unsupported aggregation '{operation}'")
+
+def date_diff_buckets(dates, buckets, as_of):
+    """Bucket each date by its age in days at `as_of`. Returns (codes, labels); -1 = no bucket."""
+    ages = (np.datetime64(as_of, 'D') - dates).astype('timedelta64[D]').astype(np.int64)
+    valid = ~np.isnat(dates)
+    codes = np.full(len(dates), -1, dtype=np.int64)
+    # Assign in reverse so the first matching bucket wins, like a chain of ifs.
+    for i in range(len(buckets) - 1, -1, -1):
+        b = buckets[i]
+        hit = valid.copy()
+        if 'min_days' in b:
+            hit &= ages >= b['min_days']
+        if 'max_days' in b:
+            hit &= ages <= b['max_days']
+        codes[hit] = i
+    return codes, [b['label'] for b in buckets]
+
+FILTER_OPS = ('eq', 'ne', 'in', 'not_in', 'lt', 'lte', 'gt', 'gte', 'between')
+
+def filter_predicate(step, col, as_of):
+    """Normalise a `filter` step (or one of its conditions) to a predicate tree.
+
+    Leaves are {"column_ref": ..., "op": "gte", "value": ...}, with "last_days": N as shorthand
+    for the N days up to and including `as_of`; they become (column, op, value). Compound
+    conditions {"and": [...]} / {"or": [...]} (optionally under "where") become
+    ('and' | 'or', [children]). `col` maps a column ref to a real column name.
+    """
+    if 'where' in step:
+        return filter_predicate(step['where'], col, as_of)
+    for kind in ('and', 'or'):
+        if kind in step:
+            return kind, [filter_predicate(child, col, as_of) for child in step[kind]]
+    column = col(step['column_ref'])
+    if 'last_days' in step:
+        end = np.datetime64(as_of, 'D')
+        return column, 'between', [str(end - (int(step['last_days']) - 1)), str(end)]
+    op = step.get('op', 'eq')
+    if op not in FILTER_OPS:
+        raise ReportEngineError(f"Unsupported filter operator '{op}'")
+    return column, op, step.get('value')
+
+def predicate_columns(predicate):
+    if len(predicate) == 2:
+        return [c for child in predicate[1] for c in predicate_columns(child)]
+    return [predicate[0]]
+
+def _coerce(values, value):
+    if values.dtype.kind == 'M':
+        return np.datetime64(str(value)[:10], 'D')
+    if values.dtype.kind in 'fiub':
+        return float(value)
+    return str(value)
+
+def predicate_mask(values, op, value, labels=None):
+    """Boolean row mask for `values <op> value`; categorical codes are tested via their labels."""
+    if labels is not None:
+        return predicate_mask(np.asarray(labels, dtype=object).astype(str), op, value)[values]
+    if values.dtype == object:
+        values = values.astype(str)
+    if op in ('in', 'not_in'):
+        hit = np.isin(values, [_coerce(values, v) for v in value])
+        return hit if op == 'in' else ~hit
+    if op == 'between':
+        lo, hi = (_coerce(values, v) for v in value)
+        return (values >= lo) & (values <= hi)
+    value = _coerce(values, value)
+    if op == 'eq':
+        return values == value
+    if op == 'ne':
+        return values != value
+    if op == 'lt':
+        return values < value
+    if op == 'lte':
+        return values <= value
+    if op == 'gt':
+        return values > value
+    if op == 'gte':
+        return values >= value
+    raise ReportEngineError(f"Unsupported filter operator '{op}'")
+
+def evaluate_predicate(frame, predicate, rows=None):
+    """Boolean mask over the frame's rows (or just `rows`) for a filter_predicate tree."""
+    if len(predicate) == 2:
+        masks = [evaluate_predicate(frame, child, rows) for child in predicate[1]]
+        return np.logical_and.reduce(masks) if predicate[0] == 'and' else np.logical_or.reduce(masks)
+    column, op, value = predicate
+    values = frame.columns[column]
+    return predicate_mask(values if rows is None else values[rows], op, value, frame.categories.get(column))
+
+# The one ordering rule of the engine and the query planner: stable in both directions (ties keep
+# their input order) and NaN / NaT last.
+
+def _sort_keys(keys):
+    keys = np.asarray(keys)
+    if keys.dtype.kind in 'Mm':
+        nat = np.isnat(keys)
+        keys = keys.view('i8').astype(float)
+        keys[nat] = np.nan
+    elif keys.dtype.kind in 'bu':
+        keys = keys.astype(np.int64)
+    return keys
+
+def order_indices(keys, direction='asc'):
+    keys = _sort_keys(keys)
+    if direction == 'desc':
+        if keys.dtype.kind not in 'if':
+            # Labels: rank them, so equal labels still tie.
+            keys = np.unique(keys, return_inverse=True)[1].reshape(-1)
+        keys = -keys
+    return np.argsort(keys, kind='stable')
+
+def top_indices(keys, k, direction='asc'):
+    """order_indices(keys, direction)[:k] without sorting all of the keys (numeric keys)."""
+    keys = _sort_keys(keys)
+    if k >= len(keys) or keys.dtype.kind not in 'if':
+        return order_indices(keys, direction)[:k]
+    keys = -keys if direction == 'desc' else keys
+    valid = np.flatnonzero(~np.isnan(keys)) if keys.dtype.kind == 'f' else np.arange(len(keys))
+    if len(valid) <= k:
+        return order_indices(keys)[:k]
+    # Everything up to the k-th smallest key, ties at the boundary included, then a stable sort.
+    kth = np.partition(keys[valid], k - 1)[k - 1]
+    picked = valid[keys[valid] <= kth]
+    return picked[np.argsort(keys[picked], kind='stable')][:k]
+
+def order_series(series, direction='desc', by='value'):
+    order = order_indices(series.values if by == 'value' else series.labels, direction)
+    return Series(series.labels[order], series.values[order])
+
+# --- Pipeline ------------------------------------------------------------------------------
+
+def _apply_step(step, state, frame, bindings, as_of):
+    kind = step.get('step')
+
+    if kind == 'calculate_column':
+        if step.get('operation') != 'date_diff_buckets':
+            raise ReportEngineError(f"Unsupported calculated column '{step.get('operation')}'")
+        params = step.get('params', {})
+        column = resolve_column(params['date_column_ref'], frame, bindings)
+        codes, labels = date_diff_buckets(to_dates(frame.columns[column]), params['buckets'], as_of)
+        keep = codes >= 0
+        columns = {k: v[keep] for k, v in frame.columns.items()}
+        columns[step['name']] = codes[keep]
+        categories = dict(frame.categories, **{step['name']: labels})
+        new_frame = Frame(columns, categories)
+        return new_frame, new_frame
+
+    if kind == 'filter':
+        if not isinstance(state, Frame):
+            raise ReportEngineError("filter must come before group_by / aggregation")
+        predicate = filter_predicate(step, lambda ref: resolve_column(ref, frame, bindings), as_of)
+        keep = evaluate_predicate(frame, predicate)
+        new_frame = Frame({k: v[keep] for k, v in frame.columns.items()}, frame.categories)
+        return new_frame, new_frame
+
+    if kind == 'group_by':
+        ref = step.get('group_column_ref') or step.get('group_column')
+        grouped = group_codes(frame, resolve_column(ref, frame, bindings))
+        if step.get('aggregation'):
+            values = None
+            if step.get('value_column_ref'):
+                values = aggregate_input(frame, step['aggregation'], resolve_column(step['value_column_ref'], frame, bindings))
+            return frame, Series(grouped.labels, reduce_groups(grouped, step['aggregation'], values))
+        return frame, grouped
+
+    if kind == 'aggregation':
+        operation = step.get('operation', 'count')
+        values = None
+        if step.get('column_ref'):
+            values = aggregate_input(frame, operation, resolve_column(step['column_ref'], frame, bindings))
+        if isinstance(state, Grouped):
+            return frame, Series(state.labels, reduce_groups(state, operation, values))
+        return frame, reduce_all(operation, values, frame.n)
+
+    if kind == 'sort':
+        if isinstance(state, Grouped):
+            state = Series(state.labels, reduce_groups(state, 'count'))
+        if not isinstance(state, Series):
+            return frame, state
+        return frame, order_series(state, step.get('direction', 'desc'), step.get('by', 'value'))
+
+    if kind == 'limit':
+        if isinstance(state, Series):
+            count = int(step.get('count', 10))
+            return frame, Series(state.labels[:count], state.values[:count])
+        return frame, state
+
+    if kind == 'custom_formula':
+        from formula_compiler import bind_ref, compile_formula
+        formula = compile_formula(step.get('formula_raw', ''))
+        col = lambda ref: resolve_column(ref, frame, bindings)
+        predicate = formula.predicate(col, as_of)
+        if predicate is not None:
+            if not isinstance(state, Frame):
+                raise ReportEngineError("filter must come before group_by / aggregation")
+            keep = evaluate_predicate(frame, predicate)
+            frame = Frame({k: v[keep] for k, v in frame.columns.items()}, frame.categories)
+            state = frame
+        if formula.key:
+            grouped = group_codes(frame, bind_ref(formula.key, col))
+        elif isinstance(state, (Frame, Grouped)):
+            grouped = state if isinstance(state, Grouped) else None
+        else:
+            raise ReportEngineError("custom_formula must come before aggregation")
+        return frame, formula.evaluate(frame, formula.bind(col), grouped, as_of)
+
+    raise ReportEngineError(f"Unknown processing step '{kind}'")
+
+def to_widget_data(state, frame):
+    if isinstance(state, Grouped):
+        state = Series(state.labels, reduce_groups(state, 'count'))
+    if isinstance(state, Series):
+        values = np.where(np.isnan(state.values), 0, state.values)
+        return {"categories": [str(x) for x in state.labels.tolist()], "values": values.tolist()}
+    if isinstance(state, Frame):
+        return {"value": float(state.n)}
+    return {"value": state}
+
+def run_processing(processing, frame, bindings=None, as_of=None):
+    as_of = as_of or datetime.date.today().isoformat()
+    state = frame
+    for step in processing:
+        frame, state = _apply_step(step, state, frame, bindings or {}, as_of)
+    return to_widget_data(state, frame)
+
+def evaluate_report(logic, frame, bindings=None, as_of=None, approximate=False):
+    """Evaluate a report's `logic` over a Frame and return widget data.
+
+    Charts get {"categories": [...], "values": [...]}, KPIs get {"value": x}.
+    `bindings` maps requirement keys / placeholder refs (amount_col, Date, ...) to real columns.
+    The steps go through query_planner first; run_processing is the step-by-step interpreter.
+    With `approximate`, count_distinct and percentiles come from sketches (see sketches.py).
+    """
+    from query_planner import plan_report
+    return plan_report(logic, frame, bindings, as_of, approximate).execute(frame)
+
+def find_table(source, tables):
+    """Pick the first table whose name contains one of the source's table keywords."""
+    for keyword in source.get('table_keywords', []):
+        for name in tables:
+            if keyword and keyword.lower() in name.lower():
+                return name
+    return None
+
+def bind_frame(logic, tables):
+    """Resolve the Frame a report runs over; multi-source reports are joined first."""
+    if logic.get('sources'):
+        names = [find_table(source, tables) for source in logic['sources']]
+        if None in names:
+            return None
+        if len(names) == 1:
+            return tables[names[0]]
+        from report_join import join_sources
+        return join_sources(logic, [(name, tables[name]) for name in names])
+    name = find_table(logic.get('source', {}), tables)
+    return tables[name] if name else None
+
+# Malformed logic (a missing key, a value of the wrong type) fails its own report, not the run.
+REPORT_ERRORS = (ReportEngineError, KeyError, TypeError, ValueError, AttributeError, IndexError)
+
+def report_error(e):
+    if isinstance(e, ReportEngineError):
+        return {"error": str(e)}
+    return {"error": f"Malformed logic ({type(e).__name__}: {e})"}
+
+def evaluate_catalog(reports, tables, bindings=None, as_of=None, cache=None, approximate=False):
+    """Evaluate every report that binds to one of `tables`; returns report id -> data or error.
+
+    Reports are grouped by the table(s) they resolve to and the join between them, and each
+    group runs as a shared scan: the frame is bound (and joined) once, and group-by codes,
+    measure columns, aging buckets and aggregates are computed once per distinct key and reused
+    by every report in the group.
+    With a result_cache.ResultCache, reports over versioned tables are served from the cache.
+    """
+    as_of = as_of or datetime.date.today().isoformat()
+    results = {}
+    groups = {}
+    for report in reports:
+        logic = report.get('logic')
+        if not isinstance(logic, dict):
+            continue
+        try:
+            sources = logic.get('sources') or [logic.get('source', {})]
+            names = tuple(find_table(source, tables) for source in sources)
+            # Multi-source reports share a joined frame only if they also join the same way.
+            join = json.dumps(logic.get('join'), sort_keys=True) if len(names) > 1 else None
+        except REPORT_ERRORS as e:
+            results[report.get('id')] = report_error(e)
+            continue
+        if None in names:
+            results[report.get('id')] = {"error": "No matching source table"}
+            continue
+        groups.setdefault((names, join), []).append(report)
+
+    for (names, _), group in groups.items():
+        versions = {name: tables[name].version for name in names}
+        cache_keys = {}
+        if cache is not None and None not in versions.values():
+            from result_cache import result_key
+            pending = []
+            for report in group:
+                key = result_key(report['logic'], versions, bindings, as_of, 'approximate' if approximate else None)
+                hit = cache.get(key)
+                if hit is None:
+                    cache_keys[id(report)] = key
+                    pending.append(report)
+                else:
+                    results[report.get('id')] = hit
+            group = pending
+        if not group:
+            continue
+
+        try:
+            frame = bind_frame(group[0]['logic'], tables)
+        except REPORT_ERRORS as e:
+            for report in group:
+                results[report.get('id')] = report_error(e)
+            continue
+
+        frame.cache = {}
+        try:
+            for report in group:
+                try:
+                    data = evaluate_report(report['logic'], frame, bindings, as_of, approximate)
+                except REPORT_ERRORS as e:
+                    results[report.get('id')] = report_error(e)
+                    continue
+                results[report.get('id')] = data
+                if id(report) in cache_keys:
+                    cache.put(cache_keys[id(report)], data, list(names))
+        finally:
+            frame.cache = None
+    return results
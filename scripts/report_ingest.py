@@ -0,0 +1,170 @@
+import csv
+import json
+import os
+import sys
+
+from report_encoding import detect_encoding, iter_clean_lines
+
+REPORTS_ROOT = '/Users/max/ncs/data/reports/supply_chain_reports'
+
+# Output key -> (CSV column, default value). Shared by every domain.
+REPORT_FIELDS = [
+    ("id", "id", ""),
+    ("Layer", "layer", "General"), # Map layer -> Layer
+    ("Sub-Layer", "Sub-Layer", "General"),
+    ("Category 1 (Detailed)", "Category 1 (Detailed)", ""),
+    ("Module (Category 2)", "Module (Category 2)", ""),
+    ("Report Title", "Report Title", ""),
+    ("Chart Type (ECharts)", "Chart Type (ECharts)", "Bar Chart"),
+    ("benefit", "benefit", ""),
+    ("kpi_definition", "kpi_definition", ""),
+    ("formula", "formula", ""),
+    ("data_needed", "data_needed", ""),
+    ("detailed_explanation", "detailed_explanation", ""),
+    ("logic", "logic", ""), # Keep as string or parse if needed
+]
+
+# Per-domain ingest config. `id_prefix` is used to build an id when the CSV has no id column.
+DOMAINS = {
+    "procurement": {
+        "csv_path": f"{REPORTS_ROOT}/procurement/procurement_ultimate.csv",
+        "json_path": f"{REPORTS_ROOT}/procurement/procurement_reports.json",
+        "id_prefix": None,
+    },
+    "fleet": {
+        "csv_path": f"{REPORTS_ROOT}/fleet/fleet_ultimate.csv",
+        "json_path": f"{REPORTS_ROOT}/fleet/fleet_reports.json",
+        "id_prefix": "fleet-ultimate",
+    },
+    "vendors": {
+        "csv_path": f"{REPORTS_ROOT}/vendors/vendors_ultimate.csv",
+        "json_path": f"{REPORTS_ROOT}/vendors/vendors_reports.json",
+        "id_prefix": "vendors-ultimate",
+    },
+    "shipping": {
+        "csv_path": f"{REPORTS_ROOT}/shipping/shipping_ultimate.csv",
+        "json_path": f"{REPORTS_ROOT}/shipping/shipping_reports.json",
+        "id_prefix": None,
+    },
+    "planning": {
+        "csv_path": f"{REPORTS_ROOT}/planning/planning_ultimate.csv",
+        "json_path": f"{REPORTS_ROOT}/planning/planning_reports.json",
+        "id_prefix": "plan-ultimate",
+    },
+    "warehouse": {
+        "csv_path": f"{REPORTS_ROOT}/warehouse/report_template.csv",
+        "json_path": f"{REPORTS_ROOT}/warehouse/warehouse_reports.json",
+        "id_prefix": None,
+    },
+}
+
+def map_row(row, row_count, id_prefix=None, fields=REPORT_FIELDS):
+    report = {}
+    for key, column, default in fields:
+        if key == "id" and id_prefix:
+            default = f"{id_prefix}-{row_count}"
+        report[key] = row.get(column, default)
+    return report
+
+def iter_reports(csv_path, encoding, id_prefix=None, fields=REPORT_FIELDS):
+    reader = csv.DictReader(iter_clean_lines(csv_path, encoding))
+    print(f"Found headers: {reader.fieldnames}")
+
+    row_count = 0
+    for row in reader:
+        row_count += 1
+        report = map_row(row, row_count, id_prefix, fields)
+
+        # Basic validation
+        if report["Report Title"]:
+            yield report
+        elif row_count < 5:
+            print(f"Skipping row {row_count} due to missing Report Title: {row}")
+
+class JsonArrayWriter:
+    """Writes objects one at a time as a JSON array laid out like json.dump(..., indent=4)."""
+
+    def __init__(self, f, indent=4):
+        self.f = f
+        self.indent = indent
+        self.count = 0
+
+    def write(self, obj):
+        self.f.write("[\n" if self.count == 0 else ",\n")
+        pad = " " * self.indent
+        body = json.dumps(obj, indent=self.indent)
+        self.f.write(pad + body.replace("\n", "\n" + pad))
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]" if self.count else "[]")
+
+class JsonLinesWriter:
+    """Writes one compact JSON object per line."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, obj):
+        self.f.write(json.dumps(obj))
+        self.f.write("\n")
+        self.count += 1
+
+    def close(self):
+        pass
+
+def stream_reports(reports, output_path, fmt="json"):
+    # Write to a sibling temp file so a failed run never leaves a truncated catalog behind.
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as out:
+        writer = JsonLinesWriter(out) if fmt == "jsonl" else JsonArrayWriter(out)
+        try:
+            for report in reports:
+                writer.write(report)
+            writer.close()
+        except Exception:
+            out.close()
+            os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, output_path)
+    return writer.count
+
+def ingest_csv(csv_path, output_path, id_prefix=None, fmt="json", fields=REPORT_FIELDS):
+    print(f"Reading CSV from {csv_path}...")
+    encoding = detect_encoding(csv_path)
+    if not encoding:
+        print("Failed to read/decode CSV with any encoding.")
+        return None
+    print(f"Successfully decoded with {encoding}")
+
+    print(f"Writing {fmt.upper()} to {output_path}...")
+    try:
+        count = stream_reports(iter_reports(csv_path, encoding, id_prefix, fields), output_path, fmt)
+    except Exception as e:
+        print(f"Error parsing CSV content: {e}")
+        return None
+
+    print(f"Processed {count} reports.")
+    print("Done.")
+    return count
+
+def ingest_domain(domain, fmt="json", output_path=None):
+    config = DOMAINS[domain]
+    if output_path is None:
+        output_path = config["json_path"]
+        if fmt == "jsonl":
+            output_path = os.path.splitext(output_path)[0] + ".jsonl"
+    count = ingest_csv(config["csv_path"], output_path, config["id_prefix"], fmt, config.get("fields", REPORT_FIELDS))
+    if count is None:
+        # ingest_csv reports and swallows the error; a build stage has to fail instead.
+        raise RuntimeError(f"Could not ingest {domain} reports from {config['csv_path']}")
+    return count
+
+if __name__ == "__main__":
+    # Usage: python report_ingest.py [domain ...] [--jsonl]
+    args = sys.argv[1:]
+    fmt = "jsonl" if "--jsonl" in args else "json"
+    domains = [a for a in args if not a.startswith("--")] or list(DOMAINS)
+    for domain in domains:
+        ingest_domain(domain, fmt)
@@ -0,0 +1,175 @@
+import numpy as np
+
+from report_engine import Frame, ReportEngineError, column_values, factorize
+from table_catalog import find_table_def
+
+# Vectorised equi-joins for multi-source reports (`sources` + `join` in the logic).
+# Both strategies produce (left_idx, right_idx) row pairs without a per-row Python loop:
+#   hash join   - bucket the smaller (build) side by key once, probe with the larger side
+#   sort-merge  - sort both sides and merge the key runs; used when both sides are large
+
+SORT_MERGE_MIN_ROWS = 4_000_000
+PLACEHOLDER_KEYS = {None, '', 'common_id_placeholder'}
+
+def _comparable(left, right):
+    # Keys are compared as strings unless both sides are numeric.
+    if left.dtype.kind in 'iuf' and right.dtype.kind in 'iuf':
+        return left, right
+    return left.astype(str), right.astype(str)
+
+def _expand(starts, counts, build_order):
+    """Turn per-probe-row match ranges into flat (probe_idx, build_idx) pairs."""
+    total = int(counts.sum())
+    probe_idx = np.repeat(np.arange(len(counts)), counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    build_idx = build_order[np.repeat(starts, counts) + offsets]
+    return probe_idx, build_idx
+
+def hash_join_indices(build_keys, probe_keys):
+    # Build: factorise the build side and lay its rows out bucket by bucket (CSR layout).
+    labels, codes = factorize(build_keys)
+    order = np.argsort(codes, kind='stable')
+    bucket_sizes = np.bincount(codes, minlength=len(labels))
+    bucket_starts = np.cumsum(bucket_sizes) - bucket_sizes
+
+    # Probe: find each probe key's bucket among the build labels.
+    if not len(labels):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(labels, probe_keys), len(labels) - 1)
+    found = labels[pos] == probe_keys
+    counts = np.where(found, bucket_sizes[pos], 0)
+    starts = np.where(found, bucket_starts[pos], 0)
+    return _expand(starts, counts, order)
+
+def sort_merge_indices(left_keys, right_keys):
+    left_order = np.argsort(left_keys, kind='stable')
+    right_order = np.argsort(right_keys, kind='stable')
+    lk = left_keys[left_order]
+    rk = right_keys[right_order]
+    starts = np.searchsorted(rk, lk, side='left')
+    counts = np.searchsorted(rk, lk, side='right') - starts
+    sorted_left, right_idx = _expand(starts, counts, right_order)
+    return left_order[sorted_left], right_idx
+
+def choose_strategy(left_rows, right_rows):
+    if min(left_rows, right_rows) >= SORT_MERGE_MIN_ROWS:
+        return 'sort_merge'
+    return 'hash'
+
+def join_indices(left_keys, right_keys, how='inner'):
+    """Return (left_idx, right_idx); for a left join unmatched left rows get right_idx == -1."""
+    left_keys, right_keys = _comparable(left_keys, right_keys)
+    strategy = choose_strategy(len(left_keys), len(right_keys))
+
+    if strategy == 'sort_merge':
+        left_idx, right_idx = sort_merge_indices(left_keys, right_keys)
+    elif how == 'left' or len(right_keys) <= len(left_keys):
+        # Build on the right; a left join must probe with every left row.
+        left_idx, right_idx = hash_join_indices(right_keys, left_keys)
+    else:
+        right_idx, left_idx = hash_join_indices(left_keys, right_keys)
+
+    if how == 'left':
+        matched = np.zeros(len(left_keys), dtype=bool)
+        matched[left_idx] = True
+        missing = np.flatnonzero(~matched)
+        left_idx = np.concatenate([left_idx, missing])
+        right_idx = np.concatenate([right_idx, np.full(len(missing), -1, dtype=right_idx.dtype)])
+        order = np.argsort(left_idx, kind='stable')
+        left_idx, right_idx = left_idx[order], right_idx[order]
+    elif how != 'inner':
+        raise ReportEngineError(f"Unsupported join type '{how}'")
+    return left_idx, right_idx
+
+def _take(values, idx):
+    if not len(idx) or idx.min() >= 0:
+        return values[idx]
+    missing = idx < 0
+    out = values[np.where(missing, 0, idx)] if len(values) else np.empty(len(idx), dtype=values.dtype)
+    if values.dtype.kind == 'f':
+        out = out.copy()
+        out[missing] = np.nan
+    elif values.dtype.kind in 'iub':
+        out = out.astype(np.float64)
+        out[missing] = np.nan
+    elif values.dtype.kind == 'M':
+        out = out.copy()
+        out[missing] = np.datetime64('NaT')
+    else:
+        out = out.astype(object)
+        out[missing] = None
+    return out
+
+def join_frames(left, right, left_on, right_on=None, how='inner', suffix='_right'):
+    right_on = right_on or left_on
+    # Decode dictionary-encoded keys: two tables' codes are not comparable with each other.
+    left_idx, right_idx = join_indices(column_values(left, left_on), column_values(right, right_on), how)
+    columns = {name: values[left_idx] for name, values in left.columns.items()}
+    categories = dict(left.categories)
+    has_missing = len(right_idx) and right_idx.min() < 0
+    for name, values in right.columns.items():
+        if name == right_on and right_on == left_on:
+            continue
+        out_name = name + suffix if name in columns else name
+        if name in right.categories and has_missing:
+            columns[out_name] = _take(column_values(right, name), right_idx)
+        else:
+            columns[out_name] = _take(values, right_idx)
+            if name in right.categories:
+                categories[out_name] = right.categories[name]
+    return Frame(columns, categories)
+
+def _unique(frame, name):
+    values = np.asarray(frame.columns[name])
+    return len(factorize(values)[0]) == len(values)
+
+def infer_join_key(left_name, right_name, left=None, right=None):
+    """Pick the join column for two tables.
+
+    Only a key that is unique on at least one side qualifies, so the join is never
+    many-to-many: the `id`-role column of one table (per wiki_data.json) that also appears in
+    the other, else a shared column whose values are unique in one of the frames. Shared
+    non-unique columns (e.g. vendor_id of PRC_Invoices x PRC_PO_Headers) would multiply rows,
+    so the report then has to name its key in logic['join']['on'].
+    """
+    def usable(name):
+        return left is None or right is None or (name in left.columns and name in right.columns)
+
+    left_def = find_table_def(left_name)
+    right_def = find_table_def(right_name)
+    if left_def and right_def:
+        left_cols = {c['name']: c.get('role') for c in left_def['columns']}
+        right_cols = {c['name']: c.get('role') for c in right_def['columns']}
+        candidates = [n for n, role in right_cols.items() if role == 'id' and n in left_cols]
+        candidates += [n for n, role in left_cols.items() if role == 'id' and n in right_cols]
+        for name in candidates:
+            if usable(name):
+                return name
+
+    if left is not None and right is not None:
+        shared = [c for c in left.columns if c in right.columns]
+        # id-like names first, then any other shared column.
+        shared.sort(key=lambda c: not (c.lower() == 'id' or c.lower().endswith('_id')))
+        for name in shared:
+            if _unique(left, name) or _unique(right, name):
+                return name
+    raise ReportEngineError(
+        f"Cannot infer a join key between '{left_name}' and '{right_name}' that is unique on either "
+        f"side; set logic['join']['on'] explicitly"
+    )
+
+def join_sources(logic, named_frames):
+    """Join the frames bound to a multi-source report, left to right.
+
+    `named_frames` is a list of (table name, Frame) in `logic['sources']` order.
+    """
+    join = logic.get('join', {})
+    how = join.get('type', 'inner')
+    name, frame = named_frames[0]
+    for right_name, right in named_frames[1:]:
+        key = join.get('on')
+        if key in PLACEHOLDER_KEYS or key not in frame.columns or key not in right.columns:
+            key = infer_join_key(name, right_name, frame, right)
+        frame = join_frames(frame, right, key, how=how)
+        name = right_name
+    return frame
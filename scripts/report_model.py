@@ -0,0 +1,225 @@
+import json
+import sys
+
+# Compact in-memory report catalogs. A catalog row is a Report with __slots__ instead of a dict
+# keyed by long column names; values that repeat across a catalog (layer, category, module,
+# chart type, data_needed, formula, and the key order itself) are interned so every report
+# shares one copy, and `logic` is kept as interned compact JSON text until something reads it
+# (identical heuristic logic across reports is then stored once). Reports still answer
+# report.get('Report Title') / report['logic'] with the JSON keys, so code written for the
+# dict rows runs on them unchanged. load_catalog() streams the JSON array one report at a time
+# and dump_catalog() writes the same bytes as json.dump(rows, f, indent=4).
+
+# JSON key -> attribute, in the order report_ingest writes them.
+FIELDS = {
+    "id": "id",
+    "Layer": "layer",
+    "Sub-Layer": "sub_layer",
+    "Category 1 (Detailed)": "category",
+    "Module (Category 2)": "module",
+    "Report Title": "title",
+    "Chart Type (ECharts)": "chart_type",
+    "benefit": "benefit",
+    "kpi_definition": "kpi_definition",
+    "formula": "formula",
+    "data_needed": "data_needed",
+    "detailed_explanation": "detailed_explanation",
+}
+INTERNED = {"layer", "sub_layer", "category", "module", "chart_type", "formula", "data_needed"}
+
+ATTRS = {attr: key for key, attr in FIELDS.items()}
+
+_keys = {} # interned key-order tuples
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Report:
+    # Absent fields leave their slot empty (reading one gives None); `_logic` is only filled
+    # once the logic text has been parsed. A Report is not a dict: json.dump / json.dumps reject
+    # it, so anything that serialises a report must go through to_dict() (or dump_catalog).
+    __slots__ = tuple(FIELDS.values()) + ('_logic', '_logic_text', '_keys', 'extra')
+
+    def __init__(self):
+        object.__setattr__(self, '_keys', ())
+        object.__setattr__(self, '_logic_text', None)
+        object.__setattr__(self, 'extra', None) # keys outside FIELDS, as a dict
+
+    @classmethod
+    def from_dict(cls, row):
+        report = cls()
+        for key, value in row.items():
+            report[key] = value
+        return report
+
+    def __getattr__(self, attr):
+        if attr in ATTRS:
+            return None
+        raise AttributeError(attr)
+
+    def __setattr__(self, attr, value):
+        if attr in ATTRS:
+            value = _intern(value) if attr in INTERNED else value
+            self._add_key(ATTRS[attr])
+        object.__setattr__(self, attr, value)
+
+    def __getstate__(self):
+        return {attr: object.__getattribute__(self, attr) for attr in self.__slots__ if self._has(attr)}
+
+    def __setstate__(self, state):
+        for attr, value in state.items():
+            object.__setattr__(self, attr, value)
+
+    def _has(self, attr):
+        try:
+            object.__getattribute__(self, attr)
+            return True
+        except AttributeError:
+            return False
+
+    # --- logic -----------------------------------------------------------------------------
+
+    @property
+    def logic(self):
+        if not self._has('_logic'):
+            if self._logic_text is None:
+                return None
+            object.__setattr__(self, '_logic', json.loads(self._logic_text))
+        return self._logic
+
+    @logic.setter
+    def logic(self, value):
+        object.__setattr__(self, '_logic', value)
+        object.__setattr__(self, '_logic_text', None)
+        self._add_key('logic')
+
+    def release_logic(self):
+        """Drop parsed logic back to its (shared) JSON text, e.g. after a catalog was evaluated."""
+        if self._has('_logic'):
+            object.__setattr__(self, '_logic_text', sys.intern(json.dumps(self._logic, separators=(',', ':'))))
+            object.__delattr__(self, '_logic')
+
+    # --- dict compatibility (JSON keys) ------------------------------------------------------
+
+    def _add_key(self, key):
+        if key not in self._keys:
+            order = self._keys + (key,)
+            object.__setattr__(self, '_keys', _keys.setdefault(order, order))
+
+    def __setitem__(self, key, value):
+        if key == 'logic':
+            if 'logic' not in self._keys:
+                # Freshly loaded rows keep logic as text; it is parsed on first access.
+                object.__setattr__(self, '_logic_text', sys.intern(json.dumps(value, separators=(',', ':'))))
+            else:
+                self.logic = value
+        elif key in FIELDS:
+            setattr(self, FIELDS[key], value)
+            return
+        else:
+            if self.extra is None:
+                object.__setattr__(self, 'extra', {})
+            self.extra[key] = value
+        self._add_key(key)
+
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        return self.get(key)
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def get(self, key, default=None):
+        if key not in self._keys:
+            return default
+        if key == 'logic':
+            return self.logic
+        if key in FIELDS:
+            return getattr(self, FIELDS[key])
+        return self.extra[key]
+
+    def keys(self):
+        return list(self._keys)
+
+    def items(self):
+        return [(key, self[key]) for key in self._keys]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"Report(id={self.id!r}, title={self.title!r})"
+
+# --- Loading and dumping ---------------------------------------------------------------------
+
+def iter_json_array(f, chunk_size=1 << 20):
+    """Yield the elements of a top-level JSON array from a text file, one at a time."""
+    decoder = json.JSONDecoder()
+    buf, pos, started = '', 0, False
+    eof = False
+    while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        if not started and pos < len(buf):
+            if buf[pos] != '[':
+                raise ValueError("Catalog is not a JSON array")
+            started, pos = True, pos + 1
+            continue
+        if started and pos < len(buf) and buf[pos] == ']':
+            return
+        if pos < len(buf):
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                if end < len(buf) or eof:
+                    yield value
+                    pos = end
+                    continue
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+        # Need more text: the element is incomplete (or might still continue past the buffer).
+        chunk = f.read(chunk_size)
+        if not chunk:
+            if eof:
+                raise ValueError("Catalog ends before the closing ']'")
+            eof = True
+        buf, pos = buf[pos:] + chunk, 0
+
+def iter_catalog(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        for row in iter_json_array(f):
+            yield Report.from_dict(row)
+
+def load_catalog(path):
+    """A JSON report catalog as a list of Reports."""
+    return list(iter_catalog(path))
+
+def load_catalogs(paths):
+    reports = []
+    for path in paths:
+        reports.extend(iter_catalog(path))
+    return reports
+
+def dump_catalog(reports, path):
+    """Write Reports (or dicts) exactly as json.dump(rows, f, indent=4) would."""
+    with open(path, 'w', encoding='utf-8') as f:
+        wrote = False
+        for report in reports:
+            row = report.to_dict() if isinstance(report, Report) else report
+            f.write(',\n' if wrote else '[\n')
+            f.write('\n'.join('    ' + line for line in json.dumps(row, indent=4).split('\n')))
+            wrote = True
+        f.write('\n]' if wrote else '[]')
+
+if __name__ == "__main__":
+    # Usage: python report_model.py <reports.json> [...]
+    import tracemalloc
+    if len(sys.argv) < 2:
+        print("Usage: python report_model.py <reports.json> [...]")
+        sys.exit(1)
+    tracemalloc.start()
+    reports = load_catalogs(sys.argv[1:])
+    compact = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{len(reports)} reports in {compact / 2**20:.1f} MiB")
@@ -0,0 +1,192 @@
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from incremental_views import split_plan
+from report_engine import (
+    REPORT_ERRORS, Dictionary, Frame, ReportEngineError, Series, date_diff_buckets, evaluate_predicate,
+    evaluate_report, group_codes, measure, report_error, to_dates, to_widget_data,
+)
+
+# Instant previews: a report is evaluated on a sample of its table and returned with
+# confidence intervals, while the exact result is computed in the background. The sample is
+# stratified by the report's group-by column when it has few enough values (every group keeps
+# at least MIN_STRATUM_ROWS rows, or all of its rows), drawn once per table and column and kept
+# in frame.indexes, so later previews only touch ~SAMPLE_ROWS rows. count / sum / avg come
+# with intervals from the stratified estimators. Everything else is evaluated on the sample too,
+# without an interval: a distinct count of the sample is a lower bound of the table's
+# ("lower_bound": true), and min / max / percentiles / custom formulas give the sample's value.
+# Only tables no larger than the sample are scanned in full.
+
+SAMPLE_ROWS = 20000
+MIN_STRATUM_ROWS = 200
+Z_SCORES = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.96, 0.99: 2.5758}
+
+class TableSample:
+    def __init__(self, frame, strata, population, sampled):
+        self.frame = frame           # sampled rows, all columns
+        self.strata = strata         # stratum code of every sampled row
+        self.population = population # rows per stratum in the table
+        self.sampled = sampled       # rows per stratum in the sample
+
+def table_sample(frame, strata_column=None, size=SAMPLE_ROWS, seed=0):
+    """Sample about `size` rows of `frame`, optionally stratified by a column (built once per table)."""
+    key = ('sample', strata_column, size)
+    if key in frame.indexes:
+        return frame.indexes[key]
+    rng = np.random.default_rng(seed)
+    if strata_column is None:
+        rows = np.sort(rng.choice(frame.n, min(size, frame.n), replace=False))
+        codes = np.zeros(len(rows), dtype=np.int64)
+        population = np.array([frame.n])
+    else:
+        # Bernoulli sampling inside each stratum: one vectorised pass over the table.
+        grouped = group_codes(frame, strata_column)
+        if grouped.ngroups * MIN_STRATUM_ROWS > size:
+            # Too many groups to give each a useful stratum (ids, free text): sample uniformly.
+            frame.indexes[key] = table_sample(frame, None, size, seed)
+            return frame.indexes[key]
+        population = np.bincount(grouped.codes, minlength=grouped.ngroups)
+        target = np.minimum(population, np.maximum(size * population / max(frame.n, 1), MIN_STRATUM_ROWS))
+        rate = target / np.maximum(population, 1)
+        rows = np.flatnonzero(rng.random(frame.n) < rate[grouped.codes])
+        codes = grouped.codes[rows]
+    columns = {c: frame.columns[c][rows] for c in frame.columns}
+    sample_frame = Frame(columns, {c: frame.categories[c] for c in columns if c in frame.categories}, n=len(rows))
+    sample = TableSample(sample_frame, codes, population, np.bincount(codes, minlength=len(population)))
+    frame.indexes[key] = sample
+    return sample
+
+def _variance(s1, s2, sample):
+    # Variance of the stratified total of a variable with per-stratum sums s1 and sums of squares s2.
+    n = sample.sampled[:, None].astype(np.float64)
+    N = sample.population[:, None].astype(np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s_sq = np.where(n > 1, (s2 - s1 * s1 / np.maximum(n, 1)) / np.maximum(n - 1, 1), 0.0)
+        per_stratum = np.where(n > 0, N * N * (1 - n / np.maximum(N, 1)) * np.maximum(s_sq, 0) / np.maximum(n, 1), 0.0)
+    return per_stratum.sum(axis=0)
+
+def _estimate(shape, sample, as_of):
+    """Point estimates and standard errors per group, for count / sum / avg."""
+    frame = sample.frame
+    match = np.ones(frame.n, dtype=bool)
+    for predicate in shape.predicates:
+        match &= evaluate_predicate(frame, predicate)
+
+    keep_empty = False
+    if shape.buckets is not None:
+        bucket_codes, bucket_labels = date_diff_buckets(to_dates(frame.columns[shape.buckets.date_column]), shape.buckets.buckets, as_of)
+        match &= bucket_codes >= 0
+    if shape.key is None:
+        groups, labels = np.zeros(frame.n, dtype=np.int64), None
+    elif shape.buckets is not None and shape.key == shape.buckets.name:
+        groups, labels, keep_empty = np.maximum(bucket_codes, 0), np.asarray(bucket_labels, dtype=object), True
+    else:
+        grouped = group_codes(frame, shape.key)
+        groups, labels = grouped.codes, grouped.labels
+        keep_empty = shape.key in frame.categories and not isinstance(frame.categories[shape.key], Dictionary)
+
+    ngroups = 1 if labels is None else len(labels)
+    H = len(sample.population)
+    cell = (sample.strata * ngroups + groups)[match]
+    y = measure(frame, shape.value)[match] if shape.value else np.ones(int(match.sum()))
+    sx = np.bincount(cell, minlength=H * ngroups).reshape(H, ngroups).astype(np.float64)
+    sz = np.bincount(cell, weights=y, minlength=H * ngroups).reshape(H, ngroups)
+    sz2 = np.bincount(cell, weights=y * y, minlength=H * ngroups).reshape(H, ngroups)
+    population, sampled = sample.population[:, None], np.maximum(sample.sampled, 1)[:, None]
+
+    # N * x / n rather than (N / n) * x: a fully counted stratum then scales back exactly.
+    count = (population * sx / sampled).sum(axis=0)
+    total = (population * sz / sampled).sum(axis=0)
+    if shape.operation == 'count':
+        estimate, variance = count, _variance(sx, sx, sample)
+    elif shape.operation == 'sum':
+        estimate, variance = total, _variance(sz, sz2, sample)
+    else:
+        # Ratio estimator total / count, linearised: d = z - R * x.
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ratio = np.where(count > 0, total / np.maximum(count, 1e-300), np.nan)
+            r = np.nan_to_num(ratio)
+            variance = _variance(sz - r * sx, sz2 - 2 * r * sz + r * r * sx, sample) / np.maximum(count, 1e-300) ** 2
+        estimate = ratio
+
+    seen = sx.sum(axis=0) > 0
+    if labels is not None and not keep_empty:
+        labels, estimate, variance = labels[seen], estimate[seen], variance[seen]
+    return labels, estimate, np.sqrt(variance)
+
+def preview_report(logic, frame, bindings=None, as_of=None, confidence=0.95, size=SAMPLE_ROWS):
+    """Widget data estimated from a sample, with "lower" / "upper" interval bounds.
+
+    Small tables are evaluated exactly (intervals collapse to the value).
+    """
+    as_of = as_of or datetime.date.today().isoformat()
+    meta = {"confidence": confidence, "total_rows": frame.n}
+    if frame.n <= size:
+        data = evaluate_report(logic, frame, bindings, as_of)
+        bounds = data.get('values', data.get('value'))
+        return dict(data, lower=bounds, upper=bounds, sampled=False, sample_rows=frame.n, **meta)
+
+    # Plan once on a uniform sample to learn the group-by column, then stratify by it.
+    sample = table_sample(frame, None, size)
+    try:
+        shape = split_plan(logic, sample.frame, bindings, as_of)
+    except ReportEngineError:
+        shape = None
+    if shape is not None and shape.key is not None and shape.key in frame.columns:
+        sample = table_sample(frame, shape.key, size)
+        shape = split_plan(logic, sample.frame, bindings, as_of)
+    meta["sample_rows"] = sample.frame.n
+
+    if shape is not None and shape.operation == 'count_distinct':
+        # Distinct counts do not scale up from a sample; the sample's exact count is a lower bound.
+        data = evaluate_report(logic, sample.frame, bindings, as_of)
+        bounds = data.get('values', data.get('value'))
+        return dict(data, lower=bounds, upper=None, sampled=True, lower_bound=True, **meta)
+    if shape is None or shape.operation not in ('count', 'sum', 'avg', 'mean'):
+        # min / max / percentiles, or not a single aggregation (e.g. a custom_formula): the
+        # sample's value, without an interval.
+        data = evaluate_report(logic, sample.frame, bindings, as_of)
+        return dict(data, lower=None, upper=None, sampled=True, **meta)
+
+    labels, estimate, stderr = _estimate(shape, sample, as_of)
+    z = Z_SCORES.get(confidence, 1.96)
+    if labels is None:
+        value = None if np.isnan(estimate[0]) else float(estimate[0])
+        low, high = (None, None) if value is None else (value - z * stderr[0], value + z * stderr[0])
+        return {"value": value, "lower": low, "upper": high, "sampled": True, **meta}
+
+    state = Series(labels, estimate)
+    for node in shape.post:
+        _, state = node.execute(None, state)
+    position = {label: i for i, label in enumerate(labels.tolist())}
+    picked = np.array([position[label] for label in state.labels.tolist()], dtype=np.int64)
+    data = to_widget_data(state, None)
+    data["lower"] = np.nan_to_num(estimate[picked] - z * stderr[picked]).tolist()
+    data["upper"] = np.nan_to_num(estimate[picked] + z * stderr[picked]).tolist()
+    return dict(data, sampled=True, **meta)
+
+_refine_executor = None
+
+def _executor():
+    global _refine_executor
+    if _refine_executor is None:
+        _refine_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='report-refine')
+    return _refine_executor
+
+def preview_and_refine(logic, frame, on_exact, bindings=None, as_of=None, executor=None):
+    """Return the sampled preview now; the exact result is computed in the background and passed
+    to `on_exact(data)` ({"error": ...} if evaluation fails). Returns (preview, future)."""
+    as_of = as_of or datetime.date.today().isoformat()
+    preview = preview_report(logic, frame, bindings, as_of)
+
+    def exact():
+        try:
+            data = evaluate_report(logic, frame, bindings, as_of)
+        except REPORT_ERRORS as e:
+            data = report_error(e)
+        on_exact(data)
+        return data
+
+    return preview, (executor or _executor()).submit(exact)
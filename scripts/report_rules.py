@@ -0,0 +1,126 @@
+import json
+import os
+import sys
+
+from table_bindings import AhoCorasick
+
+# Report classification rules (chart type, layer, department, master table and the heuristic
+# tags the logic / docs generators branch on) as data: report_rules.json. Every pattern of every
+# rule goes into one Aho-Corasick automaton, so a report's title, category, module, formula and
+# table are each read once however many rules there are. Semantics are those of the original
+# `any(x in text for x in [...])` chains: case-sensitive substring matches on the text a rule
+# names, and for a classifier the first rule (in file order) with any match wins.
+#
+#   "texts":       name -> {"fields": [...], "case": "lower" | "upper"}; fields are joined by ' '
+#   "classifiers": name -> {"text", "default", "rules": [{"value", "patterns"}]}
+#   "tags":        [{"tag", "match": {text name: [patterns]}}]; every matching tag is reported
+
+MAX_MEMO = 200000
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_rules.json')
+
+class RuleSet:
+    def __init__(self, rules):
+        self.fields = rules.get('fields', {})
+        self.texts = rules['texts']
+        self.classifiers = rules.get('classifiers', {})
+        self.defaults = {name: c.get('default') for name, c in self.classifiers.items()}
+        patterns = {}
+        actions = []  # pattern index -> [(text name, classifier name or None, rule rank or tag)]
+        def add(text, pattern, target, outcome):
+            if text not in self.texts:
+                raise ValueError(f"Rule refers to unknown text '{text}'")
+            if pattern not in patterns:
+                patterns[pattern] = len(actions)
+                actions.append([])
+            actions[patterns[pattern]].append((text, target, outcome))
+        for name, classifier in self.classifiers.items():
+            for rank, rule in enumerate(classifier['rules']):
+                for pattern in rule['patterns']:
+                    add(classifier['text'], pattern, name, rank)
+        for tag in rules.get('tags', []):
+            for text, text_patterns in tag['match'].items():
+                for pattern in text_patterns:
+                    add(text, pattern, None, tag['tag'])
+        self.automaton = AhoCorasick(list(patterns))
+        self.actions = actions
+        self.memo = {}
+
+    def text(self, name, values):
+        spec = self.texts[name]
+        text = ' '.join(values.get(field) or '' for field in spec['fields'])
+        case = spec.get('case')
+        return text.lower() if case == 'lower' else text.upper() if case == 'upper' else text
+
+    def matches(self, name, text):
+        """(classifier or None, rule rank or tag) for every rule pattern found in one text.
+
+        Categories, modules, formulas and tables repeat across a catalog, so scans are memoised.
+        """
+        key = (name, text)
+        if key not in self.memo:
+            if len(self.memo) >= MAX_MEMO:
+                self.memo.clear()
+            found = []
+            if text.strip():
+                for _, _, i in self.automaton.search(text):
+                    found.extend((target, outcome) for text_name, target, outcome in self.actions[i] if text_name == name)
+            self.memo[key] = found
+        return self.memo[key]
+
+    def classify(self, values):
+        """{classifier: value, ..., "tags": set} for field values ({"title": ..., "table": ...}).
+
+        Missing fields count as empty text, so classifiers over them return their default.
+        """
+        best = {}
+        tags = set()
+        for name in self.texts:
+            for target, outcome in self.matches(name, self.text(name, values)):
+                if target is None:
+                    tags.add(outcome)
+                elif outcome < best.get(target, len(self.classifiers[target]['rules'])):
+                    best[target] = outcome
+        result = dict(self.defaults)
+        for target, rank in best.items():
+            result[target] = self.classifiers[target]['rules'][rank]['value']
+        result["tags"] = tags
+        return result
+
+    def report_fields(self, report, table=''):
+        values = {field: report.get(key) or '' for field, key in self.fields.items()}
+        values['table'] = table
+        return values
+
+    def classify_report(self, report, table=''):
+        return self.classify(self.report_fields(report, table))
+
+_cache = {}
+
+def load_rules(path=RULES_PATH):
+    if path not in _cache:
+        with open(path, 'r', encoding='utf-8') as f:
+            _cache[path] = RuleSet(json.load(f))
+    return _cache[path]
+
+def classify(values):
+    return load_rules().classify(values)
+
+def classify_report(report, table=''):
+    """Chart type, layer, department (of `table`), master table and tags of a catalog report."""
+    return load_rules().classify_report(report, table)
+
+if __name__ == "__main__":
+    # Usage: python report_rules.py <reports.json>
+    if len(sys.argv) < 2:
+        print("Usage: python report_rules.py <reports.json>")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        reports = json.load(f)
+    counts = {}
+    for report in reports:
+        result = classify_report(report)
+        for key in ("chart_type", "layer"):
+            counts.setdefault(key, {}).setdefault(result[key], 0)
+            counts[key][result[key]] += 1
+    print(json.dumps(counts, indent=2))
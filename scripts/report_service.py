@@ -0,0 +1,258 @@
+import asyncio
+import datetime
+import json
+import sys
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from parallel_eval import ReportPool, evaluate_chunk
+from report_engine import REPORT_ERRORS, find_table, report_error
+from result_cache import ResultCache, result_key
+
+# Report-data HTTP service for the frontend, run next to the json-server backends. It takes
+# report ids (from the catalog it was started with) or raw `logic` objects and returns widget
+# data. Identical requests in flight share one computation, finished results are kept in a
+# ResultCache keyed by table version, and evaluation runs on a parallel_eval.ReportPool so the
+# event loop only parses requests and writes responses.
+#
+#   GET  /health                          -> service counters
+#   GET  /reports/<id>/data[?as_of=...]   -> widget data of one catalog report
+#   POST /reports/data                    -> {"ids": [...]} or {"reports": [{"id", "logic"}]}
+#                                            -> {"results": {id: data}}; {"logic": {...}} -> data
+# Bodies may also carry "as_of" and "approximate".
+
+DEFAULT_PORT = 4100
+CHUNK_REPORTS = 16
+MAX_BODY = 8 * 1024 * 1024
+
+class ReportService:
+    def __init__(self, tables, reports=(), bindings=None, workers=None, cache=None):
+        self.tables = tables
+        # Checked by key only: report_model.Reports keep their logic as text until a request reads it.
+        self.reports = {str(r.get('id')): r for r in reports if 'logic' in r}
+        self.bindings = bindings or {}
+        self.cache = cache if cache is not None else ResultCache()
+        self.pool = ReportPool(tables, workers)
+        self.inflight = {} # result key -> asyncio.Future shared by every waiting request
+        self.tasks = set() # running _compute tasks; the event loop itself only keeps weak references
+        self.stats = {"requests": 0, "computed": 0, "coalesced": 0, "cached": 0}
+
+    def close(self):
+        self.pool.close()
+
+    async def evaluate(self, reports, as_of=None, approximate=False):
+        """Widget data for each {"id", "logic"} report: id -> data (or {"error": ...})."""
+        as_of = as_of or datetime.date.today().isoformat()
+        loop = asyncio.get_running_loop()
+        results, waiting, groups = {}, {}, {}
+        created = [] # (key, future) this call put in self.inflight
+        try:
+            for report in reports:
+                logic = report.get('logic')
+                if not isinstance(logic, dict):
+                    results[report.get('id')] = {"error": "Report has no logic"}
+                    continue
+                try:
+                    sources = logic.get('sources') or [logic.get('source', {})]
+                    names = tuple(find_table(source, self.tables) for source in sources)
+                    if None in names:
+                        results[report.get('id')] = {"error": "No matching source table"}
+                        continue
+                    versions = {name: self.tables[name].version for name in names}
+                    key = result_key(logic, versions, self.bindings, as_of, 'approximate' if approximate else None)
+                except REPORT_ERRORS as e:
+                    results[report.get('id')] = report_error(e)
+                    continue
+                cacheable = None not in versions.values()
+                hit = self.cache.get(key) if cacheable else None
+                if hit is not None:
+                    self.stats["cached"] += 1
+                    results[report.get('id')] = hit
+                elif key in self.inflight:
+                    self.stats["coalesced"] += 1
+                    waiting[report.get('id')] = self.inflight[key]
+                else:
+                    future = self.inflight[key] = loop.create_future()
+                    created.append((key, future))
+                    waiting[report.get('id')] = future
+                    # The result key doubles as the report id inside the worker.
+                    groups.setdefault(names, []).append(({"id": key, "logic": logic}, future, cacheable))
+
+            for names, pending in groups.items():
+                for i in range(0, len(pending), CHUNK_REPORTS):
+                    chunk = pending[i:i + CHUNK_REPORTS]
+                    task = asyncio.ensure_future(self._compute(chunk, names, as_of, approximate))
+                    self.tasks.add(task)
+                    task.add_done_callback(lambda task, chunk=chunk: self._finished(task, chunk))
+        except Exception as e:
+            # Nothing may stay in `inflight` that no task will resolve: later requests would wait on it.
+            for key, future in created:
+                if self.inflight.get(key) is future:
+                    del self.inflight[key]
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception() # retrieved: this request never awaits it, coalesced ones still see it
+            raise
+
+        for report_id, future in waiting.items():
+            # shield: a client that disconnects must not cancel a result others are waiting on.
+            try:
+                results[report_id] = await asyncio.shield(future)
+            except Exception as e:
+                results[report_id] = {"error": f"Evaluation failed: {e}"}
+        for report in reports:
+            # Catalog Reports go back to their compact form once the request is done.
+            if hasattr(report, 'release_logic'):
+                report.release_logic()
+        return results
+
+    def _finished(self, task, pending):
+        # A _compute that died (or was cancelled) must not leave its waiters hanging.
+        self.tasks.discard(task)
+        error = RuntimeError("Evaluation was cancelled") if task.cancelled() else task.exception()
+        if error is None:
+            return
+        for report, future, _ in pending:
+            if self.inflight.get(report["id"]) is future:
+                del self.inflight[report["id"]]
+            if not future.done():
+                future.set_exception(error)
+
+    async def _compute(self, pending, names, as_of, approximate):
+        loop = asyncio.get_running_loop()
+        reports = [report for report, _, _ in pending]
+        try:
+            data = await loop.run_in_executor(self.pool.pool, evaluate_chunk, reports, self.bindings, as_of, approximate)
+        except Exception as e:
+            data = {report["id"]: {"error": f"Evaluation failed: {e}"} for report in reports}
+        self.stats["computed"] += len(reports)
+        for report, future, cacheable in pending:
+            value = data.get(report["id"], {"error": "No result"})
+            if cacheable and "error" not in value:
+                self.cache.put(report["id"], value, list(names))
+            if self.inflight.get(report["id"]) is future:
+                del self.inflight[report["id"]]
+            if not future.done():
+                future.set_result(value)
+
+    # --- HTTP ------------------------------------------------------------------------------
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        if method == 'GET' and parts == ['health']:
+            return 200, {"status": "ok", "reports": len(self.reports), "tables": sorted(self.tables), **self.stats}
+
+        if method == 'GET' and len(parts) == 3 and parts[0] == 'reports' and parts[2] == 'data':
+            report = self.reports.get(parts[1])
+            if report is None:
+                return 404, {"error": f"Unknown report '{parts[1]}'"}
+            results = await self.evaluate([report], query.get('as_of'), query.get('approximate') in ('1', 'true'))
+            return 200, results[report.get('id')]
+
+        if method == 'POST' and parts == ['reports', 'data']:
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError:
+                return 400, {"error": "Body is not valid JSON"}
+            if not isinstance(request, dict):
+                return 400, {"error": "Body must be a JSON object"}
+            as_of, approximate = request.get('as_of'), bool(request.get('approximate'))
+            if isinstance(request.get('logic'), dict):
+                results = await self.evaluate([{"id": None, "logic": request['logic']}], as_of, approximate)
+                return 200, results[None]
+            reports = list(request.get('reports') or [])
+            if not all(isinstance(report, dict) for report in reports):
+                return 400, {"error": "\"reports\" must be a list of {\"id\", \"logic\"} objects"}
+            ids = [str(i) for i in request.get('ids') or []]
+            missing = [i for i in ids if i not in self.reports]
+            if missing:
+                return 404, {"error": f"Unknown reports: {', '.join(missing)}"}
+            reports += [self.reports[i] for i in ids]
+            return 200, {"results": await self.evaluate(reports, as_of, approximate)}
+
+        return 404, {"error": f"No route for {method} {url.path}"}
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, version = line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = header.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "Body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+                keep_alive = headers.get('connection', '').lower() != 'close' and version.strip() == 'HTTP/1.1'
+                self.stats["requests"] += 1
+                if method == 'OPTIONS':
+                    status, payload = 204, None
+                else:
+                    try:
+                        status, payload = await self.route(method, target, body)
+                    except Exception as e:
+                        status, payload = 500, {"error": str(e)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        reason = {200: 'OK', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large'}.get(status, 'Error')
+        head = [
+            f"HTTP/1.1 {status} {reason}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Access-Control-Allow-Origin: *",
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS",
+            "Access-Control-Allow-Headers: Content-Type",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode('latin-1') + body)
+        await writer.drain()
+
+async def serve(service, host='127.0.0.1', port=DEFAULT_PORT):
+    server = await asyncio.start_server(service.handle, host, port)
+    print(f"Report data service on http://{host}:{port} ({len(service.reports)} reports, {len(service.tables)} tables)")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    # Usage: python report_service.py <reports.json> <table_dir> [<table_dir> ...] [--port N] [--workers N]
+    args = sys.argv[1:]
+    options = {}
+    for flag in ("--port", "--workers"):
+        if flag in args:
+            i = args.index(flag)
+            options[flag] = int(args[i + 1])
+            del args[i:i + 2]
+    if len(args) < 2:
+        print("Usage: python report_service.py <reports.json> <table_dir> [<table_dir> ...] [--port N] [--workers N]")
+        sys.exit(1)
+    from column_store import open_table
+    from report_model import load_catalog
+    reports = load_catalog(args[0])
+    tables = {}
+    for path in args[1:]:
+        frame = open_table(path)
+        tables[frame.meta['table_id']] = frame
+    service = ReportService(tables, reports, workers=options.get("--workers"))
+    try:
+        asyncio.run(serve(service, port=options.get("--port", DEFAULT_PORT)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
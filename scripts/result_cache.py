@@ -0,0 +1,143 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# Cache of evaluated report results. An entry is keyed by the canonical hash of the report's
+# logic (plus bindings / as-of date) and the version of every source table it read, so a new
+# table version can never serve a stale result; invalidate_table() also frees the old entries.
+
+def canonical_hash(obj):
+    payload = json.dumps(obj, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def result_key(logic, table_versions, bindings=None, as_of=None, mode=None):
+    """table_versions: {table name: version/etag} for every table the report is bound to.
+
+    `mode` tells apart results of other evaluation modes (e.g. 'approximate').
+    """
+    key = {
+        "logic": logic,
+        "tables": sorted(table_versions.items()),
+        "bindings": bindings or {},
+        "as_of": as_of,
+    }
+    if mode:
+        key["mode"] = mode
+    return canonical_hash(key)
+
+class DiskTier:
+    """SQLite-backed second tier that survives restarts."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, tables TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS deps (tbl TEXT NOT NULL, key TEXT NOT NULL)")
+        self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS deps_tbl_key ON deps (tbl, key)")
+        self.conn.commit()
+
+    def get(self, key):
+        """Return (serialised value, tables) or None."""
+        row = self.conn.execute("SELECT value, tables FROM results WHERE key = ?", (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, key, value, tables):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO results (key, value, tables) VALUES (?, ?, ?)", (key, value, json.dumps(list(tables))))
+            self.conn.executemany("INSERT OR IGNORE INTO deps (tbl, key) VALUES (?, ?)", [(t, key) for t in tables])
+
+    def invalidate_table(self, table):
+        with self.conn:
+            self.conn.execute("DELETE FROM results WHERE key IN (SELECT key FROM deps WHERE tbl = ?)", (table,))
+            self.conn.execute("DELETE FROM deps WHERE key NOT IN (SELECT key FROM results)")
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM results")
+            self.conn.execute("DELETE FROM deps")
+
+class ResultCache:
+    """Bounded in-memory LRU of report results with an optional on-disk tier.
+
+    `max_bytes` caps the summed size of the serialised results held in memory.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, disk_path=None):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (value, size, tables)
+        self.by_table = {}           # table -> set of keys
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.disk = DiskTier(disk_path) if disk_path else None
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+        if self.disk:
+            row = self.disk.get(key)
+            if row is not None:
+                serialised, tables = row
+                value = json.loads(serialised)
+                self.hits += 1
+                self._put_memory(key, value, serialised, tables)
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, key, value, tables):
+        serialised = json.dumps(value)
+        self._put_memory(key, value, serialised, tables)
+        if self.disk:
+            self.disk.put(key, serialised, tables)
+
+    def _put_memory(self, key, value, serialised, tables):
+        size = len(serialised)
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (value, size, tuple(tables))
+            self.bytes += size
+            for table in tables:
+                self.by_table.setdefault(table, set()).add(key)
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key):
+        value, size, tables = self.entries.pop(key)
+        self.bytes -= size
+        for table in tables:
+            keys = self.by_table.get(table)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.by_table[table]
+
+    def invalidate_table(self, table):
+        """Drop every entry that read `table`, in memory and on disk."""
+        with self.lock:
+            for key in list(self.by_table.get(table, ())):
+                self._drop(key)
+        if self.disk:
+            self.disk.invalidate_table(table)
+
+    def get_or_compute(self, logic, table_versions, compute, bindings=None, as_of=None):
+        key = result_key(logic, table_versions, bindings, as_of)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, list(table_versions))
+        return value
+
+    def stats(self):
+        return {"entries": len(self.entries), "bytes": self.bytes, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,254 @@
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+from report_engine import ISO_DATE, ReportEngineError
+from report_join import PLACEHOLDER_KEYS, infer_join_key
+from table_bindings import BindingIndex
+from table_catalog import load_tables
+
+# Maps each `logic.requirements` entry ({"key": "amount_col", "types": ["number"],
+# "keywords": ["amount", "spend"]}) to a real column of the report's bound table. Every table
+# is profiled once: column types are inferred from a sample of rows and kept, per table
+# version, in frame.indexes and an optional JSON schema cache, so re-resolving a catalog never
+# re-reads a table that has not changed. Tables that are not loaded fall back to the columns
+# declared in wiki_data.json; declared roles (measure / time / dimension / id) break ties.
+# Resolutions are memoised per (tables, requirement), so a 10k-report catalog costs one
+# resolution per distinct requirement.
+
+SAMPLE_ROWS = 1000
+MIN_SHARE = 0.95
+DECLARED_TYPES = {'string': 'text', 'number': 'number', 'date': 'date', 'datetime': 'date', 'bool': 'text'}
+PREFERRED_ROLE = {'number': 'measure', 'date': 'time', 'text': 'dimension'}
+
+def infer_type(values):
+    """'number', 'date' or 'text' for a sample of raw values."""
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return 'date'
+    if values.dtype.kind in 'fiu':
+        return 'number'
+    if values.dtype.kind == 'b':
+        return 'text'
+    present = [str(v) for v in values.tolist() if v not in ('', None)]
+    if not present:
+        return 'text'
+    numbers = 0
+    for v in present:
+        try:
+            float(v.replace(',', ''))
+            numbers += 1
+        except ValueError:
+            pass
+    if numbers >= MIN_SHARE * len(present):
+        return 'number'
+    if sum(1 for v in present if ISO_DATE.match(v)) >= MIN_SHARE * len(present):
+        return 'date'
+    return 'text'
+
+def profile_frame(frame, sample_rows=SAMPLE_ROWS):
+    """[{"name", "type"}] for every column, from evenly spaced sample rows."""
+    rows = np.unique(np.linspace(0, max(frame.n - 1, 0), min(sample_rows, frame.n)).astype(np.int64))
+    columns = []
+    for name in frame.columns:
+        values = frame.columns[name]
+        if name in frame.categories:
+            labels = np.asarray(frame.categories[name], dtype=object)
+            sample = labels[np.asarray(values[rows])] if len(rows) else labels[:0]
+        else:
+            sample = values[rows] if len(rows) else values[:0]
+        columns.append({"name": name, "type": infer_type(sample)})
+    return columns
+
+def declared_schema(table_def):
+    return [{"name": c['name'], "type": DECLARED_TYPES.get(c.get('type'), 'text'), "role": c.get('role')} for c in table_def.get('columns', [])]
+
+class SchemaCache:
+    """Table name -> {"version", "columns"}; persisted as JSON when `path` is given."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        self.dirty = False
+
+    def get(self, table, version):
+        entry = self.entries.get(table)
+        if entry is not None and version is not None and entry["version"] == version:
+            return entry["columns"]
+        return None
+
+    def put(self, table, version, columns):
+        if version is not None:
+            self.entries[table] = {"version": version, "columns": columns}
+            self.dirty = True
+
+    def save(self):
+        if self.path and self.dirty:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=1)
+            self.dirty = False
+
+def table_schema(name, frame=None, table_def=None, cache=None):
+    """Column schema of a table: profiled from `frame` (cached per table version) with the
+    declared roles merged in, or the declared columns alone when no frame is loaded."""
+    declared = declared_schema(table_def) if table_def else []
+    if frame is None:
+        return declared
+    if ('schema',) in frame.indexes:
+        return frame.indexes[('schema',)]
+    columns = cache.get(name, frame.version) if cache is not None else None
+    if columns is None:
+        columns = profile_frame(frame)
+        if cache is not None:
+            cache.put(name, frame.version, columns)
+    roles = {c["name"]: c["role"] for c in declared}
+    schema = [dict(c, role=roles.get(c["name"])) for c in columns]
+    frame.indexes[('schema',)] = schema
+    return schema
+
+def _keyword_score(name, keywords):
+    name = name.lower()
+    tokens = set(re.findall(r'[a-z0-9]+', name))
+    score = 0
+    for rank, keyword in enumerate(keywords):
+        keyword = keyword.lower()
+        weight = 10 * (len(keywords) - rank) # earlier keywords are stronger hints
+        if keyword in tokens:
+            score = max(score, weight + 5)
+        elif keyword and keyword in name:
+            score = max(score, weight)
+    return score
+
+def match_requirement(schema, requirement):
+    """Best column name for a requirement, or None.
+
+    A column must match one of the keywords, unless it is the only column of the wanted type
+    with the role that type usually has (the table's one measure, say).
+    """
+    types = requirement.get('types') or ['number', 'date', 'text']
+    keywords = requirement.get('keywords') or []
+    roles = {PREFERRED_ROLE.get(t) for t in types}
+    candidates = [c for c in schema if c["type"] in types]
+    best, best_score = None, 0
+    for column in candidates:
+        score = _keyword_score(column["name"], keywords)
+        if score:
+            if column.get("role") == 'id':
+                score -= 5
+            elif column.get("role") in roles:
+                score += 3
+        if score > best_score:
+            best, best_score = column["name"], score
+    if best is None:
+        typical = [c["name"] for c in candidates if c.get("role") in roles]
+        best = typical[0] if len(typical) == 1 else None
+    return best
+
+class RequirementResolver:
+    def __init__(self, frames=None, tables=None, cache=None):
+        self.frames = frames or {}  # table id -> Frame, for tables that are loaded
+        self.tables = tables if tables is not None else load_tables()
+        self.index = BindingIndex(self.tables)
+        self.cache = cache
+        self.memo = {}
+
+    def _schema(self, table_ids, join=None):
+        # Columns as join_sources names them: each right table's copy of the join key is
+        # dropped, its other duplicates get '_right'.
+        schema, seen = [], set()
+        for i, table_id in enumerate(table_ids):
+            columns = table_schema(table_id, self.frames.get(table_id), self.tables.get(table_id), self.cache)
+            key = self._join_key(table_ids[i - 1], table_id, seen, columns, (join or {}).get('on')) if i else None
+            for column in columns:
+                if column["name"] == key:
+                    continue
+                name = column["name"] + '_right' if column["name"] in seen else column["name"]
+                seen.add(name)
+                schema.append(dict(column, name=name))
+        return schema
+
+    def _join_key(self, left_id, right_id, left_names, right_columns, key):
+        if key not in PLACEHOLDER_KEYS and key in left_names and any(c["name"] == key for c in right_columns):
+            return key
+        try:
+            return infer_join_key(left_id, right_id, self.frames.get(left_id), self.frames.get(right_id))
+        except ReportEngineError:
+            return None # the report cannot be joined; evaluating it reports why
+
+    def table_ids(self, logic):
+        sources = logic.get('sources') or [logic.get('source', {})]
+        ids = []
+        for source in sources:
+            table_id = next((t for t in map(self.index.resolve, source.get('table_keywords', [])) if t), None)
+            if table_id is None:
+                return None
+            ids.append(table_id)
+        return tuple(ids)
+
+    def resolve(self, logic):
+        """{requirement key: column} for one report's logic (unresolved keys are left out)."""
+        requirements = logic.get('requirements') or []
+        table_ids = self.table_ids(logic) if requirements else None
+        if not table_ids:
+            return {}
+        join = logic.get('join') if len(table_ids) > 1 else None
+        bindings = {}
+        for requirement in requirements:
+            memo_key = (table_ids, json.dumps(join, sort_keys=True), json.dumps(requirement, sort_keys=True))
+            if memo_key not in self.memo:
+                self.memo[memo_key] = match_requirement(self._schema(table_ids, join), requirement)
+            if self.memo[memo_key] is not None:
+                bindings[requirement['key']] = self.memo[memo_key]
+        return bindings
+
+    def resolve_catalog(self, reports):
+        """report id -> bindings, for every report with at least one resolved requirement."""
+        out = {}
+        for report in reports:
+            logic = report.get('logic')
+            if isinstance(logic, dict):
+                bindings = self.resolve(logic)
+                if bindings:
+                    out[report.get('id')] = bindings
+        if self.cache is not None:
+            self.cache.save()
+        return out
+
+def annotate_catalog(reports_path, table_dirs=(), cache_path=None):
+    """Store resolved requirements as logic["bindings"] in a report catalog, in place."""
+    frames = {}
+    if table_dirs:
+        from column_store import open_table
+        for path in table_dirs:
+            frame = open_table(path)
+            frames[frame.meta['table_id']] = frame
+    with open(reports_path, 'r', encoding='utf-8') as f:
+        reports = json.load(f)
+    resolver = RequirementResolver(frames, cache=SchemaCache(cache_path) if cache_path else None)
+    resolved = resolver.resolve_catalog(reports)
+    for report in reports:
+        if report.get('id') in resolved:
+            report['logic']['bindings'] = resolved[report.get('id')]
+    with open(reports_path, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, indent=4)
+    print(f"Resolved requirements of {len(resolved)}/{len(reports)} reports in {reports_path}")
+    return resolved
+
+if __name__ == "__main__":
+    # Usage: python schema_resolver.py <reports.json> [<table_dir> ...] [--cache schemas.json]
+    args = sys.argv[1:]
+    cache_path = None
+    if "--cache" in args:
+        i = args.index("--cache")
+        cache_path = args[i + 1]
+        del args[i:i + 2]
+    if not args:
+        print("Usage: python schema_resolver.py <reports.json> [<table_dir> ...] [--cache schemas.json]")
+        sys.exit(1)
+    annotate_catalog(args[0], args[1:], cache_path)
@@ -0,0 +1,202 @@
+import base64
+import hashlib
+
+import numpy as np
+
+from report_engine import aggregate_input, group_codes, percentile_of
+
+# Mergeable sketches for the approximate aggregation mode:
+#   count_distinct      -> HyperLogLog, 2^12 one-byte registers (4 KB). Standard error
+#                          1.04 / sqrt(4096) = 1.6%; 99% of estimates fall within about 4.2%.
+#   median / p50 .. p99 -> KLL quantile sketch, k = 200 (a few KB). The returned value's rank
+#                          is within about 1.7% of the requested rank with 99% confidence.
+# Both merge losslessly with sketches built on other partitions (the merged sketch has the
+# same error bound as one built over all rows) and serialise to small JSON dicts.
+
+HLL_PRECISION = 12
+KLL_K = 200
+
+def _splitmix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+MISSING_LABELS = ['', 'nan', 'NaT', 'None']
+
+def row_hashes(values):
+    """Stable 64-bit hash of every row (the same across processes and partitions), plus a mask
+    of the rows that are not missing."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'fiub':
+        values = values.astype(np.float64) + 0.0 # folds -0.0 into 0.0
+        return _splitmix64(values.view(np.uint64)), ~np.isnan(values)
+    if values.dtype.kind == 'M':
+        return _splitmix64(values.astype('datetime64[s]').astype(np.int64).view(np.uint64)), ~np.isnat(values)
+    labels, codes = np.unique(values.astype(str), return_inverse=True)
+    codes = codes.reshape(-1)
+    digests = [int.from_bytes(hashlib.blake2b(label.encode('utf-8'), digest_size=8).digest(), 'little') for label in labels.tolist()]
+    return np.array(digests, dtype=np.uint64)[codes], ~np.isin(labels, MISSING_LABELS)[codes]
+
+def column_hashes(frame, column):
+    """row_hashes of a frame column; dictionary-encoded columns hash each label once."""
+    if column in frame.categories:
+        hashes, keep = row_hashes(np.asarray(frame.categories[column], dtype=object))
+        codes = frame.columns[column]
+        return hashes[codes], keep[codes]
+    return row_hashes(frame.columns[column])
+
+def _bit_length(x):
+    n = np.zeros(len(x), dtype=np.int64)
+    x = x.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= (np.uint64(1) << np.uint64(shift))
+        n[big] += shift
+        x[big] >>= np.uint64(shift)
+    return n + (x > 0)
+
+def hll_positions(hashes, p=HLL_PRECISION):
+    """(register index, rank) for each hash."""
+    tail = 64 - p
+    index = (hashes >> np.uint64(tail)).astype(np.int64)
+    rest = hashes & np.uint64((1 << tail) - 1)
+    return index, (tail - _bit_length(rest) + 1).astype(np.uint8)
+
+class HyperLogLog:
+    def __init__(self, p=HLL_PRECISION, registers=None):
+        self.p = p
+        self.registers = registers if registers is not None else np.zeros(1 << p, dtype=np.uint8)
+
+    def update(self, values):
+        hashes, keep = row_hashes(values)
+        return self.add_hashes(hashes[keep])
+
+    def add_hashes(self, hashes):
+        index, rank = hll_positions(hashes, self.p)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def is_empty(self):
+        return not self.registers.any()
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros) # linear counting for small cardinalities
+        return float(estimate)
+
+    def to_dict(self):
+        return {"type": "hll", "p": self.p, "registers": base64.b64encode(self.registers.tobytes()).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data):
+        registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return cls(data["p"], registers)
+
+class KLLSketch:
+    def __init__(self, k=KLL_K, levels=None, n=0):
+        self.k = k
+        self.levels = levels or [np.empty(0)] # level h holds items of weight 2^h
+        self.n = n
+        self.rng = np.random.default_rng()
+
+    def _capacity(self, h):
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - 1 - h))))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(self.levels[h])
+                leftover = items[len(items) - len(items) % 2:]
+                items = items[:len(items) - len(items) % 2]
+                # Keep every other item (random parity); survivors carry double weight.
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[self.rng.integers(2)::2]])
+                self.levels[h] = leftover
+            h += 1
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def is_empty(self):
+        return self.n == 0
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        if not self.n:
+            return None
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        i = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(items[order][min(i, len(items) - 1)])
+
+    def to_dict(self):
+        return {"type": "kll", "k": self.k, "n": self.n, "levels": [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["k"], [np.asarray(items, dtype=np.float64) for items in data["levels"]], data["n"])
+
+SKETCH_TYPES = {"hll": HyperLogLog, "kll": KLLSketch}
+
+def is_sketched(operation):
+    return operation == 'count_distinct' or percentile_of(operation) is not None
+
+def new_sketch(operation):
+    return HyperLogLog() if operation == 'count_distinct' else KLLSketch()
+
+def load_sketch(data):
+    return SKETCH_TYPES[data["type"]].from_dict(data)
+
+def finish(sketch, operation):
+    if operation == 'count_distinct':
+        return sketch.estimate()
+    return sketch.quantile(percentile_of(operation))
+
+def sketch_groups(frame, key, operation, value):
+    """Sketch `value` over the frame, per group of `key` (or overall when key is None).
+
+    Returns (labels, sketches); labels is None for an overall sketch.
+    """
+    if operation == 'count_distinct':
+        hashes, keep = column_hashes(frame, value)
+        if key is None:
+            return None, [HyperLogLog().add_hashes(hashes[keep])]
+        # One pass: every row's register position, then a per-group max into a registers matrix.
+        grouped = group_codes(frame, key)
+        index, rank = hll_positions(hashes[keep])
+        registers = np.zeros((grouped.ngroups, 1 << HLL_PRECISION), dtype=np.uint8)
+        np.maximum.at(registers, (grouped.codes[keep], index), rank)
+        return grouped.labels, [HyperLogLog(HLL_PRECISION, registers[g]) for g in range(grouped.ngroups)]
+
+    numbers = aggregate_input(frame, operation, value)
+    if key is None:
+        return None, [KLLSketch().update(numbers)]
+    grouped = group_codes(frame, key)
+    order = np.argsort(grouped.codes, kind='stable')
+    bounds = np.searchsorted(grouped.codes[order], np.arange(grouped.ngroups + 1))
+    return grouped.labels, [KLLSketch().update(numbers[order[bounds[g]:bounds[g + 1]]]) for g in range(grouped.ngroups)]
@@ -0,0 +1,156 @@
+import json
+import os
+import re
+import sys
+from collections import deque
+
+from table_catalog import load_tables
+
+# Report -> table binding in one pass. An Aho-Corasick automaton over every table id, display
+# name and table keyword in wiki_data.json finds all of them inside a report's table keyword
+# in a single scan (whole tokens only, so 'AP' does not match inside 'CAPEX'). Keywords that
+# name no table that way fall back to the frontend's rule (the keyword is a substring of a
+# table's display name), answered by a second automaton over the catalog's keywords that reads
+# each display name once. write_bindings() saves the result next to the report catalog as
+# <domain>_bindings.json for useWidgetManager's auto-connect.
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for i, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                if ch not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][ch] = len(self.goto) - 1
+                state = self.goto[state][ch]
+            self.out[state].append(i)
+        # Breadth-first failure links; each state also reports the matches of its fallback.
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def search(self, text):
+        """Yield (start, end, pattern index) for every occurrence of every pattern in `text`."""
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for i in self.out[state]:
+                yield end - len(self.patterns[i]), end, i
+
+def normalize(name):
+    """Lower-case words separated by single spaces: 'AP_Invoices ' -> 'ap invoices'."""
+    return ' '.join(re.findall(r'[a-z0-9]+', name.lower()))
+
+class BindingIndex:
+    def __init__(self, tables=None):
+        self.tables = tables if tables is not None else load_tables()
+        self.order = {table_id: i for i, table_id in enumerate(self.tables)}
+        self.exact = {}     # normalized table id / display name -> table id (first table wins)
+        names = {}          # normalized name or keyword -> table ids
+        for table_id, table in self.tables.items():
+            for name in (table_id, table.get('display_name', '')):
+                self.exact.setdefault(normalize(name), table_id)
+                self.exact.setdefault(name.lower(), table_id)
+            for name in [table_id, table.get('display_name', '')] + table.get('table_keywords', []):
+                if normalize(name):
+                    names.setdefault(normalize(name), []).append(table_id)
+        self.names = names
+        self.automaton = AhoCorasick(list(names))
+        self.targets = list(names.values())
+
+    def resolve(self, name):
+        """Table id named by a table name or keyword ('PRC_Invoices', 'Invoices', 'AP Invoices')."""
+        if name in self.tables:
+            return name
+        if name.lower() in self.exact:
+            return self.exact[name.lower()]
+        text = normalize(name)
+        if text in self.exact:
+            return self.exact[text]
+        found = set(self.names.get(text.replace(' ', ''), []))
+        for start, end, i in self.automaton.search(text):
+            if (start == 0 or text[start - 1] == ' ') and (end == len(text) or text[end] == ' '):
+                found.update(self.targets[i])
+        return min(found, key=self.order.get) if found else None
+
+    def title_matches(self, keywords):
+        """keyword -> first table (catalog order) whose display name contains it, for every keyword
+        at once: one scan of each display name."""
+        keywords = sorted({k.lower() for k in keywords if k})
+        automaton = AhoCorasick(keywords)
+        matches = {}
+        for table_id, table in self.tables.items():
+            for _, _, i in automaton.search(table.get('display_name', '').lower()):
+                matches.setdefault(keywords[i], table_id)
+        return matches
+
+    def bind_catalog(self, reports):
+        """{report id: {"primary" | "source_<i>": table id}} for every report with resolvable sources."""
+        sources = {}
+        for report in reports:
+            logic = report.get('logic')
+            if not isinstance(logic, dict):
+                continue
+            if isinstance(logic.get('sources'), list):
+                sources[report.get('id')] = [(f"source_{i}", s.get('table_keywords') or []) for i, s in enumerate(logic['sources'])]
+            elif isinstance(logic.get('source'), dict):
+                sources[report.get('id')] = [("primary", logic['source'].get('table_keywords') or [])]
+
+        resolved = {}
+        for entries in sources.values():
+            for _, keywords in entries:
+                for keyword in keywords:
+                    if keyword not in resolved:
+                        resolved[keyword] = self.resolve(keyword)
+        fallback = self.title_matches(k for k, table_id in resolved.items() if table_id is None)
+
+        bindings = {}
+        for report_id, entries in sources.items():
+            bound = {}
+            for slot, keywords in entries:
+                table_id = next((resolved[k] for k in keywords if resolved[k]), None)
+                table_id = table_id or next((fallback[k.lower()] for k in keywords if k and k.lower() in fallback), None)
+                if table_id:
+                    bound[slot] = table_id
+            if bound:
+                bindings[report_id] = bound
+        return bindings
+
+def bindings_path(reports_path):
+    base, ext = os.path.splitext(reports_path)
+    return (base[:-len('_reports')] if base.endswith('_reports') else base) + '_bindings' + ext
+
+def write_bindings(reports_path, output_path=None, index=None):
+    """Write <domain>_bindings.json: {"tables": {table id: display name}, "reports": {...}}."""
+    with open(reports_path, 'r', encoding='utf-8') as f:
+        reports = json.load(f)
+    index = index or BindingIndex()
+    bindings = index.bind_catalog(reports)
+    used = sorted({t for bound in bindings.values() for t in bound.values()}, key=index.order.get)
+    output_path = output_path or bindings_path(reports_path)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump({"tables": {t: index.tables[t].get('display_name', t) for t in used}, "reports": bindings}, f, indent=1)
+    print(f"Bound {len(bindings)}/{len(reports)} reports to {len(used)} tables -> {output_path}")
+    return bindings
+
+if __name__ == "__main__":
+    # Usage: python table_bindings.py <reports.json> [bindings.json]
+    if len(sys.argv) < 2:
+        print("Usage: python table_bindings.py <reports.json> [bindings.json]")
+        sys.exit(1)
+    write_bindings(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
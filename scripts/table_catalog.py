@@ -0,0 +1,31 @@
+import json
+import os
+
+# Table definitions (columns, types, roles, keywords) declared in the repo's wiki_data.json.
+WIKI_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'wiki_data.json')
+
+_cache = {}
+
+def load_tables(path=WIKI_DATA_PATH):
+    """Return table_id -> table definition from wiki_data.json's procurementTables."""
+    if path not in _cache:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        _cache[path] = {t['table_id']: t for t in data.get('procurementTables', [])}
+    return _cache[path]
+
+_indexes = {}
+
+def find_table_def(name, tables=None):
+    """Match a table name or keyword (e.g. 'PRC_Invoices', 'Invoices', 'AP Invoices') to a definition."""
+    from table_bindings import BindingIndex
+    tables = tables if tables is not None else load_tables()
+    index = _indexes.get(id(tables))
+    if index is None or index.tables is not tables:
+        # Keywords are matched as whole tokens, so 'AP' does not match inside 'CAPEX'.
+        index = _indexes[id(tables)] = BindingIndex(tables)
+    table_id = index.resolve(name)
+    return tables[table_id] if table_id else None
+
+def columns_with_role(table, role):
+    return [c['name'] for c in table.get('columns', []) if c.get('role') == role]
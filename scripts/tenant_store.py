@@ -0,0 +1,385 @@
+import json
+import os
+import re
+import secrets
+import sqlite3
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+# SQLite (WAL) replacement for a tenant's json-server db.json. Every record of a collection
+# (tasks, messages, ...) is its own row, so a write touches one record instead of re-serialising
+# the whole document. Object resources (widgets: dashboard path -> widget list) are stored one
+# row per key and a PUT only rewrites the keys that changed. Lookups by id use the primary key;
+# foreign-key fields (`*Id`: senderId, channelId, ownerId, ...) get an expression index on
+# their JSON value the first time they are imported or filtered on.
+#
+# The REST shape follows json-server:
+#   GET    /<collection>[?field=v&field:gt=v&_sort=-f&_page=1&_per_page=10&_start=&_end=&_limit=]
+#   GET    /<collection>/<id>      POST /<collection>     PUT|PATCH|DELETE /<collection>/<id>
+#   GET|PUT|PATCH /<object resource>
+
+DEFAULT_PORT = 4001
+OPERATORS = {'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>=', 'ne': '!='}
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS resources (name TEXT PRIMARY KEY, kind TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS records (collection TEXT NOT NULL, id TEXT NOT NULL, body TEXT NOT NULL, PRIMARY KEY (collection, id))",
+    "CREATE TABLE IF NOT EXISTS object_items (name TEXT NOT NULL, key TEXT NOT NULL, pos INTEGER NOT NULL, body TEXT NOT NULL, PRIMARY KEY (name, key))",
+    "CREATE TABLE IF NOT EXISTS indexed_fields (collection TEXT NOT NULL, field TEXT NOT NULL, PRIMARY KEY (collection, field))",
+]
+
+class StoreError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _field_path(field):
+    if not re.fullmatch(r'[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*', field):
+        raise StoreError(400, f"Invalid field '{field}'")
+    return '$.' + field
+
+def _is_foreign_key(field):
+    return field.endswith('Id') or field.endswith('_id')
+
+def _candidates(value):
+    # Query strings are text; stored JSON values may be numbers or booleans.
+    values = [value]
+    if value in ('true', 'false'):
+        values.append(1 if value == 'true' else 0)
+    else:
+        try:
+            number = float(value)
+            values.append(int(number) if number.is_integer() else number)
+        except ValueError:
+            pass
+    return values
+
+class TenantStore:
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.indexed = set()
+        conn = self.conn()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+        self.indexed = set(conn.execute("SELECT collection, field FROM indexed_fields").fetchall())
+
+    def conn(self):
+        # One connection per thread; WAL lets readers run while a write commits.
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            self.local.conn = conn
+        return conn
+
+    def kind(self, name):
+        row = self.conn().execute("SELECT kind FROM resources WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise StoreError(404, f"Unknown resource '{name}'")
+        return row[0]
+
+    def resources(self):
+        return dict(self.conn().execute("SELECT name, kind FROM resources ORDER BY name").fetchall())
+
+    def ensure_index(self, collection, field):
+        if (collection, field) in self.indexed or not re.fullmatch(r'[\w-]+', collection):
+            return
+        path = _field_path(field)
+        name = re.sub(r'\W', '_', f"idx_{collection}_{field}")
+        conn = self.conn()
+        with conn:
+            # Used by `collection = ? AND json_extract(body, path) = ?` lookups.
+            conn.execute(f"CREATE INDEX IF NOT EXISTS \"{name}\" ON records (collection, json_extract(body, '{path}'))")
+            conn.execute("INSERT OR IGNORE INTO indexed_fields (collection, field) VALUES (?, ?)", (collection, field))
+        self.indexed.add((collection, field))
+
+    # --- Collections -----------------------------------------------------------------------
+
+    def list(self, collection, params=()):
+        """Records of a collection filtered / sorted / paginated like json-server."""
+        if self.kind(collection) != 'collection':
+            raise StoreError(400, f"'{collection}' is not a collection")
+        where, args, sort, options = ["collection = ?"], [collection], [], {}
+        for key, value in params:
+            if key == '_sort':
+                sort.extend(f for f in value.split(',') if f)
+            elif key == '_order':
+                options['_order'] = value.split(',')
+            elif key.startswith('_'):
+                options[key] = value
+            else:
+                field, op = re.match(r'(.+?)(?:[:_](lt|lte|gt|gte|ne))?$', key).groups()
+                path = _field_path(field)
+                if op is None:
+                    if _is_foreign_key(field):
+                        self.ensure_index(collection, field)
+                    values = _candidates(value)
+                    where.append(f"json_extract(body, '{path}') IN ({', '.join('?' * len(values))})")
+                    args.extend(values)
+                else:
+                    values = _candidates(value)
+                    where.append(f"json_extract(body, '{path}') {OPERATORS[op]} ?")
+                    args.append(values[-1])
+
+        order = []
+        for i, field in enumerate(sort):
+            descending = field.startswith('-') or options.get('_order', [])[i:i + 1] == ['desc']
+            order.append(f"json_extract(body, '{_field_path(field.lstrip('-'))}') {'DESC' if descending else 'ASC'}")
+        order.append("records.rowid")
+        sql = f"SELECT body FROM records WHERE {' AND '.join(where)} ORDER BY {', '.join(order)}"
+        items = [json.loads(row[0]) for row in self.conn().execute(sql, args)]
+
+        if '_page' in options:
+            per_page = int(options.get('_per_page', 10))
+            pages = max(1, -(-len(items) // per_page))
+            page = min(max(1, int(options['_page'])), pages)
+            return {
+                "first": 1, "prev": page - 1 if page > 1 else None, "next": page + 1 if page < pages else None,
+                "last": pages, "pages": pages, "items": len(items), "data": items[(page - 1) * per_page:page * per_page],
+            }
+        start = int(options.get('_start', 0))
+        end = int(options['_end']) if '_end' in options else None
+        if '_limit' in options:
+            end = start + int(options['_limit'])
+        return items[start:end]
+
+    def get(self, collection, record_id):
+        row = self.conn().execute("SELECT body FROM records WHERE collection = ? AND id = ?", (collection, str(record_id))).fetchone()
+        if row is None:
+            raise StoreError(404, f"{collection}/{record_id} not found")
+        return json.loads(row[0])
+
+    def create(self, collection, record):
+        if self.kind(collection) != 'collection':
+            raise StoreError(400, f"'{collection}' is not a collection")
+        if not isinstance(record, dict):
+            raise StoreError(400, "Body must be a JSON object")
+        conn = self.conn()
+        if record.get('id') is not None:
+            try:
+                with conn:
+                    conn.execute("INSERT INTO records (collection, id, body) VALUES (?, ?, ?)", (collection, str(record['id']), json.dumps(record)))
+            except sqlite3.IntegrityError:
+                raise StoreError(409, f"{collection}/{record['id']} already exists")
+            return record
+        while True:
+            candidate = dict(record, id=secrets.token_hex(2)) # json-server style short ids
+            try:
+                with conn:
+                    conn.execute("INSERT INTO records (collection, id, body) VALUES (?, ?, ?)", (collection, candidate['id'], json.dumps(candidate)))
+                return candidate
+            except sqlite3.IntegrityError:
+                continue
+
+    def replace(self, collection, record_id, record, merge=False):
+        if not isinstance(record, dict):
+            raise StoreError(400, "Body must be a JSON object")
+        conn = self.conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = self.get(collection, record_id)
+            record = dict(current, **record) if merge else dict(record)
+            record['id'] = current['id']
+            conn.execute("UPDATE records SET body = ? WHERE collection = ? AND id = ?", (json.dumps(record), collection, str(record_id)))
+        return record
+
+    def delete(self, collection, record_id, dependent=()):
+        conn = self.conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            record = self.get(collection, record_id)
+            conn.execute("DELETE FROM records WHERE collection = ? AND id = ?", (collection, str(record_id)))
+            # ?_dependent=comments also deletes comments whose <singular>Id points at the record.
+            field = collection[:-1] + 'Id' if collection.endswith('s') else collection + 'Id'
+            for child in dependent:
+                conn.execute(f"DELETE FROM records WHERE collection = ? AND json_extract(body, '{_field_path(field)}') IN (?, ?)",
+                             (child, str(record['id']), record['id']))
+        return record
+
+    # --- Object resources ------------------------------------------------------------------
+
+    def read_object(self, name):
+        rows = self.conn().execute("SELECT key, body FROM object_items WHERE name = ? ORDER BY pos", (name,))
+        return {key: json.loads(body) for key, body in rows}
+
+    def write_object(self, name, value, merge=False):
+        """PUT (or PATCH with merge) an object resource; only changed keys are written."""
+        if not isinstance(value, dict):
+            raise StoreError(400, "Body must be a JSON object")
+        conn = self.conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = dict(conn.execute("SELECT key, body FROM object_items WHERE name = ?", (name,)).fetchall())
+            if not merge:
+                for key in current.keys() - value.keys():
+                    conn.execute("DELETE FROM object_items WHERE name = ? AND key = ?", (name, key))
+            position = len(current)
+            for key, item in value.items():
+                body = json.dumps(item)
+                if key not in current:
+                    conn.execute("INSERT INTO object_items (name, key, pos, body) VALUES (?, ?, ?, ?)", (name, key, position, body))
+                    position += 1
+                elif current[key] != body:
+                    conn.execute("UPDATE object_items SET body = ? WHERE name = ? AND key = ?", (body, name, key))
+        return self.read_object(name)
+
+    # --- Import / export -------------------------------------------------------------------
+
+    def import_db(self, data):
+        """Load a whole db.json document (replacing resources of the same name)."""
+        conn = self.conn()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for name, value in data.items():
+                conn.execute("DELETE FROM records WHERE collection = ?", (name,))
+                conn.execute("DELETE FROM object_items WHERE name = ?", (name,))
+                if isinstance(value, list):
+                    conn.execute("INSERT OR REPLACE INTO resources (name, kind) VALUES (?, 'collection')", (name,))
+                    rows = []
+                    for record in value:
+                        if isinstance(record, dict) and 'id' not in record:
+                            record = dict(record, id=secrets.token_hex(4))
+                        rows.append((name, str(record['id']), json.dumps(record)))
+                    conn.executemany("INSERT OR REPLACE INTO records (collection, id, body) VALUES (?, ?, ?)", rows)
+                else:
+                    conn.execute("INSERT OR REPLACE INTO resources (name, kind) VALUES (?, 'object')", (name,))
+                    conn.executemany("INSERT INTO object_items (name, key, pos, body) VALUES (?, ?, ?, ?)",
+                                     [(name, key, i, json.dumps(item)) for i, (key, item) in enumerate((value or {}).items())])
+        for name, value in data.items():
+            if isinstance(value, list):
+                for field in {f for record in value if isinstance(record, dict) for f in record if _is_foreign_key(f)}:
+                    self.ensure_index(name, field)
+
+    def export_db(self):
+        data = {}
+        for name, kind in self.resources().items():
+            if kind == 'collection':
+                rows = self.conn().execute("SELECT body FROM records WHERE collection = ? ORDER BY rowid", (name,))
+                data[name] = [json.loads(row[0]) for row in rows]
+            else:
+                data[name] = self.read_object(name)
+        return data
+
+def import_file(json_path, db_path):
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    store = TenantStore(db_path)
+    store.import_db(data)
+    print(f"Imported {len(data)} resources from {json_path} into {db_path}")
+    return store
+
+# --- HTTP ----------------------------------------------------------------------------------
+
+class Handler(BaseHTTPRequestHandler):
+    store = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload=None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, PUT, PATCH, DELETE, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            return json.loads(self.rfile.read(length) or b'null')
+        except ValueError:
+            raise StoreError(400, "Body is not valid JSON")
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip('/').split('/') if p]
+        params = parse_qsl(url.query, keep_blank_values=True)
+        store = self.store
+        try:
+            if not parts or len(parts) > 2:
+                raise StoreError(404, "Not found")
+            name = parts[0]
+            kind = store.kind(name)
+            if kind == 'object':
+                if len(parts) != 1:
+                    raise StoreError(404, "Not found")
+                if method == 'GET':
+                    return self._send(200, store.read_object(name))
+                if method in ('PUT', 'PATCH'):
+                    return self._send(200, store.write_object(name, self._body(), merge=method == 'PATCH'))
+            elif len(parts) == 1:
+                if method == 'GET':
+                    return self._send(200, store.list(name, params))
+                if method == 'POST':
+                    return self._send(201, store.create(name, self._body()))
+            else:
+                if method == 'GET':
+                    return self._send(200, store.get(name, parts[1]))
+                if method in ('PUT', 'PATCH'):
+                    return self._send(200, store.replace(name, parts[1], self._body(), merge=method == 'PATCH'))
+                if method == 'DELETE':
+                    dependent = [c for key, value in params if key == '_dependent' for c in value.split(',') if c]
+                    return self._send(200, store.delete(name, parts[1], dependent))
+            raise StoreError(405, f"{method} not allowed on /{'/'.join(parts)}")
+        except StoreError as e:
+            self._send(e.status, {"error": str(e)})
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_PATCH(self):
+        self._dispatch('PATCH')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def do_OPTIONS(self):
+        self._send(204)
+
+def serve(db_path, port=DEFAULT_PORT, host='127.0.0.1'):
+    handler = type('TenantHandler', (Handler,), {'store': TenantStore(db_path)})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving {db_path} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    # Usage: python tenant_store.py import <db.json> <db.sqlite>
+    #        python tenant_store.py export <db.sqlite> <db.json>
+    #        python tenant_store.py serve <db.sqlite> [--port N]
+    args = sys.argv[1:]
+    if len(args) >= 3 and args[0] == 'import':
+        import_file(args[1], args[2])
+    elif len(args) >= 3 and args[0] == 'export':
+        with open(args[2], 'w', encoding='utf-8') as f:
+            json.dump(TenantStore(args[1]).export_db(), f, indent=2)
+    elif len(args) >= 2 and args[0] == 'serve':
+        if not os.path.exists(args[1]):
+            print(f"Error: {args[1]} not found (run the import first)")
+            sys.exit(1)
+        port = int(args[args.index('--port') + 1]) if '--port' in args else DEFAULT_PORT
+        serve(args[1], port)
+    else:
+        print("Usage: python tenant_store.py import <db.json> <db.sqlite> | export <db.sqlite> <db.json> | serve <db.sqlite> [--port N]")
+        sys.exit(1)
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from bitmap_index import MAX_VALUES, Bitmap, bitmap_index_for, index_counts, predicate_bitmap
+from query_planner import explain
+from report_engine import Frame, evaluate_predicate, evaluate_report, run_processing
+
+AS_OF = '2024-12-30'
+
+@pytest.mark.parametrize("seed", range(8))
+def test_bitmap_ops_match_set_ops(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 300000))
+    a = np.unique(rng.integers(0, n, rng.integers(0, n)))
+    b = np.unique(rng.integers(0, n, rng.integers(0, 20)))
+    left, right = Bitmap.from_rows(a), Bitmap.from_rows(b)
+    assert left.to_rows().tolist() == a.tolist()
+    assert (left & right).to_rows().tolist() == np.intersect1d(a, b).tolist()
+    assert (left | right).to_rows().tolist() == np.union1d(a, b).tolist()
+    assert len(left & right) == len(np.intersect1d(a, b))
+    mask = np.zeros(n, dtype=bool)
+    mask[a] = True
+    assert Bitmap.from_mask(mask).to_rows().tolist() == a.tolist()
+
+def _requisitions(n=150000, seed=1):
+    rng = np.random.default_rng(seed)
+    department = rng.choice(np.array(["finance", "procurement", "warehouse", "legal"], dtype=object), n, p=[0.3, 0.3, 0.39, 0.01])
+    return Frame({
+        "status": rng.integers(0, 3, n),
+        "department": department,
+        "pr_id": np.array([f"P{i}" for i in range(n)], dtype=object),
+        "request_date": np.datetime64('2020-01-01') + (np.arange(n) * 1800 // n).astype('timedelta64[D]'),
+    }, {"status": ["Approved", "Open", "Rejected"]})
+
+PREDICATES = [
+    ("status", "eq", "Rejected"),
+    ("department", "in", ["legal", "finance"]),
+    ("or", [("status", "eq", "Rejected"), ("and", [("department", "eq", "legal"), ("status", "ne", "Open")])]),
+    ("department", "eq", "nope"),
+]
+
+@pytest.mark.parametrize("predicate", PREDICATES)
+def test_predicate_bitmaps_match_row_evaluation(predicate):
+    frame = _requisitions()
+    expected = np.flatnonzero(evaluate_predicate(frame, predicate))
+    assert predicate_bitmap(frame, predicate).to_rows().tolist() == expected.tolist()
+
+def test_index_counts_match_grouping():
+    frame = _requisitions()
+    labels, counts = index_counts(frame, "department", [("status", "eq", "Open")])
+    open_rows = evaluate_predicate(frame, ("status", "eq", "Open"))
+    values, expected = np.unique(frame.columns["department"][open_rows], return_counts=True)
+    assert labels.tolist() == values.tolist() and counts.tolist() == expected.tolist()
+    # Categorical columns keep their empty groups.
+    labels, counts = index_counts(frame, "status", [("department", "eq", "nope")])
+    assert labels.tolist() == ["Approved", "Open", "Rejected"] and counts.tolist() == [0, 0, 0]
+
+def test_high_cardinality_columns_are_not_indexed():
+    frame = _requisitions()
+    assert len(np.unique(frame.columns["pr_id"])) > MAX_VALUES
+    assert bitmap_index_for(frame, "pr_id") is None
+    assert ('bitmap', 'pr_id') in frame.indexes # the decision is remembered, not re-made per query
+    logic = {"processing": [{"step": "filter", "column_ref": "pr_id", "op": "in", "value": ["P1", "P7"]},
+                            {"step": "group_by", "group_column_ref": "department", "aggregation": "count"}]}
+    assert evaluate_report(logic, frame, as_of=AS_OF) == run_processing(logic["processing"], frame, None, AS_OF)
+
+@pytest.mark.parametrize("processing", [
+    [{"step": "group_by", "group_column_ref": "status"}],
+    [{"step": "filter", "column_ref": "status", "op": "eq", "value": "Rejected"},
+     {"step": "group_by", "group_column_ref": "department", "aggregation": "count"}, {"step": "sort", "direction": "desc"}],
+    [{"step": "filter", "where": {"or": [{"column_ref": "status", "op": "eq", "value": "Rejected"},
+                                         {"column_ref": "department", "op": "eq", "value": "legal"}]}},
+     {"step": "aggregation", "operation": "count"}],
+    [{"step": "filter", "and": [{"column_ref": "status", "op": "in", "value": ["Open", "Approved"]},
+                                {"column_ref": "request_date", "last_days": 90}]},
+     {"step": "group_by", "group_column_ref": "status", "aggregation": "count"}],
+    [{"step": "filter", "column_ref": "department", "op": "eq", "value": "nope"},
+     {"step": "group_by", "group_column_ref": "status", "aggregation": "count"}],
+])
+def test_indexed_reports_match_unplanned_evaluation(processing):
+    frame = _requisitions()
+    logic = {"processing": processing}
+    assert evaluate_report(logic, frame, as_of=AS_OF) == run_processing(processing, frame, None, AS_OF)
+    if "request_date" not in str(processing):
+        assert "bitmap" in explain(logic, frame, None, AS_OF).lower()
@@ -0,0 +1,97 @@
+import json
+import os
+
+import generate_logic
+import inject_report_logic
+from build_manifest import BuildManifest, RowState, code_version, hash_row
+
+REPORTS = [
+    {"id": "r1", "Report Title": "Spend by Vendor", "formula": "SUM(Amount) by Vendor", "Chart Type (ECharts)": "Bar Chart"},
+    {"id": "r2", "Report Title": "Invoice Aging", "formula": "days since Due_Date", "Chart Type (ECharts)": "Table"},
+    {"id": "r3", "Report Title": "Open POs", "formula": "COUNT(PO) where Status = 'Open'", "Chart Type (ECharts)": "Gauge Chart"},
+]
+
+def _catalog(tmp_path, reports=REPORTS):
+    path = str(tmp_path / "reports.json")
+    with open(path, 'w') as f:
+        json.dump(reports, f, indent=4)
+    return path
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def test_hash_row_ignores_key_order_and_logic():
+    row = {"a": 1, "b": [1, 2]}
+    assert hash_row(row) == hash_row({"b": [1, 2], "a": 1, "logic": {"x": 1}})
+    assert hash_row(row) != hash_row({"a": 2, "b": [1, 2]})
+
+def test_code_version_covers_files(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text("{}")
+    before = code_version("build_manifest", str(rules))
+    assert before == code_version("build_manifest", str(rules))
+    rules.write_text('{"x": 1}')
+    assert code_version("build_manifest", str(rules)) != before
+
+def test_manifest_freshness(tmp_path):
+    source, output = tmp_path / "in.txt", tmp_path / "out.txt"
+    source.write_text("a")
+    output.write_text("b")
+    manifest = BuildManifest(str(tmp_path / "manifest.json"))
+    stage = {"module": "build_manifest", "inputs": [str(source)], "outputs": [str(output)]}
+    assert not manifest.is_fresh("s", stage)
+    manifest.record("s", stage)
+    manifest.save()
+    reloaded = BuildManifest(str(tmp_path / "manifest.json"))
+    assert reloaded.is_fresh("s", stage)
+    source.write_text("changed")
+    assert not reloaded.is_fresh("s", stage)
+    reloaded.record("s", stage)
+    output.unlink()
+    assert not reloaded.is_fresh("s", stage)
+
+def test_row_state_round_trip(tmp_path):
+    path = str(tmp_path / "reports.json")
+    state = RowState(path, "v1")
+    assert not state.is_current("h1")
+    state.updated("h2")
+    state.save()
+    again = RowState(path, "v1")
+    assert again.is_current("h2") and not again.is_current("h1")
+    assert not RowState(path, "v2").is_current("h2")
+
+def test_incremental_inject_matches_full_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(inject_report_logic, "print", lambda *a: None, raising=False)
+    (tmp_path / "full").mkdir()
+    full = _catalog(tmp_path / "full")
+    inject_report_logic.update_reports(full)
+    path = _catalog(tmp_path)
+    inject_report_logic.update_reports_incremental(path)
+    assert _load(path) == _load(full)
+
+    # Unchanged rows: the catalog is not rewritten.
+    mtime = os.stat(path).st_mtime_ns
+    inject_report_logic.update_reports_incremental(path)
+    assert os.stat(path).st_mtime_ns == mtime
+
+    # An edited row is re-inferred; the others keep their logic.
+    reports = _load(path)
+    reports[1]["formula"] = "SUM(Amount)"
+    reports[0]["logic"] = "stale"
+    with open(path, 'w') as f:
+        json.dump(reports, f, indent=4)
+    inject_report_logic.update_reports_incremental(path)
+    expected = [dict(r, logic=inject_report_logic.generate_logic(r)) for r in reports]
+    assert _load(path) == expected
+
+def test_incremental_generate_logic_matches_full_run(tmp_path, monkeypatch):
+    monkeypatch.setattr(generate_logic, "print", lambda *a: None, raising=False)
+    path = _catalog(tmp_path)
+    assert generate_logic.process_json(path, path) == len(REPORTS)
+    first = _load(path)
+    assert all(r["Layer"] and "logic" in r for r in first)
+    mtime = os.stat(path).st_mtime_ns
+    assert generate_logic.process_json(path, path) == 0
+    assert os.stat(path).st_mtime_ns == mtime
+    assert _load(path) == first
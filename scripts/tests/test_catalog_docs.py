@@ -0,0 +1,79 @@
+import csv
+import json
+
+import pytest
+
+import catalog_docs
+from catalog_docs import ARTIFACTS, generate_docs, report_facts
+from inject_report_logic import generate_logic
+
+REPORTS = [
+    {"id": "r1", "Report Title": "Total Spend by Vendor", "Category 1 (Detailed)": "Spend", "Module (Category 2)": "Analytics",
+     "benefit": "Shows | spend", "detailed_explanation": "per\nvendor", "formula": "SUM(Amount) grouped by Vendor",
+     "data_needed": "Tables: AP_INVOICES, VENDORS"},
+    {"id": "r2", "Report Title": "PO Aging", "Category 1 (Detailed)": "Orders", "Module (Category 2)": "Tracking",
+     "benefit": "Aging", "detailed_explanation": "of POs", "formula": "Date diff in buckets", "data_needed": "Tables: PURCHASE_ORDERS"},
+    {"id": "r3", "Report Title": "Requisitions by Status", "Category 1 (Detailed)": "Orders", "Module (Category 2)": "Analytics",
+     "benefit": "Status", "detailed_explanation": "mix", "formula": "COUNT(Requisitions) by Status", "data_needed": "Tables: REQUISITIONS"},
+    {"id": "r4", "Report Title": "Unmapped", "Category 1 (Detailed)": "Spend", "Module (Category 2)": "Analytics",
+     "benefit": "", "detailed_explanation": "", "formula": "", "data_needed": ""},
+]
+
+@pytest.fixture
+def catalog(tmp_path):
+    reports = [dict(r, logic=generate_logic(r)) if r["id"] != "r4" else dict(r) for r in REPORTS]
+    path = tmp_path / "reports.json"
+    path.write_text(json.dumps(reports, indent=4), encoding='utf-8')
+    return str(path), reports
+
+def _read(paths):
+    return {artifact: open(path, encoding='utf-8').read() for artifact, path in paths.items()}
+
+def test_one_pass_matches_single_artifact_runs(tmp_path, catalog, monkeypatch):
+    monkeypatch.setattr(catalog_docs, "print", lambda *a: None, raising=False)
+    path, _ = catalog
+    together = _read(generate_docs(path, "procurement", str(tmp_path / "all")))
+    assert set(together) == set(ARTIFACTS)
+    for artifact in ARTIFACTS:
+        alone = _read(generate_docs(path, "procurement", str(tmp_path / artifact), [artifact]))
+        assert alone == {artifact: together[artifact]}
+
+def test_streamed_catalog_matches_compact_file(tmp_path, catalog, monkeypatch):
+    monkeypatch.setattr(catalog_docs, "print", lambda *a: None, raising=False)
+    path, reports = catalog
+    compact = tmp_path / "compact.json"
+    compact.write_text(json.dumps(reports, separators=(',', ':')), encoding='utf-8')
+    assert _read(generate_docs(path, "procurement", str(tmp_path / "a"))) == \
+        _read(generate_docs(str(compact), "procurement", str(tmp_path / "b")))
+
+def test_artifact_contents(tmp_path, catalog, monkeypatch):
+    monkeypatch.setattr(catalog_docs, "print", lambda *a: None, raising=False)
+    path, reports = catalog
+    docs = _read(generate_docs(path, "procurement", str(tmp_path)))
+
+    wiki = docs["wiki"]
+    assert "## 3. Report Catalog (4 Reports)" in wiki
+    assert wiki.index("### 📂 Orders") < wiki.index("### 📂 Spend")
+    assert "| **Total Spend by Vendor** | Shows - spend per vendor |" in wiki
+
+    rows = list(csv.DictReader(docs["schema"].splitlines()))
+    assert [row["Report Title"] for row in rows] == [r["Report Title"] for r in reports]
+    for row, report in zip(rows, reports):
+        facts = report_facts(report)
+        expected = " OR ".join(facts["tables"]) if facts["tables"] else report["data_needed"]
+        assert row["Required Table(s)"] == expected
+
+    source_map = docs["map"].split("\n")
+    assert source_map[:3] == ["# Report Data Source Map", "| ID | Report Title | Complexity | Data Source(s) | Formula Logic |", "|---|---|---|---|---|"]
+    assert source_map[3] == "| r1 | Total Spend by Vendor | High (Multi-Table) | AP_INVOICES, VENDORS | SUM(Amount) grouped by Vendor |"
+    assert len(source_map) == 3 + len(reports)
+
+    assert docs["dictionary"].startswith("# Master Data Dictionary\nTo power all 4 reports")
+
+def test_empty_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog_docs, "print", lambda *a: None, raising=False)
+    path = tmp_path / "empty.json"
+    path.write_text("[]", encoding='utf-8')
+    docs = _read(generate_docs(str(path), "procurement", str(tmp_path)))
+    assert "Report Catalog (0 Reports)" in docs["wiki"]
+    assert docs["schema"].strip() == ",".join(catalog_docs.SchemaCsvWriter.FIELDS)
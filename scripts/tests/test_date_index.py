@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from date_index import DateIndex, buckets_disjoint
+from query_planner import explain
+from report_engine import Frame, date_diff_buckets, evaluate_report, run_processing
+
+AS_OF = '2024-12-30'
+
+BUCKETS = [
+    {"label": "Not due", "max_days": -1},
+    {"label": "0-30", "min_days": 0, "max_days": 30},
+    {"label": "31-90", "min_days": 31, "max_days": 90},
+    {"label": "91+", "min_days": 91},
+]
+
+def _dates_and_amounts(n=3000, seed=2):
+    rng = np.random.default_rng(seed)
+    dates = (np.datetime64('2024-01-01') + rng.integers(-100, 400, n).astype('timedelta64[D]')).astype('datetime64[D]')
+    dates[rng.random(n) < 0.05] = np.datetime64('NaT')
+    amounts = rng.integers(1, 500, n).astype(float)
+    amounts[rng.random(n) < 0.05] = np.nan
+    return dates, amounts
+
+def _reference(dates, amounts, buckets, as_of):
+    codes, _ = date_diff_buckets(dates, buckets, as_of)
+    counts = np.array([(codes == i).sum() for i in range(len(buckets))], dtype=float)
+    sums = np.array([np.nansum(amounts[codes == i]) for i in range(len(buckets))])
+    return counts, sums
+
+@pytest.mark.parametrize("as_of", ['2023-12-01', '2024-06-15', AS_OF, '2026-01-01'])
+def test_bucket_counts_and_sums_match_row_bucketing(as_of):
+    dates, amounts = _dates_and_amounts()
+    index = DateIndex(dates, {"amount": amounts})
+    counts, sums = _reference(dates, amounts, BUCKETS, as_of)
+    assert index.bucket_counts(BUCKETS, as_of).tolist() == counts.tolist()
+    assert index.bucket_sums(BUCKETS, as_of, "amount") == pytest.approx(sums)
+    assert len(index) == int((~np.isnat(dates)).sum())
+
+def test_history_matches_one_as_of_at_a_time():
+    dates, amounts = _dates_and_amounts()
+    index = DateIndex(dates, {"amount": amounts})
+    days = np.arange(np.datetime64('2024-01-01'), np.datetime64('2024-03-01'))
+    counts, sums = index.history(BUCKETS, days), index.history(BUCKETS, days, "amount")
+    assert counts.shape == sums.shape == (len(BUCKETS), len(days))
+    for j, day in enumerate(days):
+        expected_counts, expected_sums = _reference(dates, amounts, BUCKETS, day)
+        assert counts[:, j].tolist() == expected_counts.tolist()
+        assert sums[:, j] == pytest.approx(expected_sums)
+
+def test_buckets_disjoint():
+    assert buckets_disjoint(BUCKETS)
+    assert not buckets_disjoint([{"label": "a", "min_days": 0, "max_days": 30}, {"label": "b", "min_days": 30}])
+    assert not buckets_disjoint([{"label": "a"}, {"label": "b", "min_days": 5}])
+
+@pytest.mark.parametrize("operation", ["count", "sum", "avg"])
+@pytest.mark.parametrize("buckets", [BUCKETS, [{"label": "a", "min_days": 0, "max_days": 60}, {"label": "b", "min_days": 30}]])
+def test_aging_reports_match_unplanned_evaluation(operation, buckets):
+    dates, amounts = _dates_and_amounts()
+    frame = Frame({"due_date": dates, "invoice_amount": amounts})
+    aggregation = {"step": "aggregation", "operation": operation}
+    if operation != "count":
+        aggregation["column_ref"] = "invoice_amount"
+    logic = {"processing": [
+        {"step": "calculate_column", "name": "age", "operation": "date_diff_buckets",
+         "params": {"date_column_ref": "due_date", "buckets": buckets}},
+        {"step": "group_by", "group_column_ref": "age"}, aggregation]}
+    planned = evaluate_report(logic, frame, as_of=AS_OF)
+    expected = run_processing(logic["processing"], frame, None, AS_OF)
+    assert planned["categories"] == expected["categories"]
+    assert planned["values"] == pytest.approx(expected["values"], nan_ok=True)
+    # Overlapping buckets must not use the index: rows go to their first matching bucket.
+    assert ("DateIndex" in explain(logic, frame, None, AS_OF)) == buckets_disjoint(buckets)
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+import formula_compiler
+from formula_compiler import FormulaError, compile_formula, compiles
+from report_engine import Frame, ReportEngineError, evaluate_report, run_processing
+
+AS_OF = '2024-12-30'
+
+def _invoices():
+    return Frame({
+        "invoice_amount": np.array([10.0, 20.0, 5.0, 7.0, 3.0]),
+        "currency": np.array(["USD", "EUR", "USD", "SAR", "EUR"], dtype=object),
+        "match_status": np.array(["Matched", "Open", "Matched", "Open", "Open"], dtype=object),
+        "vendor_id": np.array([1, 1, 2, 9, 2]),
+        "invoice_date": np.array(["2024-12-01", "2024-11-01", "2024-12-20", "2024-10-01", "2024-12-29"], dtype="datetime64[D]"),
+        "due_date": np.array(["2024-12-31", "2024-12-01", "2025-01-19", "2024-10-31", "2025-01-28"], dtype="datetime64[D]"),
+    })
+
+def _logic(formula, extra=()):
+    return {"source": {"table_keywords": ["Invoices"]},
+            "processing": list(extra) + [{"step": "custom_formula", "formula_raw": formula}]}
+
+CASES = [
+    ("SUM(invoice_amount) where match_status = 'Matched'", (), {"value": 15.0}),
+    ("COUNT(Invoices) by currency", (), {"categories": ["EUR", "SAR", "USD"], "values": [2, 1, 2]}),
+    ("AVG(due_date - invoice_date)", (), {"value": 30.0}),
+    ("AVG(days since invoice_date) by currency", (), {"categories": ["EUR", "SAR", "USD"], "values": [30.0, 90.0, 19.5]}),
+    ("SUM(invoice_amount) / COUNT(*) grouped by currency", (), {"categories": ["EUR", "SAR", "USD"], "values": [11.5, 7.0, 7.5]}),
+    ("COUNT(DISTINCT vendor_id)", (), {"value": 3}),
+    ("match_status='Matched'", (), {"value": 2}),
+    ("(invoice_amount - 1) * 2", (), {"value": 80.0}),
+    ("MAX(invoice_amount) - MIN(invoice_amount)", (), {"value": 17.0}),
+    ("COUNT(*)", ({"step": "group_by", "group_column_ref": "currency"},), {"categories": ["EUR", "SAR", "USD"], "values": [2, 1, 2]}),
+]
+
+def _close(got, expected):
+    assert got.keys() == expected.keys()
+    if "categories" in expected:
+        assert got["categories"] == expected["categories"]
+        assert got["values"] == pytest.approx(expected["values"])
+    else:
+        assert got["value"] == pytest.approx(expected["value"])
+
+@pytest.mark.parametrize("formula,extra,expected", CASES)
+def test_planner_matches_run_processing_and_numpy(formula, extra, expected):
+    frame = _invoices()
+    logic = _logic(formula, extra)
+    planned = evaluate_report(logic, frame, None, AS_OF)
+    assert planned == run_processing(logic["processing"], frame, None, AS_OF)
+    _close(planned, expected)
+
+@pytest.mark.parametrize("formula", ["SUM(nope)", "SUM(Amount) of blocked invoices", "SUM(currency - invoice_date)"])
+def test_unexecutable_formulas_raise(formula):
+    frame = _invoices()
+    logic = _logic(formula)
+    with pytest.raises(ReportEngineError):
+        evaluate_report(logic, frame, None, AS_OF)
+    with pytest.raises(ReportEngineError):
+        run_processing(logic["processing"], frame, None, AS_OF)
+
+def test_compile_errors_are_raised_fresh_each_time():
+    raised = []
+    for _ in range(2):
+        with pytest.raises(FormulaError) as info:
+            compile_formula("SUM(Amount) of blocked invoices")
+        raised.append(info.value)
+    assert raised[0] is not raised[1]
+    assert str(raised[0]) == str(raised[1])
+    assert raised[1].__traceback__.tb_next is not None
+    assert not compiles("SUM(Amount) of blocked invoices")
+
+def test_compiled_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(formula_compiler, "MAX_COMPILED", 3)
+    monkeypatch.setattr(formula_compiler, "_compiled", formula_compiler.OrderedDict())
+    first = compile_formula("SUM(a)")
+    for name in ("b", "c", "d"):
+        compile_formula(f"SUM({name})")
+    assert len(formula_compiler._compiled) == 3
+    assert "SUM(a)" not in formula_compiler._compiled
+    compile_formula("SUM(c)")
+    compile_formula("SUM(e)")
+    assert list(formula_compiler._compiled) == ["SUM(d)", "SUM(c)", "SUM(e)"]
+    assert compile_formula("SUM(a)") is not first
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+
+from incremental_views import IncrementalView
+from report_engine import Frame, ReportEngineError, evaluate_report
+
+AS_OF = '2024-12-30'
+
+def _invoices(n=5000, seed=3):
+    rng = np.random.default_rng(seed)
+    return Frame({
+        "vendor_id": rng.integers(1, 40, n),
+        "currency": rng.choice(np.array(["USD", "EUR", "SAR"], dtype=object), n),
+        "invoice_amount": rng.integers(1, 1000, n).astype(float),
+        "due_date": np.datetime64('2024-01-01') + rng.integers(0, 365, n).astype('timedelta64[D]'),
+    })
+
+def _rows(frame, start, stop):
+    return Frame({c: v[start:stop] for c, v in frame.columns.items()}, frame.categories, n=stop - start)
+
+BUCKETS = {"date_column_ref": "due_date", "buckets": [
+    {"label": "0-30", "min_days": 0, "max_days": 30}, {"label": "31-90", "min_days": 31, "max_days": 90}, {"label": "91+", "min_days": 91}]}
+
+PROCESSING = [
+    [{"step": "aggregation", "operation": "sum", "column_ref": "invoice_amount"}],
+    [{"step": "aggregation", "operation": "count"}],
+    [{"step": "filter", "column_ref": "currency", "op": "eq", "value": "EUR"},
+     {"step": "aggregation", "operation": "avg", "column_ref": "invoice_amount"}],
+    [{"step": "group_by", "group_column_ref": "currency"}, {"step": "aggregation", "operation": "max", "column_ref": "invoice_amount"}],
+    [{"step": "group_by", "group_column_ref": "vendor_id", "aggregation": "sum", "value_column_ref": "invoice_amount"},
+     {"step": "sort", "direction": "desc"}, {"step": "limit", "count": 5}],
+    [{"step": "calculate_column", "name": "age", "operation": "date_diff_buckets", "params": BUCKETS},
+     {"step": "group_by", "group_column_ref": "age"}, {"step": "aggregation", "operation": "min", "column_ref": "invoice_amount"}],
+    [{"step": "filter", "column_ref": "due_date", "last_days": 90}, {"step": "group_by", "group_column_ref": "currency", "aggregation": "count"}],
+]
+
+def _close(got, expected):
+    assert got.keys() == expected.keys()
+    if "categories" in expected:
+        assert got["categories"] == expected["categories"]
+        assert got["values"] == pytest.approx(expected["values"])
+    else:
+        assert got["value"] == pytest.approx(expected["value"])
+
+@pytest.mark.parametrize("processing", PROCESSING)
+def test_appends_match_full_evaluation(processing):
+    frame = _invoices()
+    logic = {"processing": processing}
+    view = IncrementalView(logic, as_of=AS_OF)
+    view.rebuild(_rows(frame, 0, 2000))
+    _close(view.result(), evaluate_report(logic, _rows(frame, 0, 2000), as_of=AS_OF))
+    for start in range(2000, frame.n, 700):
+        view.append(_rows(frame, start, min(start + 700, frame.n)))
+    assert view.rows == frame.n
+    _close(view.result(), evaluate_report(logic, frame, as_of=AS_OF))
+
+@pytest.mark.parametrize("processing", PROCESSING)
+def test_merged_partitions_and_checkpoints_match(processing):
+    frame = _invoices()
+    logic = {"processing": processing}
+    parts = []
+    for start, stop in [(0, 1500), (1500, 1501), (1501, frame.n)]:
+        part = IncrementalView(logic, as_of=AS_OF)
+        part.rebuild(_rows(frame, start, stop))
+        restored = IncrementalView(logic, as_of=AS_OF)
+        restored.restore(json.loads(json.dumps(part.checkpoint())), frame)
+        parts.append(restored)
+    view = parts[0]
+    for part in parts[1:]:
+        view.merge(part)
+    _close(view.result(), evaluate_report(logic, frame, as_of=AS_OF))
+
+def test_staleness():
+    frame = _invoices()
+    logic = {"processing": PROCESSING[5]}
+    view = IncrementalView(logic, as_of=AS_OF)
+    with pytest.raises(ReportEngineError):
+        view.append(frame)
+    view.rebuild(frame)
+    view.set_as_of(AS_OF)
+    assert view.valid
+    view.set_as_of('2025-01-30') # aging buckets depend on the date
+    with pytest.raises(ReportEngineError):
+        view.result()
+    view.rebuild(frame)
+    _close(view.result(), evaluate_report(logic, frame, as_of='2025-01-30'))
+    view.invalidate()
+    with pytest.raises(ReportEngineError):
+        view.result()
+
+def test_rejects_pipelines_that_are_not_one_aggregation():
+    logic = {"processing": [{"step": "group_by", "group_column_ref": "currency", "aggregation": "count"},
+                            {"step": "filter", "column_ref": "currency", "op": "eq", "value": "EUR"}]}
+    with pytest.raises(ReportEngineError):
+        IncrementalView(logic, as_of=AS_OF).rebuild(_invoices())
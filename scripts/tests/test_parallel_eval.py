@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from parallel_eval import ReportPool
+from report_engine import Frame, evaluate_catalog, evaluate_report
+from result_cache import ResultCache
+
+AS_OF = '2024-12-30'
+
+def _tables():
+    rng = np.random.default_rng(5)
+    n = 300000
+    invoices = Frame({
+        "vendor_id": rng.integers(1, 60, n),
+        "currency": rng.choice(np.array(["USD", "EUR", "SAR"], dtype=object), n),
+        "invoice_amount": rng.integers(1, 1000, n).astype(float),
+        "due_date": np.datetime64('2024-01-01') + rng.integers(0, 365, n).astype('timedelta64[D]'),
+    })
+    vendors = Frame({"vendor_id": np.arange(1, 50), "country": np.array(["DE", "SA", "AE"] * 16 + ["DE"], dtype=object)})
+    invoices.version, vendors.version = "i1", "v1"
+    return {"PRC_Invoices": invoices, "PRC_Vendors": vendors}
+
+PROCESSING = [
+    [{"step": "group_by", "group_column_ref": "currency", "aggregation": "sum", "value_column_ref": "invoice_amount"}],
+    [{"step": "aggregation", "operation": "avg", "column_ref": "invoice_amount"}],
+    [{"step": "filter", "column_ref": "currency", "op": "eq", "value": "EUR"},
+     {"step": "group_by", "group_column_ref": "vendor_id", "aggregation": "count"},
+     {"step": "sort", "direction": "desc"}, {"step": "limit", "count": 5}],
+    [{"step": "calculate_column", "name": "age", "operation": "date_diff_buckets", "params": {
+        "date_column_ref": "due_date", "buckets": [{"label": "0-90", "min_days": 0, "max_days": 90}, {"label": "91+", "min_days": 91}]}},
+     {"step": "group_by", "group_column_ref": "age", "aggregation": "count"}],
+]
+
+def _catalog():
+    reports = [{"id": i, "logic": {"source": {"table_keywords": ["Invoices"]}, "processing": p}}
+               for i, p in enumerate(PROCESSING * 10)]
+    for how in ("left", "inner"):
+        reports.append({"id": how, "logic": {
+            "sources": [{"table_keywords": ["Invoices"]}, {"table_keywords": ["Vendors"]}],
+            "join": {"type": how, "on": "vendor_id"}, "processing": [{"step": "aggregation", "operation": "count"}]}})
+    reports.append({"id": "bad", "logic": {"sources": [None]}})
+    reports.append({"id": "nowhere", "logic": {"source": {"table_keywords": ["Nope"]}, "processing": []}})
+    return reports
+
+@pytest.fixture(scope="module")
+def pool_and_tables():
+    tables = _tables()
+    with ReportPool(tables, workers=2) as pool:
+        yield pool, tables
+
+@pytest.mark.parametrize("cached", [False, True])
+def test_pool_catalog_matches_serial(pool_and_tables, cached):
+    pool, tables = pool_and_tables
+    reports = _catalog()
+    expected = evaluate_catalog(reports, tables, as_of=AS_OF)
+    cache = ResultCache() if cached else None
+    assert pool.evaluate_catalog(reports, as_of=AS_OF, cache=cache) == expected
+    assert expected["bad"]["error"].startswith("Malformed logic")
+    if cached:
+        assert pool.evaluate_catalog(reports, as_of=AS_OF, cache=cache) == expected
+
+@pytest.mark.parametrize("processing", PROCESSING)
+def test_partitioned_report_matches_single(pool_and_tables, processing):
+    pool, tables = pool_and_tables
+    logic = {"source": {"table_keywords": ["Invoices"]}, "processing": processing}
+    expected = evaluate_report(logic, tables["PRC_Invoices"], as_of=AS_OF)
+    got = pool.evaluate_report(logic, as_of=AS_OF, partitions=3)
+    assert got.keys() == expected.keys()
+    if "categories" in expected:
+        assert got["categories"] == expected["categories"]
+        assert got["values"] == pytest.approx(expected["values"])
+    else:
+        assert got["value"] == pytest.approx(expected["value"])
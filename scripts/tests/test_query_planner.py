@@ -0,0 +1,89 @@
+import csv
+import datetime
+import random
+
+import numpy as np
+import pytest
+
+from column_store import convert_csv, open_table
+from query_planner import TopK
+from report_engine import Series, evaluate_report, load_csv_table, order_series, run_processing
+
+AS_OF = '2024-12-30'
+BUCKETS = [{"label": "0-30", "min_days": 0, "max_days": 30}, {"label": "31+", "min_days": 31}]
+AGE = {"step": "calculate_column", "name": "age", "operation": "date_diff_buckets",
+       "params": {"date_column_ref": "due_date", "buckets": BUCKETS}}
+
+CASES = [
+    [{"step": "filter", "column_ref": "order_date", "last_days": 30}, {"step": "group_by", "group_column_ref": "status"},
+     {"step": "aggregation", "operation": "count"}],
+    [{"step": "filter", "column_ref": "region", "op": "eq", "value": "north"},
+     {"step": "group_by", "group_column_ref": "status", "aggregation": "count"}],
+    [{"step": "filter", "column_ref": "region", "op": "in", "value": ["north", "west"]},
+     {"step": "filter", "column_ref": "order_date", "op": "between", "value": ["2023-01-01", "2023-03-31"]},
+     {"step": "aggregation", "operation": "count"}],
+    [{"step": "filter", "column_ref": "status", "op": "ne", "value": "Open"}, AGE,
+     {"step": "group_by", "group_column_ref": "age", "aggregation": "count"}],
+    [AGE, {"step": "filter", "column_ref": "age", "op": "eq", "value": "31+"},
+     {"step": "group_by", "group_column_ref": "region", "aggregation": "count"}],
+    [{"step": "group_by", "group_column_ref": "region", "aggregation": "sum", "value_column_ref": "amount"},
+     {"step": "sort", "direction": "asc"}, {"step": "limit", "count": 3}],
+    # Every tier has the same count: top-k must break the ties like sort + limit.
+    [{"step": "group_by", "group_column_ref": "tier", "aggregation": "count"},
+     {"step": "sort", "direction": "desc"}, {"step": "limit", "count": 2}],
+    [{"step": "aggregation", "operation": "avg", "column_ref": "amount"}],
+    [{"step": "group_by", "group_column_ref": "status", "aggregation": "count_distinct", "value_column_ref": "region"}],
+    [{"step": "custom_formula", "formula_raw": "SUM(amount) where status = 'Open'"}],
+    [{"step": "custom_formula", "formula_raw": "SUM(amount) / COUNT(*) grouped by region"}],
+]
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    root = tmp_path_factory.mktemp("orders")
+    path = root / "orders.csv"
+    rng = random.Random(7)
+    start = datetime.date(2020, 1, 1)
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(["order_id", "region", "status", "tier", "amount", "order_date", "due_date"])
+        for i in range(20000):
+            d = start + datetime.timedelta(days=i * 1826 // 20000)
+            w.writerow([f"O{i}", rng.choice(["north", "south", "east", "west"]), rng.choice(["Open", "Closed", "Held"]),
+                        f"t{i % 4}", rng.randint(1, 500), d.isoformat(), (d + datetime.timedelta(rng.randint(1, 90))).isoformat()])
+    convert_csv(str(path), str(root / "table"))
+    return load_csv_table(str(path)), open_table(str(root / "table"))
+
+def _same(a, b):
+    assert a.keys() == b.keys()
+    if "categories" in a:
+        assert a["categories"] == b["categories"]
+        assert a["values"] == pytest.approx(b["values"])
+    else:
+        assert a["value"] == pytest.approx(b["value"])
+
+@pytest.mark.parametrize("processing", CASES)
+def test_planner_matches_interpreter(tables, processing):
+    memory, mapped = tables
+    expected = run_processing(processing, memory, as_of=AS_OF)
+    _same(evaluate_report({"processing": processing}, memory, as_of=AS_OF), expected)
+    _same(evaluate_report({"processing": processing}, mapped, as_of=AS_OF), expected)
+
+def test_topk_matches_order_series_on_ties_and_nans():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        n = int(rng.integers(1, 30))
+        values = rng.integers(0, 4, n).astype(float)
+        values[rng.random(n) < 0.2] = np.nan
+        series = Series(np.array([f"l{i}" for i in rng.integers(0, 5, n)], dtype=object), values)
+        for direction in ('asc', 'desc'):
+            for by in ('value', 'label'):
+                ordered = order_series(series, direction, by)
+                for k in (1, 3, n):
+                    _, top = TopK(k, direction, by).execute(None, series)
+                    assert top.labels.tolist() == ordered.labels[:k].tolist()
+                    np.testing.assert_array_equal(top.values, ordered.values[:k])
+
+def test_order_series_is_stable_with_nans_last():
+    series = Series(np.array(list("abcde"), dtype=object), np.array([1.0, np.nan, 2.0, 1.0, 2.0]))
+    assert order_series(series, 'desc').labels.tolist() == ['c', 'e', 'a', 'd', 'b']
+    assert order_series(series, 'asc').labels.tolist() == ['a', 'd', 'c', 'e', 'b']
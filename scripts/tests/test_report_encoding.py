@@ -0,0 +1,52 @@
+import codecs
+
+import pytest
+
+from report_encoding import detect_encoding, iter_clean_lines, sniff_encoding
+
+TEXT = "Report Title,Formula\r\nDéjà vu – “quoted”,SUM(x)\r\nline\rwith\0nul,€ 5\n\nlast"
+
+def _old_lines(path, encoding):
+    # What the ingest did before streaming: decode the whole file, strip NULs, normalise newlines.
+    with open(path, 'rb') as f:
+        text = f.read().decode(encoding, errors='replace')
+    text = text.replace('\0', '').replace('\r\n', '\n').replace('\r', '\n')
+    return text.splitlines(keepends=True)
+
+def _write(tmp_path, data):
+    path = tmp_path / "reports.csv"
+    path.write_bytes(data)
+    return path
+
+@pytest.mark.parametrize("encoding,data", [
+    ('utf-8', TEXT.encode('utf-8')),
+    ('utf-8-sig', codecs.BOM_UTF8 + TEXT.encode('utf-8')),
+    ('utf-16', TEXT.encode('utf-16')),
+    ('utf-16-le', TEXT.encode('utf-16-le')),
+    ('utf-16-be', TEXT.encode('utf-16-be')),
+    ('cp1252', TEXT.encode('cp1252')),
+])
+def test_detects_encoding(tmp_path, encoding, data):
+    assert detect_encoding(_write(tmp_path, data)) == encoding
+
+def test_cp1252_is_not_mistaken_for_latin1():
+    # 0x93 / 0x94 are curly quotes in cp1252 and C1 controls in latin-1.
+    assert sniff_encoding("“quoted” – 5 €".encode('cp1252')) == 'cp1252'
+    assert sniff_encoding(b'\x81\x8d\x8f') == 'latin-1'
+
+def test_marker_falls_back_to_trial_order(tmp_path):
+    assert detect_encoding(_write(tmp_path, b"no marker here")) is None
+    assert detect_encoding(_write(tmp_path, b"no marker here"), marker=None) == 'utf-8'
+
+@pytest.mark.parametrize("encoding", ['utf-8', 'utf-8-sig', 'utf-16', 'utf-16-le', 'cp1252', 'latin-1'])
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 1 << 20])
+def test_streamed_lines_match_whole_file_decode(tmp_path, encoding, chunk_size):
+    text = TEXT if encoding != 'latin-1' else TEXT.replace('–', '-').replace('“', '"').replace('”', '"').replace('€', 'E')
+    path = _write(tmp_path, (text * 3).encode(encoding))
+    assert list(iter_clean_lines(path, encoding, chunk_size)) == _old_lines(path, encoding)
+
+@pytest.mark.parametrize("data", [b"", b"a\r", b"\r\n", b"a\r\r\nb", b"\xff\xfe"])
+def test_edge_cases_match_whole_file_decode(tmp_path, data):
+    path = _write(tmp_path, data)
+    for chunk_size in (1, 2, 1024):
+        assert list(iter_clean_lines(path, 'utf-8', chunk_size)) == _old_lines(path, 'utf-8')
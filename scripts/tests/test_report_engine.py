@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from report_engine import Frame, bind_frame, evaluate_catalog, evaluate_report
+from result_cache import ResultCache
+
+AS_OF = '2024-12-30'
+
+def _tables():
+    invoices = Frame({
+        "vendor_id": np.array([1, 1, 2, 9]),
+        "invoice_amount": np.array([10.0, 20.0, 5.0, 7.0]),
+        "currency": np.array(["USD", "EUR", "USD", "SAR"], dtype=object),
+    })
+    vendors = Frame({"vendor_id": np.array([1, 2]), "country": np.array(["DE", "SA"], dtype=object)})
+    invoices.version, vendors.version = "i1", "v1"
+    return {"PRC_Invoices": invoices, "PRC_Vendors": vendors}
+
+def _joined(report_id, how):
+    return {"id": report_id, "logic": {
+        "sources": [{"table_keywords": ["Invoices"]}, {"table_keywords": ["Vendors"]}],
+        "join": {"type": how, "on": "vendor_id"},
+        "processing": [{"step": "aggregation", "operation": "count"}],
+    }}
+
+SINGLE = [
+    {"id": "sum", "logic": {"source": {"table_keywords": ["Invoices"]}, "processing": [
+        {"step": "group_by", "group_column_ref": "currency", "aggregation": "sum", "value_column_ref": "invoice_amount"}]}},
+    {"id": "count", "logic": {"source": {"table_keywords": ["Invoices"]}, "processing": [
+        {"step": "group_by", "group_column_ref": "currency"}, {"step": "aggregation", "operation": "count"}]}},
+    {"id": "top", "logic": {"source": {"table_keywords": ["Invoices"]}, "processing": [
+        {"step": "group_by", "group_column_ref": "currency", "aggregation": "sum", "value_column_ref": "invoice_amount"},
+        {"step": "sort", "direction": "desc"}, {"step": "limit", "count": 2}]}},
+]
+
+def _single(report, tables):
+    return evaluate_report(report["logic"], bind_frame(report["logic"], tables), as_of=AS_OF)
+
+@pytest.mark.parametrize("order", [("inner", "left"), ("left", "inner")])
+@pytest.mark.parametrize("cached", [False, True])
+def test_batch_matches_single_with_mixed_joins(order, cached):
+    tables = _tables()
+    reports = [_joined(how, how) for how in order] + SINGLE
+    cache = ResultCache() if cached else None
+    results = evaluate_catalog(reports, tables, as_of=AS_OF, cache=cache)
+    assert results["inner"] == {"value": 3}
+    assert results["left"] == {"value": 4}
+    for report in reports:
+        assert results[report["id"]] == _single(report, tables)
+    if cached:
+        # Served from the cache, the results must still be the per-report ones.
+        assert evaluate_catalog(reports, tables, as_of=AS_OF, cache=cache) == results
+
+def test_malformed_report_does_not_fail_the_batch():
+    tables = _tables()
+    bad = {"id": "bad", "logic": {"sources": [None]}}
+    results = evaluate_catalog([bad] + SINGLE, tables, as_of=AS_OF)
+    assert results["bad"]["error"].startswith("Malformed logic")
+    assert results["sum"] == _single(SINGLE[0], tables)
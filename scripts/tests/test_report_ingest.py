@@ -0,0 +1,43 @@
+import csv
+import io
+import json
+
+import pytest
+
+from report_ingest import REPORT_FIELDS, JsonArrayWriter, ingest_csv, map_row
+
+ROWS = [
+    {"id": "r1", "Report Title": "Spend by Vendor", "formula": "SUM(amount) / COUNT(*)", "logic": ""},
+    {"id": "r2", "Report Title": "Déjà vu – “quoted”, comma", "nested": {"a": [1, 2.5, None, True]}, "empty": []},
+    {},
+]
+
+@pytest.mark.parametrize("rows", [[], [{}], ROWS])
+def test_json_array_writer_matches_json_dump(rows):
+    out = io.StringIO()
+    writer = JsonArrayWriter(out)
+    for row in rows:
+        writer.write(row)
+    writer.close()
+    expected = io.StringIO()
+    json.dump(rows, expected, indent=4)
+    assert out.getvalue() == expected.getvalue()
+    assert writer.count == len(rows)
+
+def test_ingest_csv_matches_json_dump(tmp_path):
+    csv_path = tmp_path / "reports.csv"
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(["Report Title", "layer", "formula", "data_needed"])
+        w.writerow(["Invoice Aging", "Tactical", "COUNT(invoice_id) grouped by buckets", "Tables: Invoices"])
+        w.writerow(["", "Strategic", "", ""])  # no title: skipped
+        w.writerow(["Spend “Trend”, monthly", "", "SUM(amount)", "Tables: Invoices, POs"])
+    out_path = tmp_path / "reports.json"
+
+    assert ingest_csv(str(csv_path), str(out_path), id_prefix="t") == 2
+
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        rows = [row for row in csv.DictReader(f)]
+    expected = [map_row(row, i + 1, "t", REPORT_FIELDS) for i, row in enumerate(rows) if row["Report Title"]]
+    assert out_path.read_text(encoding='utf-8') == json.dumps(expected, indent=4)
+    assert not (tmp_path / "reports.json.tmp").exists()
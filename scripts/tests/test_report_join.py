@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from report_engine import Frame, ReportEngineError
+from report_join import hash_join_indices, infer_join_key, join_indices, sort_merge_indices
+
+def _pairs(left_idx, right_idx):
+    return sorted(zip(left_idx.tolist(), right_idx.tolist()))
+
+@pytest.mark.parametrize("kind", ["int", "str"])
+def test_hash_join_matches_sort_merge(kind):
+    rng = np.random.default_rng(3)
+    for _ in range(50):
+        left = rng.integers(0, 40, int(rng.integers(0, 200)))
+        right = rng.integers(0, 40, int(rng.integers(0, 200)))
+        if kind == "str":
+            left, right = left.astype(str), right.astype(str)
+        expected = _pairs(*sort_merge_indices(left, right))
+        probe_left = hash_join_indices(right, left)
+        build_left = hash_join_indices(left, right)[::-1]
+        assert _pairs(*probe_left) == expected
+        assert _pairs(*build_left) == expected
+
+def test_left_join_keeps_unmatched_rows():
+    left_idx, right_idx = join_indices(np.array([1, 2, 3, 2]), np.array([2, 2, 5]), how='left')
+    assert _pairs(left_idx, right_idx) == [(0, -1), (1, 0), (1, 1), (2, -1), (3, 0), (3, 1)]
+
+def test_infer_join_key_needs_a_unique_side():
+    orders = Frame({"po_id": np.array([1, 1, 2]), "vendor_id": np.array([5, 5, 6])})
+    headers = Frame({"po_id": np.array([1, 2]), "vendor_id": np.array([5, 5])})
+    assert infer_join_key("A", "B", orders, headers) == "po_id"
+    with pytest.raises(ReportEngineError):
+        infer_join_key("A", "B", Frame({"vendor_id": np.array([5, 5])}), Frame({"vendor_id": np.array([5, 6, 6])}))
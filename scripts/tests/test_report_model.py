@@ -0,0 +1,46 @@
+import io
+import json
+import pickle
+
+import pytest
+
+from report_model import Report, dump_catalog, iter_json_array, load_catalog
+
+ROWS = [
+    {"id": "r1", "Layer": "Strategic", "Report Title": "Spend Trend", "Chart Type (ECharts)": "Line Chart",
+     "formula": "SUM(Amount)", "logic": {"source": {"table_keywords": ["Invoices"]}, "processing": [{"step": "sort"}]}},
+    {"Report Title": "No id, null logic", "logic": None, "custom key": {"nested": [1, "é"]}},
+    {"id": "r3", "logic": "", "Category 1 (Detailed)": "Spend"},
+    {},
+]
+
+@pytest.mark.parametrize("rows", [[], ROWS])
+def test_round_trip_matches_json_dump(tmp_path, rows):
+    src, out = tmp_path / "in.json", tmp_path / "out.json"
+    with open(src, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, indent=4)
+    reports = load_catalog(str(src))
+    assert [r.to_dict() for r in reports] == rows
+    dump_catalog(reports, str(out))
+    assert out.read_text(encoding='utf-8') == src.read_text(encoding='utf-8')
+
+def test_iter_json_array_small_chunks():
+    text = json.dumps(ROWS, indent=4)
+    assert list(iter_json_array(io.StringIO(text), chunk_size=5)) == ROWS
+
+def test_report_behaves_like_its_dict():
+    report = Report.from_dict(ROWS[0])
+    assert report["Report Title"] == "Spend Trend" and report.title == "Spend Trend"
+    assert report.get("benefit", "n/a") == "n/a" and "benefit" not in report
+    assert report.category is None
+    with pytest.raises(KeyError):
+        report["benefit"]
+    report["logic"]["processing"].append({"step": "limit", "count": 5})
+    report.release_logic()
+    assert report.to_dict()["logic"]["processing"][-1] == {"step": "limit", "count": 5}
+
+def test_pickle_keeps_fields_and_order():
+    report = Report.from_dict(ROWS[1])
+    copy = pickle.loads(pickle.dumps(report))
+    assert copy.keys() == report.keys()
+    assert copy.to_dict() == ROWS[1]
@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+import pytest
+
+import report_preview
+from report_engine import Frame, evaluate_report
+from report_preview import preview_and_refine, preview_report
+
+AS_OF = '2024-12-30'
+
+def _invoices(n=200000):
+    rng = np.random.default_rng(11)
+    return Frame({
+        "vendor_id": rng.integers(1, 5000, n),
+        "currency": rng.choice(np.array(["USD", "EUR", "SAR", "AED"], dtype=object), n, p=[0.5, 0.3, 0.15, 0.05]),
+        "invoice_amount": rng.gamma(2.0, 250.0, n),
+        "due_date": np.datetime64('2024-01-01') + rng.integers(0, 365, n).astype('timedelta64[D]'),
+    })
+
+INTERVAL_CASES = [
+    [{"step": "aggregation", "operation": "sum", "column_ref": "invoice_amount"}],
+    [{"step": "filter", "column_ref": "currency", "op": "eq", "value": "EUR"},
+     {"step": "aggregation", "operation": "avg", "column_ref": "invoice_amount"}],
+    [{"step": "group_by", "group_column_ref": "currency"}, {"step": "aggregation", "operation": "sum", "column_ref": "invoice_amount"}],
+    [{"step": "group_by", "group_column_ref": "currency", "aggregation": "count"}],
+    [{"step": "calculate_column", "name": "age", "operation": "date_diff_buckets", "params": {
+        "date_column_ref": "due_date", "buckets": [{"label": "0-90", "min_days": 0, "max_days": 90}, {"label": "91+", "min_days": 91}]}},
+     {"step": "group_by", "group_column_ref": "age"}, {"step": "aggregation", "operation": "avg", "column_ref": "invoice_amount"}],
+]
+
+@pytest.fixture(scope="module")
+def invoices():
+    return _invoices()
+
+def _covered(preview, exact):
+    if "categories" not in exact:
+        return [preview["lower"] <= exact["value"] <= preview["upper"]]
+    assert sorted(preview["categories"]) == sorted(exact["categories"])
+    truth = dict(zip(exact["categories"], exact["values"]))
+    return [low <= truth[label] <= high for label, low, high in zip(preview["categories"], preview["lower"], preview["upper"])]
+
+@pytest.mark.parametrize("processing", INTERVAL_CASES)
+def test_intervals_cover_the_exact_result(invoices, processing):
+    logic = {"processing": processing}
+    exact = evaluate_report(logic, invoices, as_of=AS_OF)
+    preview = preview_report(logic, invoices, as_of=AS_OF, confidence=0.99)
+    assert preview["sampled"] and preview["sample_rows"] < invoices.n
+    assert all(_covered(preview, exact))
+
+@pytest.mark.parametrize("processing", INTERVAL_CASES)
+def test_interval_coverage_over_samples(processing):
+    frame = _invoices(100000)
+    logic = {"processing": processing}
+    exact = evaluate_report(logic, frame, as_of=AS_OF)
+    covered = []
+    for seed in range(30):
+        for key in [k for k in frame.indexes if k[0] == 'sample']:
+            del frame.indexes[key]
+        report_preview.table_sample(frame, None, seed=seed)
+        report_preview.table_sample(frame, "currency", seed=seed)
+        covered += _covered(preview_report(logic, frame, as_of=AS_OF), exact)
+    assert np.mean(covered) >= 0.85
+
+def test_small_tables_are_exact():
+    frame = Frame({"a": np.array(["x", "y", "x"], dtype=object)})
+    logic = {"processing": [{"step": "group_by", "group_column_ref": "a", "aggregation": "count"}]}
+    preview = preview_report(logic, frame, as_of=AS_OF)
+    exact = evaluate_report(logic, frame, as_of=AS_OF)
+    assert not preview["sampled"]
+    assert preview["values"] == preview["lower"] == preview["upper"] == exact["values"]
+
+def test_count_distinct_is_a_lower_bound(invoices):
+    logic = {"processing": [{"step": "aggregation", "operation": "count_distinct", "column_ref": "vendor_id"}]}
+    preview = preview_report(logic, invoices, as_of=AS_OF)
+    assert preview["lower_bound"] and preview["upper"] is None
+    assert preview["value"] <= evaluate_report(logic, invoices, as_of=AS_OF)["value"]
+
+def test_refine_passes_the_exact_result(invoices):
+    logic = {"processing": INTERVAL_CASES[2]}
+    done, received = threading.Event(), []
+    preview, future = preview_and_refine(logic, invoices, lambda data: (received.append(data), done.set()), as_of=AS_OF)
+    assert preview["sampled"]
+    assert future.result() == evaluate_report(logic, invoices, as_of=AS_OF)
+    assert done.wait(5) and received == [future.result()]
+
+def test_refine_reports_malformed_logic_errors(invoices, monkeypatch):
+    # The sampled preview does not go through evaluate_report for a plain sum; make the exact run fail.
+    def broken(*args):
+        raise KeyError('column_ref')
+    logic = {"processing": INTERVAL_CASES[0]}
+    preview = preview_report(logic, invoices, as_of=AS_OF)
+    monkeypatch.setattr(report_preview, "evaluate_report", broken)
+    received = []
+    _, future = preview_and_refine(logic, invoices, received.append, as_of=AS_OF)
+    assert future.result() == received[0]
+    assert received[0]["error"].startswith("Malformed logic (KeyError")
+    assert preview["sampled"]
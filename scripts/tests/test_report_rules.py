@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from report_rules import classify
+
+# The if/any() chains the rule table replaced, kept as the reference semantics.
+
+def chart_type(title):
+    t = title.lower()
+    if any(x in t for x in ['trend', 'history', 'over time', 'monthly', 'weekly', 'daily', 'timeline']):
+        return 'Line Chart'
+    if any(x in t for x in ['breakdown', 'distribution', 'by category', 'by status', 'share', 'composition']):
+        return 'Pie Chart'
+    if any(x in t for x in ['top', 'best', 'worst', 'highest', 'lowest', 'ranking', 'performance']):
+        return 'Bar Chart'
+    if any(x in t for x in ['utilization', 'completion', 'rate', 'percentage', 'score', 'kpi']):
+        return 'Gauge Chart'
+    return 'Table'
+
+def layer(title, category, module):
+    text = (title + " " + category + " " + module).lower()
+    if any(x in text for x in ['strategic', 'executive', 'financial', 'spend', 'cost', 'profit', 'global', 'kpi']):
+        return 'Strategic'
+    if any(x in text for x in ['planning', 'forecast', 'optimization', 'analysis', 'performance', 'trend', 'history']):
+        return 'Tactical'
+    if any(x in text for x in ['daily', 'log', 'list', 'status', 'tracking', 'real-time', 'execution', 'operational', 'inventory', 'shipment']):
+        return 'Operational'
+    return 'General'
+
+def department(table):
+    t = table.upper()
+    if any(x in t for x in ['INVOICE', 'PAYMENT', 'GL_', 'BUDGET', 'FINANCE', 'AP_', 'AR_']):
+        return 'finance'
+    if any(x in t for x in ['PO', 'PURCHASE', 'SPEND', 'SOURCING', 'CONTRACT', 'VENDOR', 'SUPPLIER', 'REQUISITION']):
+        return 'supply-chain/procurement'
+    if any(x in t for x in ['INVENTORY', 'STOCK', 'WAREHOUSE']):
+        return 'supply-chain/warehouse'
+    return 'supply-chain/procurement'
+
+def master_table(table):
+    t = table.upper()
+    if any(k in t for k in ['INVOICE', 'SPEND', 'PAYMENT', 'AP_']):
+        return "FINANCE_AP_INVOICES"
+    if any(k in t for k in ['PO', 'PURCHASE', 'ORDER']):
+        return "PROCUREMENT_PURCHASE_ORDERS"
+    if any(k in t for k in ['VENDOR', 'SUPPLIER']):
+        return "PROCUREMENT_VENDORS"
+    if any(k in t for k in ['REQ', 'REQUEST']):
+        return "PROCUREMENT_REQUISITIONS"
+    if any(k in t for k in ['CONTRACT']):
+        return "PROCUREMENT_CONTRACTS"
+    return None
+
+WORDS = [
+    'Trend', 'monthly', 'Breakdown', 'by Status', 'by category', 'Top', 'Performance', 'rate', 'KPI', 'List',
+    'Summary', 'Spend', 'Cost', 'Forecast', 'Analysis', 'History', 'Daily', 'Log', 'Tracking', 'Inventory',
+    'Vendor', 'Supplier', 'Department', 'Status', 'Aging', 'Invoice', 'Purchase', 'Order', 'Requisition',
+    'Contract', 'Stock', 'GL_', 'AP_', 'request', 'Count', 'Sum', 'Date', 'Amount', 'report', 'over time', 'x',
+]
+
+def _text(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 5)))
+
+def test_classifiers_match_reference_heuristics():
+    rng = random.Random(11)
+    for _ in range(5000):
+        title, category, module, table, formula = (_text(rng) for _ in range(5))
+        result = classify({"title": title, "category": category, "module": module, "table": table, "formula": formula})
+        assert result["chart_type"] == chart_type(title)
+        assert result["layer"] == layer(title, category, module)
+        assert result["department"] == department(table)
+        assert result["master_table"] == master_table(table)
+        tags = result["tags"]
+        assert ("counts_ids" in tags) == ("Count" in formula)
+        assert ("sums_amounts" in tags) == ("Sum" in formula)
+        assert ("dated" in tags) == ("Date" in formula or "aging" in title.lower())
+        for tag, word in (("status", "Status"), ("department", "Department"), ("supplier", "Supplier")):
+            assert (tag in tags) == (word in title)
+
+# What inject_report_logic, the wiki, the schema CSV and the source map tested before the rule table.
+TAG_REFERENCE = {
+    "aging_buckets": lambda title, formula: "grouped by buckets" in formula or "aging" in title.lower(),
+    "count": lambda title, formula: "COUNT" in formula,
+    "sum": lambda title, formula: "SUM" in formula or "Total Spend" in title,
+    "grouped": lambda title, formula: "grouped by" in formula or "by Status" in title or "by Category" in title,
+    "spend": lambda title, formula: "Spend" in title,
+    "vendor": lambda title, formula: "Vendor" in title,
+    "amount": lambda title, formula: "Amount" in formula,
+    "category": lambda title, formula: "Category" in title,
+    "bucketing": lambda title, formula: "grouped by" in formula or "buckets" in formula,
+    "calculation": lambda title, formula: "/" in formula or "+" in formula or "-" in formula,
+}
+
+TAG_WORDS = WORDS + [
+    'COUNT', 'SUM', 'Total Spend', 'by Category', 'Category', 'grouped by', 'grouped by buckets', 'buckets',
+    'A / B', 'X + Y', 'Amount - Tax', 'AGING',
+]
+
+def test_logic_and_docs_tags_match_reference_heuristics():
+    rng = random.Random(12)
+    for _ in range(5000):
+        title, formula = (" ".join(rng.choice(TAG_WORDS) for _ in range(rng.randint(0, 5))) for _ in range(2))
+        tags = classify({"title": title, "formula": formula})["tags"]
+        for tag, reference in TAG_REFERENCE.items():
+            assert (tag in tags) == reference(title, formula), (tag, title, formula)
+
+@pytest.mark.parametrize("missing", ["title", "table"])
+def test_missing_fields_fall_back_to_defaults(missing):
+    values = {"title": "", "table": ""}
+    del values[missing]
+    result = classify(values)
+    assert result["chart_type"] == "Table"
+    assert result["department"] == "supply-chain/procurement"
+    assert result["master_table"] is None
@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from report_engine import Frame, evaluate_report
+from report_service import ReportService
+
+AS_OF = '2024-12-30'
+LOGIC = {"source": {"table_keywords": ["Invoices"]}, "processing": [
+    {"step": "group_by", "group_column_ref": "currency", "aggregation": "sum", "value_column_ref": "invoice_amount"}]}
+
+@pytest.fixture
+def service():
+    invoices = Frame({
+        "currency": np.array(["USD", "EUR", "USD", "SAR"] * 50, dtype=object),
+        "invoice_amount": np.arange(200, dtype=float),
+    })
+    invoices.version = "v1"
+    svc = ReportService({"PRC_Invoices": invoices}, [{"id": "r1", "logic": LOGIC}], workers=1)
+    yield svc
+    svc.close()
+
+def _post(svc, payload):
+    return svc.route('POST', '/reports/data', json.dumps(payload).encode())
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 30))
+
+def test_service_matches_evaluate_report(service):
+    status, data = _run(service.route('GET', f'/reports/r1/data?as_of={AS_OF}', b''))
+    assert status == 200
+    assert data == evaluate_report(LOGIC, service.tables["PRC_Invoices"], as_of=AS_OF)
+
+def test_concurrent_requests_share_one_computation(service):
+    async def both():
+        return await asyncio.gather(*(service.evaluate([{"id": i, "logic": LOGIC}], AS_OF) for i in range(5)))
+    results = _run(both())
+    assert all(r == {i: results[0][0]} for i, r in enumerate(results))
+    assert service.stats["computed"] == 1 and service.stats["coalesced"] == 4
+    assert not service.inflight and not service.tasks
+
+def test_malformed_report_fails_alone_and_leaves_nothing_inflight(service):
+    status, data = _run(_post(service, {"as_of": AS_OF, "reports": [
+        {"id": "ok", "logic": LOGIC}, {"id": "bad", "logic": {"sources": [None]}}]}))
+    assert status == 200
+    assert data["results"]["bad"]["error"].startswith("Malformed logic")
+    assert data["results"]["ok"] == evaluate_report(LOGIC, service.tables["PRC_Invoices"], as_of=AS_OF)
+    assert not service.inflight
+
+def test_failed_batch_does_not_orphan_futures(service):
+    class BrokenCache:
+        # Fails on the second report, after the first one has put its future in `inflight`.
+        def __init__(self):
+            self.calls = 0
+        def get(self, key):
+            self.calls += 1
+            if self.calls > 1:
+                raise RuntimeError("cache down")
+    other = dict(LOGIC, processing=[{"step": "aggregation", "operation": "count"}])
+    cache, service.cache = service.cache, BrokenCache()
+    with pytest.raises(RuntimeError):
+        _run(service.evaluate([{"id": "ok", "logic": LOGIC}, {"id": "other", "logic": other}], AS_OF))
+    assert not service.inflight
+    service.cache = cache
+    # A later request for the same report must compute, not wait on a leftover future.
+    assert "error" not in _run(service.evaluate([{"id": "ok", "logic": LOGIC}], AS_OF))["ok"]
+
+def test_compute_failure_reaches_every_waiter(service):
+    class FailingCache(type(service.cache)):
+        def put(self, *args):
+            raise RuntimeError("cache broke")
+    service.cache = FailingCache()
+    async def both():
+        return await asyncio.gather(*(service.evaluate([{"id": i, "logic": LOGIC}], AS_OF) for i in range(2)))
+    for result in _run(both()):
+        assert all(value == {"error": "Evaluation failed: cache broke"} for value in result.values())
+    assert not service.inflight and not service.tasks
+
+@pytest.mark.parametrize("payload", [[1, 2], {"reports": ["r1"]}])
+def test_bad_bodies_are_rejected(service, payload):
+    assert _run(_post(service, payload))[0] == 400
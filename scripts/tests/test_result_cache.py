@@ -0,0 +1,71 @@
+import numpy as np
+
+from report_engine import Frame, evaluate_catalog
+from result_cache import ResultCache, result_key
+
+AS_OF = '2024-12-30'
+LOGIC = {"source": {"table_keywords": ["Invoices"]}, "processing": [{"step": "aggregation", "operation": "count"}]}
+
+def test_key_is_canonical_and_versioned():
+    base = result_key(LOGIC, {"PRC_Invoices": "v1"}, {"a": "x"}, AS_OF)
+    reordered = {"processing": LOGIC["processing"], "source": LOGIC["source"]}
+    assert result_key(reordered, {"PRC_Invoices": "v1"}, {"a": "x"}, AS_OF) == base
+    assert result_key(LOGIC, {"PRC_Invoices": "v2"}, {"a": "x"}, AS_OF) != base
+    assert result_key(LOGIC, {"PRC_Invoices": "v1"}, {"a": "y"}, AS_OF) != base
+    assert result_key(LOGIC, {"PRC_Invoices": "v1"}, {"a": "x"}, '2024-12-31') != base
+    assert result_key(LOGIC, {"PRC_Invoices": "v1"}, {"a": "x"}, AS_OF, 'approximate') != base
+
+def test_lru_respects_byte_budget():
+    cache = ResultCache(max_bytes=40)
+    for i in range(4):
+        cache.put(f"k{i}", {"value": i}, ["t"]) # 12 bytes each
+    assert cache.get("k0") is None
+    assert [cache.get(f"k{i}") for i in (1, 2, 3)] == [{"value": 1}, {"value": 2}, {"value": 3}]
+    cache.get("k1")
+    cache.put("k4", {"value": 4}, ["t"])
+    assert cache.get("k2") is None and cache.get("k1") == {"value": 1}
+    assert cache.stats()["bytes"] <= 40
+    cache.put("big", {"value": "x" * 100}, ["t"])
+    assert cache.get("big") is None
+
+def test_invalidate_table_drops_dependents_only():
+    cache = ResultCache()
+    cache.put("a", {"value": 1}, ["t1"])
+    cache.put("b", {"value": 2}, ["t1", "t2"])
+    cache.put("c", {"value": 3}, ["t2"])
+    cache.invalidate_table("t1")
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") == {"value": 3}
+    assert "t1" not in cache.by_table and cache.by_table["t2"] == {"c"}
+
+def test_disk_tier_survives_restart_and_invalidation(tmp_path):
+    path = str(tmp_path / "results.sqlite")
+    ResultCache(disk_path=path).put("a", {"value": 1.5}, ["t1"])
+    ResultCache(disk_path=path).put("b", {"categories": ["x"], "values": [2]}, ["t2"])
+    cache = ResultCache(disk_path=path)
+    assert cache.get("a") == {"value": 1.5}
+    assert cache.stats()["entries"] == 1 # promoted to memory
+    cache.invalidate_table("t2")
+    assert ResultCache(disk_path=path).get("b") is None
+    assert ResultCache(disk_path=path).get("a") == {"value": 1.5}
+
+def test_new_table_version_is_never_served_stale():
+    frame = Frame({"x": np.arange(3)})
+    frame.version = "v1"
+    tables = {"PRC_Invoices": frame}
+    reports = [{"id": "n", "logic": LOGIC}]
+    cache = ResultCache()
+    assert evaluate_catalog(reports, tables, as_of=AS_OF, cache=cache)["n"] == {"value": 3}
+    assert cache.stats()["entries"] == 1
+    grown = Frame({"x": np.arange(5)})
+    grown.version = "v2"
+    tables["PRC_Invoices"] = grown
+    assert evaluate_catalog(reports, tables, as_of=AS_OF, cache=cache)["n"] == {"value": 5}
+
+def test_get_or_compute_computes_once():
+    cache, calls = ResultCache(), []
+    compute = lambda: calls.append(1) or {"value": 7}
+    for _ in range(3):
+        assert cache.get_or_compute(LOGIC, {"PRC_Invoices": "v1"}, compute, as_of=AS_OF) == {"value": 7}
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from report_engine import Frame
+from report_join import join_sources
+from schema_resolver import RequirementResolver
+
+def _frames():
+    invoices = Frame({
+        "invoice_id": np.array([1, 2, 3]),
+        "vendor_id": np.array([1, 1, 2]),
+        "invoice_amount": np.array([10.0, 20.0, 5.0]),
+        "status": np.array(["Open", "Paid", "Open"], dtype=object),
+    })
+    vendors = Frame({
+        "vendor_id": np.array([1, 2]),
+        "country": np.array(["DE", "SA"], dtype=object),
+        "status": np.array(["Active", "Blocked"], dtype=object),
+    })
+    invoices.version, vendors.version = "i1", "v1"
+    return {"PRC_Invoices": invoices, "PRC_Vendors": vendors}
+
+def _logic(join, requirements=()):
+    logic = {"sources": [{"table_keywords": ["Invoices"]}, {"table_keywords": ["Vendors"]}],
+             "requirements": list(requirements), "processing": []}
+    if join is not None:
+        logic["join"] = join
+    return logic
+
+@pytest.mark.parametrize("join", [None, {"on": "vendor_id"}, {"on": "common_id_placeholder", "type": "left"}, {"on": "missing"}])
+def test_schema_matches_joined_frame(join):
+    frames = _frames()
+    resolver = RequirementResolver(frames)
+    logic = _logic(join)
+    ids = resolver.table_ids(logic)
+    joined = join_sources(logic, [(name, frames[name]) for name in ids])
+    names = [c["name"] for c in resolver._schema(ids, logic.get("join"))]
+    assert names == list(joined.columns)
+    assert "vendor_id_right" not in names
+    assert "status_right" in names
+
+def test_declared_schema_drops_the_join_key():
+    # Nothing loaded: the key comes from the declared id roles, as in infer_join_key.
+    resolver = RequirementResolver()
+    names = [c["name"] for c in resolver._schema(("PRC_Invoices", "PRC_Vendors"))]
+    assert names.count("vendor_id") == 1 and "vendor_id_right" not in names
+    assert "country" in names
+
+def test_resolved_columns_exist_in_the_joined_frame():
+    frames = _frames()
+    resolver = RequirementResolver(frames)
+    requirements = [
+        {"key": "vendor", "keywords": ["vendor"], "types": ["number"]},
+        {"key": "country", "keywords": ["country"], "types": ["text"]},
+    ]
+    logic = _logic({"on": "vendor_id"}, requirements)
+    bindings = resolver.resolve(logic)
+    joined = join_sources(logic, [(name, frames[name]) for name in resolver.table_ids(logic)])
+    assert bindings == {"vendor": "vendor_id", "country": "country"}
+    assert all(column in joined.columns for column in bindings.values())
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+import pytest
+
+from report_engine import Frame, evaluate_report, run_processing
+from sketches import HyperLogLog, KLLSketch, load_sketch
+
+AS_OF = '2024-12-30'
+
+@pytest.mark.parametrize("n", [10, 1000, 10000, 100000])
+def test_hll_error_is_within_bound(n):
+    values = np.random.default_rng(n).integers(0, 1 << 62, n).astype(str)
+    estimate = HyperLogLog().update(values).estimate()
+    assert abs(estimate / len(np.unique(values)) - 1) < 0.045 # 99% bound for 2^12 registers is ~4.2%
+
+def test_hll_merge_equals_single_sketch():
+    values = np.random.default_rng(1).integers(0, 50000, 200000)
+    single = HyperLogLog().update(values)
+    merged = HyperLogLog().update(values[:70000]).merge(HyperLogLog().update(values[70000:]))
+    assert np.array_equal(merged.registers, single.registers)
+    loaded = load_sketch(json.loads(json.dumps(single.to_dict())))
+    assert loaded.estimate() == single.estimate()
+    assert HyperLogLog().is_empty() and not single.is_empty()
+
+@pytest.mark.parametrize("q", [0.5, 0.9, 0.99])
+def test_kll_rank_error_is_within_bound(q):
+    values = np.random.default_rng(2).lognormal(3, 1, 300000)
+    single = KLLSketch().update(values)
+    parts = [KLLSketch().update(part) for part in np.array_split(values, 7)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    for sketch in (single, merged):
+        assert abs((values <= sketch.quantile(q)).mean() - q) < 0.017
+    assert sum(len(level) for level in single.levels) < 1000
+    loaded = load_sketch(json.loads(json.dumps(single.to_dict())))
+    assert loaded.quantile(q) == single.quantile(q)
+
+def _requisitions(n=120000, seed=3):
+    rng = np.random.default_rng(seed)
+    requester = rng.integers(0, 3000, n).astype(str).astype(object)
+    requester[rng.random(n) < 0.01] = ''
+    return Frame({
+        "department": rng.choice(np.array(["finance", "procurement", "legal"], dtype=object), n),
+        "requester_id": requester,
+        "lead": rng.gamma(2.0, 10.0, n),
+    })
+
+@pytest.mark.parametrize("processing,tolerance", [
+    ([{"step": "aggregation", "operation": "count_distinct", "column_ref": "requester_id"}], 0.045),
+    ([{"step": "group_by", "group_column_ref": "department", "aggregation": "count_distinct", "value_column_ref": "requester_id"}], 0.045),
+    ([{"step": "group_by", "group_column_ref": "department", "aggregation": "p90", "value_column_ref": "lead"}], 0.05),
+    ([{"step": "aggregation", "operation": "median", "column_ref": "lead"}], 0.05),
+])
+def test_approximate_mode_is_close_and_exact_mode_is_exact(processing, tolerance):
+    frame = _requisitions()
+    logic = {"processing": processing}
+    exact = run_processing(processing, frame, None, AS_OF)
+    assert evaluate_report(logic, frame, as_of=AS_OF) == exact
+    approximate = evaluate_report(logic, frame, as_of=AS_OF, approximate=True)
+    if "categories" in exact:
+        assert approximate["categories"] == exact["categories"]
+        assert approximate["values"] == pytest.approx(exact["values"], rel=tolerance)
+    else:
+        assert approximate["value"] == pytest.approx(exact["value"], rel=tolerance)
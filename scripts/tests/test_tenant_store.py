@@ -0,0 +1,109 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from tenant_store import Handler, StoreError, TenantStore
+
+DB = {
+    "users": [{"id": 1, "name": "Ann", "age": 31}, {"id": "2", "name": "Bo", "age": 25}, {"id": 3, "name": "Cy", "age": 40, "active": True}],
+    "messages": [
+        {"id": "m1", "userId": 1, "text": "hi", "meta": {"lang": "en"}},
+        {"id": "m2", "userId": "2", "text": "yo", "meta": {"lang": "de"}},
+        {"id": "m3", "userId": 1, "text": "ok", "meta": {"lang": "en"}},
+    ],
+    "widgets": {"/home": [{"type": "bar"}], "/spend": [{"type": "pie"}, {"type": "kpi"}]},
+}
+
+@pytest.fixture
+def store(tmp_path):
+    store = TenantStore(str(tmp_path / "db.sqlite"))
+    store.import_db(json.loads(json.dumps(DB)))
+    return store
+
+def _ids(items):
+    return [item["id"] for item in items]
+
+def test_export_round_trips_the_document(store):
+    assert store.export_db() == DB
+    assert store.resources() == {"messages": "collection", "users": "collection", "widgets": "object"}
+
+def test_filters_match_json_server(store):
+    assert _ids(store.list("messages", [("userId", "1")])) == ["m1", "m3"]
+    assert _ids(store.list("messages", [("userId", "2")])) == ["m2"] # stored as text
+    assert _ids(store.list("messages", [("meta.lang", "de")])) == ["m2"]
+    assert _ids(store.list("users", [("age_gte", "31")])) == [1, 3]
+    assert _ids(store.list("users", [("age:lt", "31")])) == ["2"]
+    assert _ids(store.list("users", [("name_ne", "Bo")])) == [1, 3]
+    assert _ids(store.list("users", [("active", "true")])) == [3]
+    with pytest.raises(StoreError):
+        store.list("users", [("name') OR 1=1 --", "x")])
+
+def test_foreign_key_filters_use_an_index(store):
+    assert ("messages", "userId") in store.indexed
+    plan = store.conn().execute(
+        "EXPLAIN QUERY PLAN SELECT body FROM records WHERE collection = ? AND json_extract(body, '$.userId') IN (?, ?)",
+        ("messages", "1", 1)).fetchall()
+    assert "idx_messages_userId" in str(plan)
+
+def test_sort_and_pagination(store):
+    assert _ids(store.list("users", [("_sort", "-age")])) == [3, 1, "2"]
+    assert _ids(store.list("users", [("_sort", "age"), ("_order", "desc")])) == [3, 1, "2"]
+    assert _ids(store.list("users", [("_start", "1"), ("_limit", "1")])) == ["2"]
+    assert _ids(store.list("users", [("_start", "1"), ("_end", "3")])) == ["2", 3]
+    page = store.list("users", [("_page", "2"), ("_per_page", "2")])
+    assert page["data"] == [DB["users"][2]]
+    assert {k: page[k] for k in ("first", "prev", "next", "last", "pages", "items")} == \
+        {"first": 1, "prev": 1, "next": None, "last": 2, "pages": 2, "items": 3}
+
+def test_record_writes(store):
+    created = store.create("users", {"name": "Di"})
+    assert store.get("users", created["id"]) == created
+    with pytest.raises(StoreError) as conflict:
+        store.create("users", {"id": 1, "name": "Dup"})
+    assert conflict.value.status == 409
+    assert store.replace("users", 1, {"name": "Ann B"}) == {"id": 1, "name": "Ann B"}
+    assert store.replace("users", "2", {"age": 26}, merge=True) == {"id": "2", "name": "Bo", "age": 26}
+    store.delete("users", 1, dependent=["messages"])
+    assert _ids(store.list("messages")) == ["m2"]
+    with pytest.raises(StoreError) as missing:
+        store.get("users", 1)
+    assert missing.value.status == 404
+
+def test_object_resources_write_changed_keys_only(store):
+    store.write_object("widgets", {"/spend": [{"type": "pie"}], "/new": []}, merge=True)
+    assert list(store.read_object("widgets")) == ["/home", "/spend", "/new"]
+    assert store.read_object("widgets")["/spend"] == [{"type": "pie"}]
+    assert store.write_object("widgets", {"/new": [1]}) == {"/new": [1]}
+
+def test_http_api(store):
+    handler = type('TestHandler', (Handler,), {'store': store})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def call(method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(base + path, data, {"Content-Type": "application/json"}, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.loads(response.read() or b'null')
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'null')
+
+    try:
+        assert call("GET", "/messages?userId=1&_sort=-id") == (200, [DB["messages"][2], DB["messages"][0]])
+        status, created = call("POST", "/messages", {"userId": 3, "text": "new"})
+        assert status == 201 and call("GET", f"/messages/{created['id']}") == (200, created)
+        assert call("PATCH", "/users/3", {"age": 41})[1]["age"] == 41
+        assert call("PUT", "/widgets", {"/home": []}) == (200, {"/home": []})
+        assert call("DELETE", "/users/1?_dependent=messages")[0] == 200
+        assert call("GET", "/messages?userId=1") == (200, [])
+        assert call("GET", "/nope")[0] == 404
+        assert call("POST", "/widgets", {})[0] == 405
+    finally:
+        server.shutdown()
+        server.server_close()
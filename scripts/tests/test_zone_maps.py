@@ -0,0 +1,86 @@
+import csv
+
+import numpy as np
+import pytest
+
+import zone_maps
+from column_store import convert_csv, open_table
+from report_engine import Frame, evaluate_predicate, evaluate_report, load_csv_table, run_processing
+from zone_maps import ZONE_ROWS, ZoneMap, build_zone_map, scan_rows
+
+AS_OF = '2024-12-30'
+
+def _frame(n=6 * ZONE_ROWS + 123, seed=4):
+    rng = np.random.default_rng(seed)
+    # Mostly time-ordered dates, like an append-only export.
+    dates = np.datetime64('2020-01-01') + (np.arange(n) * 1800 // n + rng.integers(-3, 4, n)).astype('timedelta64[D]')
+    dates[rng.random(n) < 0.01] = np.datetime64('NaT')
+    amounts = rng.integers(0, 1000, n).astype(float)
+    amounts[rng.random(n) < 0.01] = np.nan
+    status = rng.integers(0, 3, n)
+    status[2 * ZONE_ROWS:3 * ZONE_ROWS] = 0 # a chunk with a single status
+    return Frame({"request_date": dates, "amount": amounts, "seq": np.arange(n), "status": status},
+                 {"status": ["Approved", "Open", "Rejected"]})
+
+PREDICATES = [
+    [("request_date", "gte", "2024-12-01")],
+    [("request_date", "between", ["2022-03-01", "2022-03-31"])],
+    [("seq", "eq", 5 * ZONE_ROWS + 7)],
+    [("seq", "in", [3, 2 * ZONE_ROWS, 10 ** 9])],
+    [("amount", "lt", 5)],
+    [("amount", "ne", 5)],
+    [("status", "eq", "Open")],
+    [("status", "in", ["Open", "Rejected"])],
+    [("status", "not_in", ["Approved"])],
+    [("seq", "gt", 3 * ZONE_ROWS), ("status", "eq", "Rejected")],
+    [("and", [("seq", "lt", ZONE_ROWS), ("amount", "gte", 500)])],
+    [("or", [("seq", "lt", 10), ("request_date", "gte", "2024-12-25")])],
+    [("or", [("seq", "lt", 10), ("amount", "ne", 1)])],
+]
+
+@pytest.mark.parametrize("predicates", PREDICATES)
+def test_scan_rows_match_a_full_scan(predicates):
+    frame = _frame()
+    mask = np.ones(frame.n, dtype=bool)
+    for predicate in predicates:
+        mask &= evaluate_predicate(frame, predicate)
+    assert scan_rows(frame, predicates).tolist() == np.flatnonzero(mask).tolist()
+    rows = np.arange(0, frame.n, 3)
+    assert scan_rows(frame, predicates, rows).tolist() == rows[mask[rows]].tolist()
+
+def test_time_windows_touch_few_chunks():
+    frame = _frame()
+    zones = zone_maps.zone_map_for(frame, "request_date")
+    assert zones.candidates("gte", "2024-12-01").sum() <= 2 < len(zones)
+    assert zone_maps.zone_map_for(frame, "status").candidates("eq", "Open", ["Approved", "Open", "Rejected"]).sum() == len(zones) - 1
+
+def test_zone_map_round_trip():
+    frame = _frame()
+    zones = build_zone_map(frame.columns["status"], frame.categories["status"])
+    loaded = ZoneMap.from_arrays(zones.kind, zones.to_arrays(), zones.chunk_rows, 3)
+    assert (loaded.present == zones.present).all()
+    assert build_zone_map(np.array(["a", "b"], dtype=object)) is None
+    assert len(build_zone_map(np.array([], dtype=float))) == 0
+
+def test_column_store_reports_match_in_memory(tmp_path):
+    frame = _frame(3 * ZONE_ROWS + 50)
+    labels = frame.categories["status"]
+    path = tmp_path / "PRC_Requisitions.csv"
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(["pr_id", "request_date", "amount", "status"])
+        for i in range(frame.n):
+            date, amount = frame.columns["request_date"][i], frame.columns["amount"][i]
+            w.writerow([f"P{i}", "" if np.isnat(date) else str(date), "" if np.isnan(amount) else amount,
+                        labels[frame.columns["status"][i]]])
+    convert_csv(str(path), str(tmp_path / "req"))
+    mapped, memory = open_table(str(tmp_path / "req")), load_csv_table(str(path))
+    for processing in [
+        [{"step": "filter", "column_ref": "request_date", "last_days": 30}, {"step": "group_by", "group_column_ref": "status", "aggregation": "count"}],
+        [{"step": "filter", "column_ref": "status", "op": "eq", "value": "Open"}, {"step": "aggregation", "operation": "sum", "column_ref": "amount"}],
+        [{"step": "filter", "column_ref": "request_date", "op": "between", "value": ["2020-06-01", "2020-09-30"]},
+         {"step": "filter", "column_ref": "amount", "op": "gte", "value": 900}, {"step": "aggregation", "operation": "count"}],
+    ]:
+        expected = run_processing(processing, memory, None, AS_OF)
+        assert evaluate_report({"processing": processing}, mapped, as_of=AS_OF) == expected
+        assert evaluate_report({"processing": processing}, memory, as_of=AS_OF) == expected
@@ -0,0 +1,152 @@
+import numpy as np
+
+from report_engine import evaluate_predicate, predicate_mask
+
+# Per-chunk summaries of a column: min/max for numbers, dates and dictionary codes, plus the
+# set of distinct codes for low-cardinality categorical columns. A filtered Scan asks every
+# predicate which chunks could hold a matching row and only reads those, so a "last 30 days"
+# window over years of mostly time-ordered rows touches a handful of chunks.
+
+ZONE_ROWS = 8192
+MAX_DISTINCT = 256
+
+def _keys(values):
+    """Values as float64 sort keys (dates as days since epoch); None if the column has no order."""
+    if values.dtype.kind == 'M':
+        days = values.astype('datetime64[D]')
+        keys = days.astype(np.int64).astype(np.float64)
+        keys[np.isnat(days)] = np.nan
+        return keys
+    if values.dtype.kind in 'fiub':
+        return values.astype(np.float64)
+    return None
+
+def _point_in_range(points, mins, maxs):
+    # Chunks whose [min, max] contains at least one of the sorted `points`.
+    if not len(points):
+        return np.zeros(len(mins), dtype=bool)
+    i = np.searchsorted(points, mins, side='left')
+    hit = i < len(points)
+    hit[hit] = points[i[hit]] <= maxs[hit]
+    return hit
+
+class ZoneMap:
+    def __init__(self, kind, mins, maxs, present=None, chunk_rows=ZONE_ROWS):
+        self.kind = kind             # 'M' dates, 'f' numbers, 'c' dictionary codes
+        self.mins = mins
+        self.maxs = maxs
+        self.present = present       # chunks x labels, for categorical columns only
+        self.chunk_rows = chunk_rows
+
+    def __len__(self):
+        return len(self.mins)
+
+    def candidates(self, op, value, labels=None):
+        """Boolean mask of the chunks that may contain a row satisfying `column <op> value`."""
+        if self.kind == 'c':
+            hit = predicate_mask(np.asarray(labels, dtype=object).astype(str), op, value)
+            if self.present is not None:
+                return self.present[:, hit].any(axis=1)
+            return _point_in_range(np.flatnonzero(hit).astype(np.float64), self.mins, self.maxs)
+
+        if op in ('ne', 'not_in'):
+            return np.ones(len(self), dtype=bool)
+        if op in ('eq', 'in'):
+            points = np.sort([self.key(v) for v in (value if op == 'in' else [value])])
+            return _point_in_range(points, self.mins, self.maxs)
+        lo, hi = -np.inf, np.inf
+        if op == 'between':
+            lo, hi = (self.key(v) for v in value)
+        elif op in ('gt', 'gte'):
+            lo = self.key(value)
+        elif op in ('lt', 'lte'):
+            hi = self.key(value)
+        # NaN bounds (all-missing chunks) compare False, which is right: missing never matches.
+        return (self.maxs >= lo) & (self.mins <= hi)
+
+    def key(self, value):
+        if self.kind == 'M':
+            return float(np.datetime64(str(value)[:10], 'D').astype(np.int64))
+        return float(value)
+
+    def to_arrays(self):
+        arrays = {'mins': self.mins, 'maxs': self.maxs}
+        if self.present is not None:
+            arrays['present'] = np.packbits(self.present, axis=1)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, kind, arrays, chunk_rows, nlabels=None):
+        present = None
+        if 'present' in arrays:
+            present = np.unpackbits(arrays['present'], axis=1, count=nlabels).astype(bool)
+        return cls(kind, arrays['mins'], arrays['maxs'], present, chunk_rows)
+
+def build_zone_map(values, labels=None, chunk_rows=ZONE_ROWS):
+    """Zone map of one column, or None for columns without an order (raw strings)."""
+    n = len(values)
+    starts = np.arange(0, n, chunk_rows)
+    if labels is not None:
+        codes = np.asarray(values)
+        if not n:
+            return ZoneMap('c', np.empty(0), np.empty(0), None, chunk_rows)
+        mins = np.minimum.reduceat(codes, starts).astype(np.float64)
+        maxs = np.maximum.reduceat(codes, starts).astype(np.float64)
+        present = None
+        if len(labels) <= MAX_DISTINCT:
+            present = np.zeros((len(starts), len(labels)), dtype=bool)
+            present[np.arange(n) // chunk_rows, codes] = True
+        return ZoneMap('c', mins, maxs, present, chunk_rows)
+
+    keys = _keys(np.asarray(values))
+    if keys is None:
+        return None
+    kind = 'M' if values.dtype.kind == 'M' else 'f'
+    if not n:
+        return ZoneMap(kind, np.empty(0), np.empty(0), None, chunk_rows)
+    return ZoneMap(kind, np.fmin.reduceat(keys, starts), np.fmax.reduceat(keys, starts), None, chunk_rows)
+
+def zone_map_for(frame, column):
+    """The column's zone map, built once per table and kept in frame.indexes."""
+    key = ('zone_map', column)
+    if key not in frame.indexes:
+        frame.indexes[key] = build_zone_map(frame.columns[column], frame.categories.get(column))
+    return frame.indexes[key]
+
+def candidate_chunks(frame, predicate):
+    """Chunk mask for a predicate tree, or None when no zone map can rule anything out."""
+    if len(predicate) == 2:
+        masks = [candidate_chunks(frame, child) for child in predicate[1]]
+        if predicate[0] == 'and':
+            masks = [m for m in masks if m is not None]
+            return np.logical_and.reduce(masks) if masks else None
+        return None if any(m is None for m in masks) else np.logical_or.reduce(masks)
+    column, op, value = predicate
+    zones = zone_map_for(frame, column)
+    return zones.candidates(op, value, frame.categories.get(column)) if zones is not None else None
+
+def scan_rows(frame, predicates, rows=None):
+    """Row numbers of `frame` matching every predicate tree in `predicates`.
+
+    Chunks ruled out by the zone maps are never read; the predicates are evaluated row by row
+    only inside the surviving chunks. `rows` (sorted row numbers already selected by another
+    index) skips the zone maps and restricts the evaluation to those rows.
+    """
+    if rows is None:
+        keep = None
+        for predicate in predicates:
+            candidates = candidate_chunks(frame, predicate)
+            if candidates is not None:
+                keep = candidates if keep is None else keep & candidates
+        if keep is not None and not keep.all():
+            starts = np.flatnonzero(keep) * ZONE_ROWS
+            lengths = np.minimum(starts + ZONE_ROWS, frame.n) - starts
+            # Concatenated ranges [start, start + length) without a Python loop.
+            rows = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+
+    for predicate in predicates:
+        if rows is None:
+            rows = np.flatnonzero(evaluate_predicate(frame, predicate))
+        elif len(rows):
+            rows = rows[evaluate_predicate(frame, predicate, rows)]
+    return rows if rows is not None else np.arange(frame.n)
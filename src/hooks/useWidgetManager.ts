@@ -122,7 +122,7 @@ export const useWidgetManager = () => {
         }
 
         if (type === 'dashboard-template' && data) {
-            const { moduleName, reports } = data;
+            const { moduleName, reports, bindings } = data;
 
             // 1. Create a new Dashboard Tab
             const newTabId = `tab-${Date.now()}`;
@@ -136,6 +136,20 @@ export const useWidgetManager = () => {
             // 2. Switch to the new tab
             setActiveTabByPage(prev => ({ ...prev, [activePage]: newTabId }));
 
+            // Tables on the page, looked up by title for precomputed bindings (table_bindings.py);
+            // reports without one fall back to matching their keywords against the titles.
+            const allPageWidgets = Object.values(pageWidgets).flat();
+            const availableTables = allPageWidgets.filter((w: any) => w.type === 'custom-table');
+            const tablesByTitle = new Map(availableTables.map((t: any) => [String(t.title).toLowerCase(), t]));
+            const findTable = (reportId: string, slot: string, keywords: string[]) => {
+                const tableId = bindings?.reports?.[reportId]?.[slot];
+                const title = tableId ? bindings.tables[tableId] : undefined;
+                const bound = title ? tablesByTitle.get(title.toLowerCase()) : undefined;
+                return bound || availableTables.find((t: any) =>
+                    keywords.some((k: string) => t.title.toLowerCase().includes(k.toLowerCase()))
+                );
+            };
+
             // 3. Generate Widgets for all reports
             const newWidgets = reports.map((report: any, index: number) => {
                 const chartTypeRaw = report["Chart Type (ECharts)"] || 'Bar Chart';
@@ -162,17 +176,12 @@ export const useWidgetManager = () => {
                 let connectedCount = 0;
                 let totalSources = 0;
 
-                const allPageWidgets = Object.values(pageWidgets).flat();
-                const availableTables = allPageWidgets.filter((w: any) => w.type === 'custom-table');
-
                 if (smartLogic) {
                     if (smartLogic.sources && Array.isArray(smartLogic.sources)) {
                         totalSources = smartLogic.sources.length;
                         smartLogic.sources.forEach((source: any, idx: number) => {
                             if (source.table_keywords) {
-                                const match = availableTables.find((t: any) =>
-                                    source.table_keywords.some((k: string) => t.title.toLowerCase().includes(k.toLowerCase()))
-                                );
+                                const match = findTable(report.id, `source_${idx}`, source.table_keywords);
                                 if (match) {
                                     sourceTableIds[`source_${idx}`] = match.id;
                                     if (!sourceTableId) sourceTableId = match.id;
@@ -182,10 +191,7 @@ export const useWidgetManager = () => {
                         });
                     } else if (smartLogic.source && smartLogic.source.table_keywords) {
                         totalSources = 1;
-                        const keywords = smartLogic.source.table_keywords;
-                        const match = availableTables.find((t: any) =>
-                            keywords.some((k: string) => t.title.toLowerCase().includes(k.toLowerCase()))
-                        );
+                        const match = findTable(report.id, 'primary', smartLogic.source.table_keywords);
                         if (match) {
                             sourceTableId = match.id;
                             sourceTableIds['primary'] = match.id;
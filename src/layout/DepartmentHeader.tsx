@@ -10,7 +10,7 @@ import AddReportModal from '../features/reports/components/AddReportModal';
 import TableTemplateModal from '../features/home/components/TableTemplateModal';
 import DashboardDropdownMenu from '../features/shared/components/DashboardDropdownMenu';
 import ReportDropdownMenu from '../features/shared/components/ReportDropdownMenu';
-import { reportService, Report, TableTemplate } from '../services/ReportService';
+import { reportService, Report, ReportBindings, TableTemplate } from '../services/ReportService';
 
 const WAREHOUSE_CATEGORIES = [
     "AI Optimization Intelligence",
@@ -150,6 +150,7 @@ const DepartmentHeader: React.FC<DepartmentHeaderProps> = ({ onInsert, activeTab
 
     const [reportsData, setReportsData] = useState<Report[]>([]);
     const [tableTemplates, setTableTemplates] = useState<TableTemplate[]>([]);
+    const [reportBindings, setReportBindings] = useState<ReportBindings>({ tables: {}, reports: {} });
     const [isLoading, setIsLoading] = useState(false);
 
     // Fetch data when activePage changes
@@ -163,16 +164,19 @@ const DepartmentHeader: React.FC<DepartmentHeaderProps> = ({ onInsert, activeTab
                     const dept = parts[0]; // supply-chain
                     const domain = parts[1]; // procurement
 
-                    const [reports, tables] = await Promise.all([
+                    const [reports, tables, bindings] = await Promise.all([
                         reportService.getReports(dept, domain),
-                        reportService.getTables(dept, domain)
+                        reportService.getTables(dept, domain),
+                        reportService.getBindings(dept, domain)
                     ]);
 
                     setReportsData(reports);
                     setTableTemplates(tables);
+                    setReportBindings(bindings);
                 } else {
                     setReportsData([]);
                     setTableTemplates([]);
+                    setReportBindings({ tables: {}, reports: {} });
                 }
             } catch (error) {
                 console.error("Failed to load department data:", error);
@@ -387,7 +391,7 @@ const DepartmentHeader: React.FC<DepartmentHeaderProps> = ({ onInsert, activeTab
     };
 
     const handleCreateDashboardTemplate = (moduleName: string, reports: any[], keepOpen?: boolean) => {
-        onInsert?.('dashboard-template', { moduleName, reports });
+        onInsert?.('dashboard-template', { moduleName, reports, bindings: reportBindings });
         showToast(`Creating dashboard for ${moduleName}...`, 'success');
         if (!keepOpen) {
             setActiveMenu(null);
@@ -654,7 +658,7 @@ const DepartmentHeader: React.FC<DepartmentHeaderProps> = ({ onInsert, activeTab
                                                                     customCategories={undefined}
                                                                     customModules={undefined}
                                                                     onSelectModule={(moduleName, reports, keepOpen) => {
-                                                                        onInsert?.('dashboard-template', { moduleName, reports });
+                                                                        onInsert?.('dashboard-template', { moduleName, reports, bindings: reportBindings });
                                                                         if (!keepOpen) setActiveMenu(null);
                                                                     }}
                                                                     onClose={() => setActiveMenu(null)}
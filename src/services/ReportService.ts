@@ -21,6 +21,13 @@ export interface TableTemplate {
     [key: string]: any;
 }
 
+// Precomputed by scripts/table_bindings.py: report id -> source slot ("primary", "source_0", ...)
+// -> table id, plus the display name of every bound table.
+export interface ReportBindings {
+    tables: Record<string, string>;
+    reports: Record<string, Record<string, string>>;
+}
+
 class ReportService {
     private cache: Map<string, any> = new Map();
 
@@ -70,6 +77,19 @@ class ReportService {
         return this.fetchData<TableTemplate[]>(path);
     }
 
+    async getBindings(department: string, domain: string): Promise<ReportBindings> {
+        let deptFolder = '';
+        if (department === 'supply-chain') deptFolder = 'supply_chain_reports';
+        else if (department === 'operations') deptFolder = 'operations_reports';
+        else if (department === 'business') deptFolder = 'business_reports';
+        else if (department === 'support') deptFolder = 'support_reports';
+        else return { tables: {}, reports: {} };
+
+        const path = `/data/reports/${deptFolder}/${domain}/${domain}_bindings.json`;
+        const data = await this.fetchData<ReportBindings>(path);
+        return data && !Array.isArray(data) ? data : { tables: {}, reports: {} };
+    }
+
     async getTemplates(type: string): Promise<any[]> {
         // e.g. procurement_tables.json
         const path = `/data/templates/${type}_tables.json`;